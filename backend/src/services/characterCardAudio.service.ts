@@ -130,9 +130,8 @@ export class CharacterCardAudioService {
     // Generate catchphrase based on character name and preset
     const catchphrase = this.generateCatchphrase(characterName, preset);
 
-    // Convert character name to proper case for TTS (avoids letter-by-letter pronunciation)
-    const properCaseName = this.toProperCase(characterName);
-    const text = `${properCaseName}. ${catchphrase}`;
+    // The TTS service normalizes casing (NARRATOR ONE → Narrator One) before synthesis
+    const text = `${characterName}. ${catchphrase}`;
 
     // Call TTS service with Chatterbox engine
     const audioBuffer = await this.ttsClient.synthesize({
@@ -201,26 +200,6 @@ export class CharacterCardAudioService {
     return referenceAudioPath;
   }
 
-  /**
-   * Convert all-caps character name to proper case for TTS
-   * Prevents TTS from spelling out letters (NARRATOR → Narrator)
-   *
-   * @param name - Character name (e.g., "NARRATOR ONE")
-   * @returns Proper case name (e.g., "Narrator One")
-   */
-  private toProperCase(name: string): string {
-    return name
-      .split(' ')
-      .map(word => {
-        // Handle numbers (ONE, TWO, etc.)
-        if (/^\d+$/.test(word)) return word;
-
-        // Capitalize first letter, lowercase rest
-        return word.charAt(0).toUpperCase() + word.slice(1).toLowerCase();
-      })
-      .join(' ');
-  }
-
   /**
    * Sanitize filename (remove special characters)
    *
@@ -12,6 +12,9 @@ export interface TTSRequest {
   };
 }
 
+// Used when the TTS service cannot provide an estimate
+const DEFAULT_TIMEOUT_MS = 30000;
+
 export class TTSClientService {
   private baseURL: string;
 
@@ -33,9 +36,10 @@ export class TTSClientService {
         emotion: request.emotion
       };
 
+      const timeout = await this.estimateTimeout(pythonRequest);
       const response = await axios.post(`${this.baseURL}/synthesize`, pythonRequest, {
         responseType: 'arraybuffer',
-        timeout: 30000,
+        timeout,
       });
 
       return Buffer.from(response.data);
@@ -44,6 +48,22 @@ export class TTSClientService {
     }
   }
 
+  /**
+   * Request deadline from the service's expected completion time
+   * (queue wait + render), falling back to the fixed default
+   */
+  private async estimateTimeout(pythonRequest: object): Promise<number> {
+    try {
+      const response = await axios.post(`${this.baseURL}/estimate`, pythonRequest, {
+        timeout: 2000,
+      });
+      const seconds = Number(response.data?.suggested_timeout_seconds);
+      return Number.isFinite(seconds) && seconds > 0 ? Math.ceil(seconds * 1000) : DEFAULT_TIMEOUT_MS;
+    } catch {
+      return DEFAULT_TIMEOUT_MS;
+    }
+  }
+
   /**
    * List available voices
    */
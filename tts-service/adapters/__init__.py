@@ -1,6 +1,6 @@
 """TTS adapters package"""
 
-from .base import TTSAdapter, TTSRequest, VoiceInfo, EmotionParams
+from .base import TTSAdapter, TTSRequest, VoiceInfo, EmotionParams, SynthesisItem
 from .index_tts_adapter import IndexTTSAdapter
 from .chatterbox_adapter import ChatterboxAdapter
 
@@ -9,6 +9,7 @@ __all__ = [
     'TTSRequest',
     'VoiceInfo',
     'EmotionParams',
+    'SynthesisItem',
     'IndexTTSAdapter',
     'ChatterboxAdapter',
 ]
@@ -2,8 +2,10 @@
 Base adapter interface for TTS engines
 """
 
+import contextlib
+import contextvars
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Iterator, List, Optional
 from pydantic import BaseModel
 
 
@@ -14,6 +16,9 @@ class VoiceInfo(BaseModel):
     gender: str  # 'M', 'F', 'N' (neutral)
     age_range: str = "adult"
     preview_url: str | None = None
+    digest: str | None = None        # Content hash of the reference audio
+    duration: float | None = None    # Reference audio length (seconds)
+    sample_rate: int | None = None
 
 
 class EmotionParams(BaseModel):
@@ -31,6 +36,41 @@ class TTSRequest(BaseModel):
     emotion: EmotionParams
 
 
+class SynthesisItem(BaseModel):
+    """One line in a batch synthesis call"""
+    text: str
+    voice_id: str
+    emotion: EmotionParams
+    max_duration: Optional[float] = None
+
+
+# Clips the current synthesis call served from an engine-side cache (see track_cached_clips)
+_cached_clips: contextvars.ContextVar[Optional[List[bytes]]] = contextvars.ContextVar("cached_clips", default=None)
+
+
+def report_cached_clip(audio: bytes) -> None:
+    """Called by adapters that return a clip without rendering it (e.g. a clip bank hit)"""
+    clips = _cached_clips.get()
+    if clips is not None:
+        clips.append(audio)
+
+
+@contextlib.contextmanager
+def track_cached_clips() -> Iterator[List[bytes]]:
+    """
+    Collect the clips adapters report as cached during a synthesis call
+
+    Callers timing renders leave these out of real-time factor samples:
+    they take no render time, so they would drag the estimates down.
+    """
+    clips: List[bytes] = []
+    token = _cached_clips.set(clips)
+    try:
+        yield clips
+    finally:
+        _cached_clips.reset(token)
+
+
 class TTSAdapter(ABC):
     """Abstract base class for TTS engine adapters"""
 
@@ -44,7 +84,8 @@ class TTSAdapter(ABC):
         self,
         text: str,
         voice_id: str,
-        emotion: EmotionParams
+        emotion: EmotionParams,
+        max_duration: Optional[float] = None
     ) -> bytes:
         """
         Generate audio bytes (WAV format) from text
@@ -53,12 +94,37 @@ class TTSAdapter(ABC):
             text: The text to synthesize
             voice_id: ID of the voice to use
             emotion: Emotion parameters
+            max_duration: Generation budget in seconds; engines abort and
+                retry generations that run past it
 
         Returns:
             Audio data as bytes (WAV format)
         """
         pass
 
+    async def synthesize_batch(self, items: List[SynthesisItem]) -> List[bytes]:
+        """
+        Generate audio for several lines
+
+        Default implementation calls `synthesize` sequentially; engines that
+        can decode several texts at once override it.
+
+        Args:
+            items: Lines to synthesize
+
+        Returns:
+            WAV bytes for each item, in input order
+        """
+        return [
+            await self.synthesize(
+                text=item.text,
+                voice_id=item.voice_id,
+                emotion=item.emotion,
+                max_duration=item.max_duration
+            )
+            for item in items
+        ]
+
     @abstractmethod
     def list_voices(self) -> List[VoiceInfo]:
         """
@@ -76,3 +142,12 @@ class TTSAdapter(ABC):
         Loads model weights into GPU memory
         """
         pass
+
+    def release(self) -> None:
+        """
+        Drop references that shared services hold to this adapter
+
+        Called before a discarded adapter (e.g. an autotune candidate) is
+        deleted, so its weights can be freed. Default: nothing to drop.
+        """
+        pass
@@ -3,32 +3,106 @@ Chatterbox TTS Adapter
 Uses Chatterbox for fast, high-quality voice cloning
 """
 
+import contextlib
 import os
-import io
+import logging
+import threading
+import time
 import torch
-import torchaudio
-from typing import List
-from .base import TTSAdapter, VoiceInfo, EmotionParams
+from typing import Dict, List, Optional
+from .base import TTSAdapter, VoiceInfo, EmotionParams, SynthesisItem, report_cached_clip
+from .chatterbox_batch import generate_batch
+from .cpu_optimizations import CpuOptimizationConfig, configure_threads, quantize_linear, compile_method
+from .decode_guard import DecodeGuard, GenerationAborted, run_cancellable
+from .shared_weights import load_shared, snapshot_path
+from .short_utterance import ShortUtteranceConfig, ShortUtteranceBank, is_short_utterance
+from services.voice_library import VoiceLibrary, VoiceEntry
+from services.eviction import WeightedCache
+from services.metrics import metrics
+from services.post_processing import PostProcessConfig, post_process, encode_wav, render_wav
+
+logger = logging.getLogger(__name__)
+
+# Chatterbox's S3 speech tokenizer emits 25 tokens per second of audio
+SPEECH_TOKEN_RATE = 25
+
+# Chatterbox's own decoder limit when no budget is given
+MAX_NEW_TOKENS = 1000
+
+# Reduced-precision generation on CUDA (see `autocast_dtype`)
+AUTOCAST_DTYPES = {"fp16": torch.float16, "bf16": torch.bfloat16}
 
 
 class ChatterboxAdapter(TTSAdapter):
     """Adapter for Chatterbox TTS engine"""
 
-    def __init__(self, model_dir: str, device: str):
+    ENGINE = "chatterbox"
+
+    def __init__(
+        self,
+        model_dir: str,
+        device: str,
+        voice_library: Optional[VoiceLibrary] = None,
+        short_utterances: Optional[ShortUtteranceConfig] = None,
+        max_retries: int = 1,
+        max_batch_size: int = 8,
+        cpu_optimizations: Optional[CpuOptimizationConfig] = None,
+        shared_weights_dir: Optional[str] = None,
+        post_processing: Optional[PostProcessConfig] = None,
+        autocast_dtype: Optional[str] = None,
+        emotion_levels: Optional[List[float]] = None,
+        conditioning_cache: Optional[WeightedCache] = None
+    ):
         """
         Initialize Chatterbox TTS
 
         Args:
             model_dir: Not used for Chatterbox (uses HuggingFace models)
             device: 'cuda:0' or 'cpu'
+            voice_library: Optional indexed voice library (precomputed conditioning)
+            short_utterances: Settings for the one/two-word fast path
+            max_retries: Re-seeded attempts after a generation overruns its budget
+            max_batch_size: Most texts decoded together by `synthesize_batch`
+            cpu_optimizations: CPU performance mode (only applied when device is 'cpu')
+            shared_weights_dir: Map weights from a snapshot shared by all worker
+                processes instead of loading a private copy (CPU only)
+            post_processing: Trim/normalize/pad settings applied to every line
+            autocast_dtype: 'fp16' or 'bf16' to run generation under CUDA
+                autocast (None = fp32; ignored on CPU)
+            emotion_levels: Quantized intensities the service sends; indexed
+                voices get conditioning for each level during warmup
+            conditioning_cache: Bounded cache for loaded voice conditioning
+                (default: 256 MB, GDSF eviction)
         """
         self.device = device
         self.model = None
         self.sr = 24000  # Chatterbox sample rate
+        self.voice_library = voice_library
+        self.short_config = short_utterances or ShortUtteranceConfig()
+        self.short_bank = ShortUtteranceBank(self.short_config.cache_size)
+        self.max_retries = max_retries
+        self.max_batch_size = max_batch_size
+        self.cpu_config = cpu_optimizations if device == "cpu" else None
+        self.shared_weights_dir = shared_weights_dir if device == "cpu" else None
+        self.post_config = post_processing or PostProcessConfig()
+        self.autocast_dtype = AUTOCAST_DTYPES.get(autocast_dtype) if device.startswith("cuda") else None
+        self.emotion_levels = list(emotion_levels or [])
+
+        # The model holds the active voice in `model.conds`, so every use of
+        # the model (including background voice conditioning) is serialized
+        self._lock = threading.Lock()
+        self._default_conds = None
+        self.conditioning_cache = conditioning_cache or WeightedCache(256 * 1024 * 1024)
+
+        if self.cpu_config is not None:
+            configure_threads(self.cpu_config.intra_op_threads, self.cpu_config.inter_op_threads)
 
         # Load model lazily (on first synthesis call)
         self._load_model()
 
+        if voice_library is not None:
+            voice_library.register_conditioner(self.ENGINE, self._condition_voice, self.sr)
+
     def _load_model(self):
         """Load Chatterbox model from pretrained weights"""
         if self.model is not None:
@@ -36,18 +110,79 @@ class ChatterboxAdapter(TTSAdapter):
 
         try:
             from chatterbox import ChatterboxTTS
-            self.model = ChatterboxTTS.from_pretrained(device=self.device)
+            if self.shared_weights_dir:
+                self.model = self._load_shared_model(ChatterboxTTS)
+            else:
+                self.model = ChatterboxTTS.from_pretrained(device=self.device)
             self.sr = self.model.sr
+            self._default_conds = self.model.conds
         except ImportError:
             raise RuntimeError(
                 "Chatterbox not installed. Install with: pip install chatterbox-tts"
             )
 
+        if self.cpu_config is not None:
+            self._apply_cpu_optimizations()
+
+    def _load_shared_model(self, model_cls):
+        """
+        Build ChatterboxTTS around components mapped from the shared snapshot
+
+        The snapshot holds the fp32 weights, so int8 quantization (if enabled)
+        still makes a private T3 copy per worker; disable CPU_QUANTIZE for the
+        smallest per-worker footprint.
+        """
+        try:
+            from importlib.metadata import version
+            chatterbox_version = version("chatterbox-tts")
+        except Exception:
+            chatterbox_version = "unknown"
+
+        def build():
+            model = model_cls.from_pretrained(device="cpu")
+            return {
+                "t3": model.t3,
+                "s3gen": model.s3gen,
+                "ve": model.ve,
+                "tokenizer": model.tokenizer,
+                "conds": model.conds,
+            }
+
+        path = snapshot_path(self.shared_weights_dir, self.ENGINE, chatterbox_version)
+        parts = load_shared(path, build)
+        return model_cls(
+            parts["t3"], parts["s3gen"], parts["ve"], parts["tokenizer"],
+            self.device, conds=parts["conds"]
+        )
+
+    def _apply_cpu_optimizations(self):
+        """
+        CPU performance mode
+
+        T3 (the autoregressive decoder, most of the CPU time) gets int8
+        dynamic quantization; the S3Gen flow estimator stays fp32 and is
+        compiled. Compilation is lazy, so `warmup` pays it.
+        """
+        config = self.cpu_config
+
+        if config.quantize:
+            quantize_linear(self.model.t3)
+            logger.info("Quantized Chatterbox T3 linear layers to int8")
+
+        if config.compile:
+            # The flow matcher calls `estimator.forward(...)` directly. The
+            # HiFi-GAN vocoder stays eager: its `decode` graph-breaks on the
+            # complex STFT, so dynamo skips it and gains nothing on CPU
+            flow_decoder = getattr(getattr(self.model.s3gen, 'flow', None), 'decoder', None)
+            if flow_decoder is not None and hasattr(flow_decoder, 'estimator'):
+                compile_method(flow_decoder.estimator, "forward", "s3gen.flow.decoder.estimator")
+
     async def synthesize(
         self,
         text: str,
         voice_id: str,
-        emotion: EmotionParams
+        emotion: EmotionParams,
+        max_duration: Optional[float] = None
     ) -> bytes:
         """
         Generate audio using Chatterbox TTS
@@ -56,6 +191,7 @@ class ChatterboxAdapter(TTSAdapter):
             text: Text to synthesize
             voice_id: Path to reference audio file (voice prompt)
             emotion: Emotion parameters (intensity maps to exaggeration)
+            max_duration: Generation budget in seconds (None = unbounded)
 
         Returns:
             WAV audio bytes
@@ -66,39 +202,403 @@ class ChatterboxAdapter(TTSAdapter):
         # emotion.intensity (0.0-1.0) → exaggeration parameter
         exaggeration = emotion.intensity
 
-        # Generate audio
-        try:
-            # Set manual seed for reproducibility
-            # Prevents non-deterministic behavior and voice state pollution
-            torch.manual_seed(42)
-            if torch.cuda.is_available():
-                torch.cuda.manual_seed(42)
+        entry = self.voice_library.resolve(voice_id) if self.voice_library else None
 
-            # Check if voice_id is a file path (reference audio)
-            if os.path.exists(voice_id):
-                # Voice cloning mode with reference audio
-                wav = self.model.generate(
-                    text,
-                    audio_prompt_path=voice_id,
-                    exaggeration=exaggeration,
-                    cfg_weight=0.7  # Changed from 0.5 - prevents corruption with expressive voices
+        # Short lines ("Help!", "Braiiiins.") are served from the clip bank when possible
+        short = is_short_utterance(text, self.short_config.max_words)
+        if short:
+            bank_key = self.short_bank.key(entry.digest if entry else voice_id, text, exaggeration)
+            clip = self.short_bank.get(bank_key)
+            if clip is not None:
+                report_cached_clip(clip)
+                return clip
+
+        # Generate audio in a worker thread; cancelling this coroutine stops
+        # the decoder at its next step
+        try:
+            if short:
+                wav = await run_cancellable(
+                    self._generate_short, text, voice_id, entry, exaggeration, max_duration
                 )
             else:
-                # Default voice mode (no reference audio)
-                wav = self.model.generate(
-                    text,
-                    exaggeration=exaggeration
+                wav = await run_cancellable(
+                    self._generate_bounded,
+                    text, voice_id, entry, exaggeration, max_duration, self.max_retries
                 )
 
-            # Convert tensor to WAV bytes
-            return self._tensor_to_wav(wav)
+            # Trim, normalize and encode off the event loop
+            audio = await self._encode(wav)
 
         except Exception as e:
             raise RuntimeError(f"Chatterbox synthesis failed: {e}")
 
+        if short:
+            self.short_bank.put(bank_key, audio)
+        return audio
+
+    async def synthesize_batch(self, items: List[SynthesisItem]) -> List[bytes]:
+        """
+        Generate several lines, decoding texts that share a voice in one padded batch
+
+        Short lines keep their dedicated path (clip bank + tuned settings).
+        Texts that overrun their budget inside a batch, or batches the
+        installed Chatterbox cannot decode natively, fall back to `synthesize`.
+
+        Returns:
+            WAV bytes for each item, in input order
+        """
+        self._load_model()
+        results: List[Optional[bytes]] = [None] * len(items)
+
+        groups: Dict[tuple, List[int]] = {}
+        for index, item in enumerate(items):
+            if is_short_utterance(item.text, self.short_config.max_words):
+                results[index] = await self.synthesize(
+                    item.text, item.voice_id, item.emotion, item.max_duration
+                )
+                continue
+            groups.setdefault((item.voice_id, item.emotion.intensity), []).append(index)
+
+        for (voice_id, exaggeration), indices in groups.items():
+            entry = self.voice_library.resolve(voice_id) if self.voice_library else None
+
+            # Similar lengths share a batch to keep padding small
+            indices.sort(key=lambda i: len(items[i].text))
+            for start in range(0, len(indices), self.max_batch_size):
+                chunk = indices[start:start + self.max_batch_size]
+                try:
+                    wavs = await run_cancellable(
+                        self._generate_batch,
+                        [items[i] for i in chunk], voice_id, entry, exaggeration
+                    )
+                except Exception as e:
+                    logger.warning(f"Batched generation failed, falling back to sequential: {e}")
+                    wavs = [None] * len(chunk)
+
+                for index, wav in zip(chunk, wavs):
+                    item = items[index]
+                    if wav is None:
+                        results[index] = await self.synthesize(
+                            item.text, item.voice_id, item.emotion, item.max_duration
+                        )
+                    else:
+                        results[index] = await self._encode(wav)
+
+        return results
+
+    def _generate_batch(
+        self,
+        items: List[SynthesisItem],
+        voice_id: str,
+        entry: Optional[VoiceEntry],
+        exaggeration: float
+    ) -> List[Optional[torch.Tensor]]:
+        """
+        Decode texts sharing one voice together
+
+        Returns:
+            Audio tensors in input order; None for texts that overran their budget
+        """
+        max_steps = [
+            int(item.max_duration * SPEECH_TOKEN_RATE) if item.max_duration else MAX_NEW_TOKENS
+            for item in items
+        ]
+
+        with self._lock, self._autocast():
+            torch.manual_seed(42)
+            if torch.cuda.is_available():
+                torch.cuda.manual_seed(42)
+
+            conds, cfg_weight = self._batch_conditionals(voice_id, entry, exaggeration)
+            wavs = generate_batch(
+                self.model,
+                conds,
+                [item.text for item in items],
+                exaggeration,
+                max_steps,
+                cfg_weight=cfg_weight
+            )
+
+        overran = sum(1 for wav in wavs if wav is None)
+        if overran:
+            metrics.increment("generation_aborts", overran, engine=self.ENGINE)
+        metrics.observe("batch_size", len(items), engine=self.ENGINE)
+        return wavs
+
+    def _autocast(self):
+        """Reduced-precision context for generation (no-op in fp32)"""
+        if self.autocast_dtype is None:
+            return contextlib.nullcontext()
+        return torch.autocast("cuda", dtype=self.autocast_dtype)
+
+    def _batch_conditionals(
+        self,
+        voice_id: str,
+        entry: Optional[VoiceEntry],
+        exaggeration: float
+    ) -> tuple:
+        """
+        Conditioning for a batch (caller holds the model lock)
+
+        Returns:
+            (Conditionals, cfg_weight) — same voice selection as `_generate`
+        """
+        conds = self._get_conditionals(entry, exaggeration) if entry else None
+        if conds is not None:
+            return conds, 0.7
+
+        reference_path = voice_id
+        if entry is not None:
+            reference_path = entry.prepared.get(self.ENGINE, entry.path)
+        if os.path.exists(reference_path):
+            self.model.prepare_conditionals(reference_path, exaggeration=exaggeration)
+            return self.model.conds, 0.7
+
+        return self._default_conds, 0.5
+
+    def _generate_short(
+        self,
+        text: str,
+        voice_id: str,
+        entry: Optional[VoiceEntry],
+        exaggeration: float,
+        max_duration: Optional[float] = None
+    ) -> torch.Tensor:
+        """Short-utterance mode: tuned sampling under a small decoder budget"""
+        config = self.short_config
+        budget = config.max_seconds
+        if max_duration is not None:
+            budget = min(budget, max_duration)
+
+        return self._generate_bounded(
+            text,
+            voice_id,
+            entry,
+            exaggeration,
+            budget,
+            config.retries,
+            cfg_weight=config.cfg_weight,
+            temperature=config.temperature
+        )
+
+    def _generate_bounded(
+        self,
+        text: str,
+        voice_id: str,
+        entry: Optional[VoiceEntry],
+        exaggeration: float,
+        max_duration: Optional[float],
+        retries: int,
+        **options
+    ) -> torch.Tensor:
+        """
+        Generate under a decoder step budget derived from `max_duration`
+
+        A generation that runs past the budget is almost always a repetition
+        loop, so it is stopped early (freeing the model) and retried with a
+        different seed.
+
+        Raises:
+            GenerationAborted: If every attempt overran
+        """
+        max_steps = None
+        if max_duration is not None:
+            # +1 for the prefill forward pass
+            max_steps = int(max_duration * SPEECH_TOKEN_RATE) + 1
+
+        for attempt in range(retries + 1):
+            try:
+                with self._lock, DecodeGuard(self._decoder(), max_steps), self._autocast():
+                    return self._generate(
+                        text,
+                        voice_id,
+                        entry,
+                        exaggeration,
+                        seed=42 + attempt,
+                        **options
+                    )
+            except GenerationAborted as e:
+                metrics.increment("generation_aborts", engine=self.ENGINE)
+                logger.warning(
+                    f"Generation for {text[:40]!r} overran {max_duration:.1f}s budget "
+                    f"(attempt {attempt + 1}/{retries + 1})"
+                )
+                aborted = e
+        metrics.increment("generation_abort_failures", engine=self.ENGINE)
+        raise aborted
+
+    def _generate(
+        self,
+        text: str,
+        voice_id: str,
+        entry: Optional[VoiceEntry],
+        exaggeration: float,
+        seed: int = 42,
+        **options
+    ) -> torch.Tensor:
+        """
+        Run the model for one line (caller holds the model lock)
+
+        Indexed voices use precomputed conditioning (or, until that exists,
+        their prepared prompt); unknown paths fall back to conditioning from
+        the raw reference audio.
+
+        Args:
+            options: Extra `model.generate` keyword arguments (override defaults)
+        """
+        # Set manual seed for reproducibility
+        # Prevents non-deterministic behavior and voice state pollution
+        torch.manual_seed(seed)
+        if torch.cuda.is_available():
+            torch.cuda.manual_seed(seed)
+
+        # cfg_weight 0.7 (was 0.5) prevents corruption with expressive voices
+        clone_options = {"cfg_weight": 0.7, **options}
+
+        conds = self._get_conditionals(entry, exaggeration) if entry else None
+        if conds is not None:
+            # Indexed voice: skip reference audio loading and embedding
+            self.model.conds = conds
+            return self.model.generate(
+                text,
+                exaggeration=exaggeration,
+                **clone_options
+            )
+
+        reference_path = voice_id
+        if entry is not None:
+            reference_path = entry.prepared.get(self.ENGINE, entry.path)
+        if os.path.exists(reference_path):
+            # Voice cloning mode with reference audio
+            return self.model.generate(
+                text,
+                audio_prompt_path=reference_path,
+                exaggeration=exaggeration,
+                **clone_options
+            )
+
+        # Default voice mode (no reference audio)
+        self.model.conds = self._default_conds
+        return self.model.generate(
+            text,
+            exaggeration=exaggeration,
+            **options
+        )
+
+    def _decoder(self) -> Optional[torch.nn.Module]:
+        """T3 transformer (called once per generated speech token)"""
+        return getattr(self.model.t3, 'tfmr', None)
+
+    def prerender_short_utterances(self, exaggeration: float = 0.5) -> int:
+        """
+        Render the configured interjections for every indexed voice into the clip bank
+
+        Each render takes the model lock separately, so live requests interleave.
+
+        Returns:
+            Number of clips rendered
+        """
+        if self.voice_library is None:
+            return 0
+
+        rendered = 0
+        for entry in self.voice_library.list():
+            for phrase in self.short_config.phrases:
+                key = self.short_bank.key(entry.digest, phrase, exaggeration)
+                if key in self.short_bank:
+                    continue
+                try:
+                    wav = self._generate_short(phrase, entry.path, entry, exaggeration)
+                    self.short_bank.put(key, self._tensor_to_wav(wav))
+                    rendered += 1
+                except Exception as e:
+                    logger.warning(f"Failed to pre-render {phrase!r} for {entry.id}: {e}")
+        return rendered
+
+    def _get_conditionals(self, entry: VoiceEntry, exaggeration: Optional[float] = None):
+        """
+        Load precomputed conditioning for an indexed voice (memoized per artifact)
+
+        For an exaggeration that is one of `emotion_levels`, returns a copy
+        whose emotion already matches, so generation neither rebuilds the
+        T3 conditioning nor overwrites the cached one. Level copies share the
+        voice's tensors and are evicted with it.
+
+        Returns:
+            chatterbox Conditionals, or None if not yet computed
+        """
+        artifact = entry.conditioning.get(self.ENGINE)
+        if not artifact:
+            return None
+
+        variants = self.conditioning_cache.get(artifact)
+        if variants is None:
+            if not os.path.exists(artifact):
+                return None
+            from chatterbox.tts import Conditionals
+            start = time.perf_counter()
+            conds = Conditionals.load(artifact, map_location=self.device).to(self.device)
+            # Artifact size stands in for the tensors' memory; load time is the cost of a miss
+            variants = {None: conds}
+            self.conditioning_cache.put(artifact, variants, os.path.getsize(artifact), time.perf_counter() - start)
+
+        if exaggeration not in self.emotion_levels:
+            return variants[None]
+        conds = variants.get(exaggeration)
+        if conds is None:
+            conds = variants[exaggeration] = self._with_emotion(variants[None], exaggeration)
+        return conds
+
+    def _with_emotion(self, conds, exaggeration: float):
+        """Conditionals sharing `conds`' voice tensors with the emotion set to `exaggeration`"""
+        from chatterbox.tts import Conditionals
+        from chatterbox.models.t3.modules.cond_enc import T3Cond
+
+        t3 = T3Cond(
+            speaker_emb=conds.t3.speaker_emb,
+            cond_prompt_speech_tokens=conds.t3.cond_prompt_speech_tokens,
+            emotion_adv=exaggeration * torch.ones(1, 1, 1),
+        ).to(device=self.device)
+        return Conditionals(t3, conds.gen)
+
+    def precondition_emotion_levels(self) -> int:
+        """
+        Build conditioning for every indexed voice at every emotion level
+
+        Returns:
+            Number of (voice, level) conditionings available
+        """
+        if self.voice_library is None or not self.emotion_levels:
+            return 0
+        ready = 0
+        with self._lock:
+            for entry in self.voice_library.list():
+                for level in self.emotion_levels:
+                    if self._get_conditionals(entry, level) is not None:
+                        ready += 1
+        return ready
+
+    def _condition_voice(self, reference_path: str, artifact_path: str) -> None:
+        """
+        Voice library hook: compute and persist speaker conditioning
+
+        Args:
+            reference_path: Prepared reference prompt to embed
+            artifact_path: Where to save the Conditionals
+        """
+        with self._lock:
+            try:
+                self.model.prepare_conditionals(reference_path, exaggeration=0.5)
+                # Atomic write: other worker processes may be loading this artifact
+                tmp_path = f"{artifact_path}.{os.getpid()}.tmp"
+                self.model.conds.save(tmp_path)
+                os.replace(tmp_path, artifact_path)
+            finally:
+                self.model.conds = self._default_conds
+
     def _tensor_to_wav(self, audio_tensor: torch.Tensor) -> bytes:
         """
-        Convert PyTorch audio tensor to WAV bytes
+        Post-process a generated tensor and encode it as 16-bit PCM WAV
 
         Args:
             audio_tensor: Audio tensor (C, T) or (T,)
@@ -106,24 +606,19 @@ class ChatterboxAdapter(TTSAdapter):
         Returns:
             WAV file bytes
         """
-        # Ensure tensor is 2D (C, T)
-        if audio_tensor.dim() == 1:
-            audio_tensor = audio_tensor.unsqueeze(0)
-
-        # Move to CPU if needed
-        if audio_tensor.device.type == 'cuda':
-            audio_tensor = audio_tensor.cpu()
-
-        # Save to bytes buffer
-        buffer = io.BytesIO()
-        torchaudio.save(
-            buffer,
-            audio_tensor,
-            self.sr,
-            format="wav"
-        )
+        audio = self._to_numpy(audio_tensor)
+        return encode_wav(post_process(audio, self.sr, self.post_config), self.sr)
+
+    async def _encode(self, audio_tensor: torch.Tensor) -> bytes:
+        """`_tensor_to_wav` on the encode worker pool (keeps the event loop free)"""
+        return await render_wav(self._to_numpy(audio_tensor), self.sr, self.post_config)
 
-        return buffer.getvalue()
+    @staticmethod
+    def _to_numpy(audio_tensor: torch.Tensor):
+        """Mono float32 waveform on the CPU"""
+        if audio_tensor.dim() > 1:
+            audio_tensor = audio_tensor.mean(dim=0)
+        return audio_tensor.detach().float().cpu().numpy()
 
     def list_voices(self) -> List[VoiceInfo]:
         """
@@ -132,6 +627,21 @@ class ChatterboxAdapter(TTSAdapter):
         Returns:
             List of VoiceInfo objects (reference audio files)
         """
+        if self.voice_library is not None:
+            return [
+                VoiceInfo(
+                    id=entry.path,
+                    name=entry.name,
+                    gender=entry.gender,
+                    age_range=entry.age_range,
+                    preview_url=None,
+                    digest=entry.digest,
+                    duration=entry.duration,
+                    sample_rate=entry.sample_rate
+                )
+                for entry in self.voice_library.list()
+            ]
+
         # Return reference voices from tts-service/reference-voices/
         reference_dir = os.path.join(
             os.path.dirname(os.path.dirname(__file__)),
@@ -153,6 +663,11 @@ class ChatterboxAdapter(TTSAdapter):
 
         return voices
 
+    def release(self) -> None:
+        """Unregister the conditioning hook, which keeps the model alive through the voice library"""
+        if self.voice_library is not None:
+            self.voice_library.unregister_conditioner(self.ENGINE, self._condition_voice)
+
     def warmup(self) -> None:
         """
         Warm up the model by running a test inference
@@ -161,7 +676,16 @@ class ChatterboxAdapter(TTSAdapter):
 
         # Generate short test audio
         try:
-            wav = self.model.generate("Hello", exaggeration=0.5)
+            with self._lock:
+                self.model.conds = self._default_conds
+                wav = self.model.generate("Hello", exaggeration=0.5)
             # Discard output (just warming up GPU)
         except Exception as e:
             print(f"Chatterbox warmup warning: {e}")
+
+        try:
+            ready = self.precondition_emotion_levels()
+            if ready:
+                logger.info(f"Preconditioned {ready} voice/emotion-level pairs")
+        except Exception as e:
+            logger.warning(f"Emotion level preconditioning failed: {e}")
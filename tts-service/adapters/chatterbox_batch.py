@@ -0,0 +1,155 @@
+"""
+Batched Chatterbox generation
+Runs the T3 decoder over several texts for one voice in a single padded batch
+"""
+
+from typing import List, Optional
+
+import torch
+import torch.nn.functional as F
+
+from .decode_guard import check_cancelled
+
+# Speech tokens at or above this id are special tokens, not audio
+SPEECH_VOCAB_SIZE = 6561
+
+
+@torch.inference_mode()
+def generate_batch(
+    model,
+    conds,
+    texts: List[str],
+    exaggeration: float,
+    max_steps: List[int],
+    cfg_weight: float = 0.7,
+    temperature: float = 0.8,
+    repetition_penalty: float = 1.2,
+    min_p: float = 0.05
+) -> List[Optional[torch.Tensor]]:
+    """
+    Generate speech for several texts that share one voice
+
+    Mirrors `ChatterboxTTS.generate` (CFG, repetition penalty, min-p
+    sampling, S3Gen vocoding, watermarking) but decodes all texts together:
+    prompts are left-padded and masked so every row advances one token per
+    decoder step. Vocoding stays per item since S3Gen output lengths differ.
+
+    Args:
+        model: Loaded ChatterboxTTS
+        conds: Conditionals for the shared voice
+        texts: Texts to synthesize
+        exaggeration: Emotion exaggeration applied to every text
+        max_steps: Per-text decoder step budget
+        cfg_weight: Classifier-free guidance weight
+        temperature: Sampling temperature
+        repetition_penalty: Penalty for already generated tokens
+        min_p: Min-p sampling threshold
+
+    Returns:
+        Audio tensors (1, T) in input order; None where a text overran its budget
+    """
+    from chatterbox.tts import punc_norm
+    from chatterbox.models.t3.modules.cond_enc import T3Cond
+
+    t3 = model.t3
+    hp = t3.hp
+    device = model.device
+    n = len(texts)
+
+    t3_cond = T3Cond(
+        speaker_emb=conds.t3.speaker_emb,
+        cond_prompt_speech_tokens=conds.t3.cond_prompt_speech_tokens,
+        emotion_adv=exaggeration * torch.ones(1, 1, 1),
+    ).to(device=device)
+
+    # Per-text prompt embeddings: [conditioning | text | BOS], cond + uncond rows
+    bos = torch.tensor([[hp.start_speech_token]], dtype=torch.long, device=device)
+    bos_embed = t3.speech_emb(bos) + t3.speech_pos_emb.get_fixed_embedding(0)
+    prompts = []
+    for text in texts:
+        tokens = model.tokenizer.text_to_tokens(punc_norm(text)).to(device)
+        tokens = torch.cat([tokens, tokens], dim=0)
+        tokens = F.pad(tokens, (1, 0), value=hp.start_text_token)
+        tokens = F.pad(tokens, (0, 1), value=hp.stop_text_token)
+        embeds, _ = t3.prepare_input_embeds(
+            t3_cond=t3_cond,
+            text_tokens=tokens,
+            speech_tokens=hp.start_speech_token * torch.ones_like(tokens[:, :1]),
+            cfg_weight=cfg_weight,
+        )
+        prompts.append(torch.cat([embeds, bos_embed.expand(2, -1, -1)], dim=1))
+
+    # Left-pad to a common length; rows are [text0 cond, text0 uncond, text1 cond, ...]
+    width = max(p.size(1) for p in prompts)
+    inputs = torch.zeros(2 * n, width, prompts[0].size(2), dtype=prompts[0].dtype, device=device)
+    mask = torch.zeros(2 * n, width, dtype=torch.long, device=device)
+    for i, prompt in enumerate(prompts):
+        inputs[2 * i:2 * i + 2, width - prompt.size(1):] = prompt
+        mask[2 * i:2 * i + 2, width - prompt.size(1):] = 1
+    positions = (mask.cumsum(dim=1) - 1).clamp(min=0)
+
+    budget = torch.tensor(max_steps, device=device)
+    generated = torch.full((n, max(max_steps)), hp.stop_speech_token, dtype=torch.long, device=device)
+    lengths = torch.zeros(n, dtype=torch.long, device=device)
+    finished = torch.zeros(n, dtype=torch.bool, device=device)
+    overran = torch.zeros(n, dtype=torch.bool, device=device)
+    seen = torch.zeros(n, t3.speech_head.out_features, dtype=torch.bool, device=device)
+
+    past = None
+    for step in range(max(max_steps)):
+        check_cancelled(step)
+        out = t3.tfmr(
+            inputs_embeds=inputs,
+            attention_mask=mask,
+            position_ids=positions[:, -inputs.size(1):],
+            past_key_values=past,
+            use_cache=True,
+            return_dict=True,
+        )
+        past = out.past_key_values
+        logits = t3.speech_head(out.last_hidden_state[:, -1]).float()
+
+        # Classifier-free guidance
+        cond, uncond = logits[0::2], logits[1::2]
+        logits = cond + cfg_weight * (cond - uncond)
+
+        # Repetition penalty on tokens this row has already produced
+        logits = torch.where(
+            seen,
+            torch.where(logits > 0, logits / repetition_penalty, logits * repetition_penalty),
+            logits,
+        )
+
+        probs = F.softmax(logits / temperature, dim=-1)
+        probs = torch.where(probs < min_p * probs.max(dim=-1, keepdim=True).values, 0.0, probs)
+        next_tokens = torch.multinomial(probs, 1).squeeze(1)
+        next_tokens = torch.where(finished, hp.stop_speech_token, next_tokens)
+
+        active = ~finished
+        generated[active, step] = next_tokens[active]
+        lengths += active.long()
+        seen[torch.arange(n, device=device), next_tokens] |= active
+        finished |= next_tokens == hp.stop_speech_token
+        overran |= ~finished & (lengths >= budget)
+        finished |= overran
+        if bool(finished.all()):
+            break
+
+        # Feed the sampled tokens (cond + uncond rows) into the next step
+        step_tokens = next_tokens.repeat_interleave(2).unsqueeze(1)
+        inputs = t3.speech_emb(step_tokens) + t3.speech_pos_emb.get_fixed_embedding(step + 1)
+        mask = torch.cat([mask, torch.ones(2 * n, 1, dtype=mask.dtype, device=device)], dim=1)
+        positions = torch.cat([positions, positions[:, -1:] + 1], dim=1)
+
+    results: List[Optional[torch.Tensor]] = []
+    for i in range(n):
+        if overran[i]:
+            results.append(None)
+            continue
+        tokens = generated[i, :lengths[i]]
+        tokens = tokens[tokens < SPEECH_VOCAB_SIZE]
+        wav, _ = model.s3gen.inference(speech_tokens=tokens, ref_dict=conds.gen)
+        wav = wav.squeeze(0).detach().cpu().numpy()
+        wav = model.watermarker.apply_watermark(wav, sample_rate=model.sr)
+        results.append(torch.from_numpy(wav).unsqueeze(0))
+    return results
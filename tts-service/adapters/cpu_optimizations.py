@@ -0,0 +1,106 @@
+"""
+CPU inference optimizations
+Dynamic int8 quantization, torch.compile and thread tuning for CPU-only hosts
+"""
+
+import logging
+from typing import Optional
+
+import torch
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+
+class CpuOptimizationConfig(BaseModel):
+    """CPU performance mode settings (ignored on CUDA)"""
+    quantize: bool = False                  # int8 dynamic quantization of nn.Linear
+    compile: bool = False                   # torch.compile hot modules (falls back to eager)
+    intra_op_threads: Optional[int] = None  # None = torch default (physical cores)
+    inter_op_threads: Optional[int] = None
+
+
+def configure_threads(intra_op_threads: Optional[int], inter_op_threads: Optional[int]) -> None:
+    """
+    Set torch CPU thread pools
+
+    Inter-op threads can only be set before the first parallel op runs, so
+    call this before loading models.
+    """
+    if intra_op_threads:
+        torch.set_num_threads(intra_op_threads)
+    if inter_op_threads:
+        try:
+            torch.set_num_interop_threads(inter_op_threads)
+        except RuntimeError as e:
+            logger.warning(f"Could not set inter-op threads (already initialized): {e}")
+    logger.info(
+        f"CPU threads: intra-op={torch.get_num_threads()}, "
+        f"inter-op={torch.get_num_interop_threads()}"
+    )
+
+
+def quantize_linear(module: torch.nn.Module) -> torch.nn.Module:
+    """
+    Replace every nn.Linear in `module` with a dynamically quantized int8 Linear (in place)
+
+    Weights are stored as int8 and activations are quantized per batch, which
+    roughly halves matmul time on x86 and shrinks the weights ~4x.
+    """
+    return torch.ao.quantization.quantize_dynamic(
+        module,
+        {torch.nn.Linear},
+        dtype=torch.qint8,
+        inplace=True
+    )
+
+
+class CompiledCall:
+    """
+    A torch.compile'd callable that switches to eager for good if a compiled call fails
+
+    Stands in for torch._dynamo's process-wide `suppress_errors`, so other
+    models in the process keep dynamo's default error handling.
+    """
+
+    def __init__(self, fn, name: str):
+        self.fn = fn
+        self.name = name
+        self.eager = False
+        self._compiled = torch.compile(fn, dynamic=True)
+
+    def __call__(self, *args, **kwargs):
+        if not self.eager:
+            try:
+                return self._compiled(*args, **kwargs)
+            except Exception as e:
+                logger.warning(f"Compiled {self.name} failed, using eager from now on: {e}")
+                self.eager = True
+        return self.fn(*args, **kwargs)
+
+
+def compile_method(module: torch.nn.Module, method: str, name: str) -> bool:
+    """
+    torch.compile one method of a module in place, with dynamic shapes
+
+    Compile the method the model actually calls: `forward` covers both
+    `module(...)` and `module.forward(...)`, any other entry point is named
+    explicitly. The instance attribute shadows the class method, so every
+    caller gets the compiled version.
+
+    Compilation happens lazily on the first call, so run a warmup afterwards.
+    If compiling or running the compiled method fails, calls use eager.
+
+    Returns:
+        Whether the method was replaced
+    """
+    if not hasattr(torch, 'compile') or not callable(getattr(module, method, None)):
+        return False
+
+    try:
+        setattr(module, method, CompiledCall(getattr(module, method), f"{name}.{method}"))
+    except Exception as e:
+        logger.warning(f"torch.compile unavailable for {name}, using eager: {e}")
+        return False
+    logger.info(f"Compiled {name}.{method} with torch.compile")
+    return True
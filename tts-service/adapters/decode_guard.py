@@ -0,0 +1,111 @@
+"""
+Decode guard
+Bounds and cancels autoregressive generation by hooking the decoder's per-step forward
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import functools
+import threading
+from typing import Optional
+
+import torch
+
+# Cancellation flag of the synthesis running in the current context (see run_cancellable)
+_cancel_event: contextvars.ContextVar[Optional[threading.Event]] = contextvars.ContextVar(
+    "cancel_event", default=None
+)
+
+
+class GenerationAborted(RuntimeError):
+    """Raised when a generation exceeds its decoder step budget"""
+
+    def __init__(self, steps: int, max_steps: int):
+        super().__init__(f"Generation aborted after {steps} decoder steps (budget {max_steps})")
+        self.steps = steps
+        self.max_steps = max_steps
+
+
+class GenerationCancelled(RuntimeError):
+    """Raised between decoder steps when the request that wanted the audio went away"""
+
+    def __init__(self, steps: int = 0):
+        super().__init__(f"Generation cancelled after {steps} decoder steps")
+        self.steps = steps
+
+
+def check_cancelled(steps: int = 0) -> None:
+    """Raise GenerationCancelled if the current synthesis was cancelled (for custom decode loops)"""
+    event = _cancel_event.get()
+    if event is not None and event.is_set():
+        raise GenerationCancelled(steps)
+
+
+async def run_cancellable(fn, *args, **kwargs):
+    """
+    Run blocking inference in a worker thread, cancellable from the awaiting task
+
+    If the awaiting task is cancelled (client disconnected, deadline hit),
+    the thread's cancel flag is set; DecodeGuard / check_cancelled raise at
+    the next decoder step, and this waits for the thread to let go of the
+    model before re-raising CancelledError.
+    """
+    event = threading.Event()
+    context = contextvars.copy_context()
+    context.run(_cancel_event.set, event)
+
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(None, functools.partial(context.run, fn, *args, **kwargs))
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        event.set()
+        with contextlib.suppress(Exception):
+            await future
+        raise
+
+
+class DecodeGuard:
+    """
+    Context manager that aborts generation after `max_steps` decoder calls,
+    or as soon as the surrounding `run_cancellable` call is cancelled
+
+    Engines like Chatterbox run their sampling loop internally, so the guard
+    counts forward passes of the decoder module instead (one per generated
+    token, plus the prefill pass) and raises from inside the loop.
+
+    Usage:
+        with DecodeGuard(model.t3.tfmr, max_steps=250):
+            wav = model.generate(text)
+    """
+
+    def __init__(self, module: Optional[torch.nn.Module], max_steps: Optional[int]):
+        """
+        Args:
+            module: Decoder module called once per step (None disables the guard)
+            max_steps: Step budget (None disables the guard)
+        """
+        self.module = module
+        self.max_steps = max_steps
+        self.steps = 0
+        self._handle = None
+        self._cancel = None
+
+    def __enter__(self) -> "DecodeGuard":
+        self._cancel = _cancel_event.get()
+        if self.module is not None and (self.max_steps is not None or self._cancel is not None):
+            self._handle = self.module.register_forward_pre_hook(self._on_step)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self._handle is not None:
+            self._handle.remove()
+            self._handle = None
+
+    def _on_step(self, module, args) -> None:
+        self.steps += 1
+        if self._cancel is not None and self._cancel.is_set():
+            raise GenerationCancelled(self.steps)
+        if self.max_steps is not None and self.steps > self.max_steps:
+            raise GenerationAborted(self.steps, self.max_steps)
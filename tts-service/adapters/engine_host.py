@@ -0,0 +1,408 @@
+"""
+Engine host
+Runs a TTS adapter in its own process, reached over a unix socket, with audio returned through shared memory
+"""
+
+import asyncio
+import contextlib
+import itertools
+import json
+import logging
+import os
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, List, Optional
+
+from .base import TTSAdapter, VoiceInfo, EmotionParams, SynthesisItem, report_cached_clip, track_cached_clips
+
+logger = logging.getLogger(__name__)
+
+# Frames are a 4-byte big-endian length followed by a JSON object
+_HEADER = struct.Struct(">I")
+
+# Sent by the API process once it has collected a reply's audio segment
+_ACK = b"\x06"
+
+# Entry point the host process runs (tts-service/engine_worker.py)
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "engine_worker.py")
+
+
+class EngineHostError(RuntimeError):
+    """Raised when an engine host fails a call or is not running"""
+
+
+def parse_engine_hosts(spec: str) -> Dict[str, Optional[str]]:
+    """
+    Parse ENGINE_HOSTS ("index-tts=/opt/index-tts/.venv/bin/python,chatterbox")
+
+    Returns:
+        Engine name -> interpreter (None: the API's own interpreter)
+    """
+    hosts = {}
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        name, _, python = entry.partition("=")
+        hosts[name.strip()] = python.strip() or None
+    return hosts
+
+
+_segments = itertools.count()
+
+
+def share_audio(clips: List[bytes], cached: List[bytes] = ()) -> dict:
+    """
+    Copy WAV clips into one new shared-memory segment (host side)
+
+    The reader owns the segment and unlinks it, so it is dropped from this
+    process's resource tracker, which would otherwise unlink it at exit.
+    A segment the reader never acknowledges is unlinked by `discard_audio`.
+
+    Args:
+        clips: WAV bytes to send
+        cached: Those of `clips` the adapter served from its cache (see track_cached_clips)
+
+    Returns:
+        Reference {"shm": name, "sizes": [...], "cached": [indices]} to send to the API process
+    """
+    size = sum(len(clip) for clip in clips)
+    shm = shared_memory.SharedMemory(
+        create=True, size=max(1, size), name=f"runthru-{os.getpid()}-{next(_segments)}"
+    )
+    try:
+        offset = 0
+        for clip in clips:
+            shm.buf[offset:offset + len(clip)] = clip
+            offset += len(clip)
+        resource_tracker.unregister(shm._name, "shared_memory")
+    finally:
+        shm.close()
+    return {
+        "shm": shm.name,
+        "sizes": [len(clip) for clip in clips],
+        "cached": [i for i, clip in enumerate(clips) if any(clip is hit for hit in cached)],
+    }
+
+
+def discard_audio(reference: dict) -> None:
+    """Unlink a segment the API process did not collect (host side; no-op if it did)"""
+    with contextlib.suppress(FileNotFoundError):
+        shm = shared_memory.SharedMemory(name=reference["shm"])
+        shm.close()
+        shm.unlink()
+
+
+def collect_audio(reference: dict) -> List[bytes]:
+    """Read and unlink a segment written by `share_audio` (API side); cached clips are reported again here"""
+    shm = shared_memory.SharedMemory(name=reference["shm"])
+    try:
+        clips, offset = [], 0
+        for size in reference["sizes"]:
+            clips.append(bytes(shm.buf[offset:offset + size]))
+            offset += size
+    finally:
+        shm.close()
+        shm.unlink()
+    for index in reference.get("cached", []):
+        report_cached_clip(clips[index])
+    return clips
+
+
+def _encode(message: dict) -> bytes:
+    payload = json.dumps(message).encode()
+    return _HEADER.pack(len(payload)) + payload
+
+
+async def _read_message(reader: asyncio.StreamReader) -> dict:
+    header = await reader.readexactly(_HEADER.size)
+    return json.loads(await reader.readexactly(_HEADER.unpack(header)[0]))
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise EOFError("engine host closed the connection")
+        data.extend(chunk)
+    return bytes(data)
+
+
+class EngineHostServer:
+    """
+    Serves one adapter on a unix socket (runs inside the engine host process)
+
+    Each connection carries one call. If the API side closes the connection
+    before the reply (its request was cancelled), the call is cancelled here
+    too, which stops generation at the next decoder step. A reply carrying
+    audio stays open until the API side acknowledges collecting it; if it
+    hangs up instead (cancelled while reading), the segment is unlinked
+    here, since nobody else would.
+    """
+
+    # Calls whose result is a shared-memory reference (see share_audio)
+    AUDIO_OPS = ("synthesize", "synthesize_batch")
+
+    def __init__(self, adapter: TTSAdapter, socket_path: str):
+        """
+        Args:
+            adapter: Engine to serve
+            socket_path: Unix socket to listen on
+        """
+        self.adapter = adapter
+        self.socket_path = socket_path
+
+    async def serve(self) -> None:
+        """Listen until the parent process goes away"""
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.socket_path)
+        server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        logger.info(f"Engine host listening on {self.socket_path}")
+
+        parent = os.getppid()
+        async with server:
+            # Exit with the API process instead of holding the model as an orphan
+            while os.getppid() == parent:
+                await asyncio.sleep(2)
+        logger.info("API process exited; engine host stopping")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = await _read_message(reader)
+            call = asyncio.ensure_future(self._dispatch(request["op"], request.get("args", {})))
+            hangup = asyncio.ensure_future(reader.read(1))
+            done, _ = await asyncio.wait({call, hangup}, return_when=asyncio.FIRST_COMPLETED)
+
+            if call not in done:
+                call.cancel()
+                with contextlib.suppress(BaseException):
+                    await call
+                logger.info(f"{request['op']} cancelled by the API process")
+                return
+
+            try:
+                reply = {"ok": True, "result": call.result()}
+            except Exception as e:
+                reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            audio = reply["result"] if reply["ok"] and request["op"] in self.AUDIO_OPS else None
+            if audio is None:
+                hangup.cancel()
+            try:
+                writer.write(_encode(reply))
+                await writer.drain()
+                # The pending hangup read now receives the acknowledgement (or EOF)
+                if audio is not None and await hangup != _ACK:
+                    discard_audio(audio)
+                    logger.info(f"{request['op']} reply not collected; unlinked {audio['shm']}")
+            except (ConnectionError, asyncio.CancelledError):
+                if audio is not None:
+                    discard_audio(audio)
+                raise
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, op: str, args: dict):
+        adapter = self.adapter
+        loop = asyncio.get_running_loop()
+
+        if op == "synthesize":
+            with track_cached_clips() as cached:
+                audio = await adapter.synthesize(
+                    text=args["text"],
+                    voice_id=args["voice_id"],
+                    emotion=EmotionParams(**args["emotion"]),
+                    max_duration=args.get("max_duration")
+                )
+            return share_audio([audio], cached)
+        if op == "synthesize_batch":
+            items = [SynthesisItem(**item) for item in args["items"]]
+            with track_cached_clips() as cached:
+                clips = await adapter.synthesize_batch(items)
+            return share_audio(clips, cached)
+        if op == "list_voices":
+            return [voice.model_dump() for voice in adapter.list_voices()]
+        if op == "warmup":
+            return await loop.run_in_executor(None, adapter.warmup)
+        if op == "prerender_short_utterances":
+            if not hasattr(adapter, "prerender_short_utterances"):
+                return 0
+            return await loop.run_in_executor(None, adapter.prerender_short_utterances)
+        raise ValueError(f"Unknown engine host call: {op}")
+
+
+class EngineHostAdapter(TTSAdapter):
+    """
+    Adapter that forwards calls to an engine running in a subprocess
+
+    The subprocess may use a different interpreter (e.g. IndexTTS's uv
+    venv), so engines never share dependencies, and a crash or OOM only
+    takes down that engine: the next call starts a fresh host. WAV bytes
+    come back through shared memory rather than through the socket.
+    """
+
+    def __init__(
+        self,
+        engine: str,
+        python: Optional[str] = None,
+        socket_dir: Optional[str] = None,
+        start_timeout: float = 600.0
+    ):
+        """
+        Args:
+            engine: Engine name the host loads (see engines.create_adapter)
+            python: Interpreter for the host (default: this interpreter)
+            socket_dir: Directory for the unix socket (default: temp dir)
+            start_timeout: Seconds to wait for a host to accept connections
+        """
+        self.engine = engine
+        self.python = python or sys.executable
+        socket_dir = socket_dir or os.path.join(tempfile.gettempdir(), "runthru-engines")
+        os.makedirs(socket_dir, exist_ok=True)
+        # One host per API process (several uvicorn workers each start their own)
+        self.socket_path = os.path.join(socket_dir, f"{engine}-{os.getpid()}.sock")
+        self.start_timeout = start_timeout
+        self.restarts = 0
+        self._process: Optional[subprocess.Popen] = None
+        self._start_lock = threading.Lock()
+        self._spawn()
+
+    @property
+    def alive(self) -> bool:
+        """Whether the host process is running"""
+        return self._process is not None and self._process.poll() is None
+
+    def _spawn(self) -> None:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.socket_path)
+        logger.info(f"Starting {self.engine} engine host ({self.python})")
+        self._process = subprocess.Popen(
+            [self.python, WORKER_SCRIPT, "--engine", self.engine, "--socket", self.socket_path],
+            cwd=os.path.dirname(WORKER_SCRIPT),
+        )
+
+    def _ensure_running(self) -> None:
+        """Start (or restart) the host and wait until it accepts connections"""
+        with self._start_lock:
+            if not self.alive:
+                logger.warning(
+                    f"{self.engine} engine host exited (code {self._process.returncode}); restarting"
+                )
+                self.restarts += 1
+                self._spawn()
+
+            deadline = time.monotonic() + self.start_timeout
+            while True:
+                try:
+                    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                        probe.connect(self.socket_path)
+                    return
+                except (FileNotFoundError, ConnectionRefusedError):
+                    pass
+                if not self.alive:
+                    raise EngineHostError(
+                        f"{self.engine} engine host exited during startup (code {self._process.returncode})"
+                    )
+                if time.monotonic() > deadline:
+                    raise EngineHostError(f"{self.engine} engine host did not start in {self.start_timeout:.0f}s")
+                time.sleep(0.1)
+
+    async def _call(self, op: str, **args):
+        """
+        Call the host from the event loop; cancelling the caller cancels the call
+
+        Audio replies are collected (and their segment unlinked) before the
+        host is acknowledged, so a call cancelled while reading the reply
+        leaves the segment to the host to unlink.
+        """
+        if not self.alive or not os.path.exists(self.socket_path):
+            await asyncio.get_running_loop().run_in_executor(None, self._ensure_running)
+
+        try:
+            reader, writer = await asyncio.open_unix_connection(self.socket_path)
+        except (FileNotFoundError, ConnectionRefusedError) as e:
+            raise EngineHostError(f"{self.engine} engine host unreachable: {e}")
+        try:
+            writer.write(_encode({"op": op, "args": args}))
+            await writer.drain()
+            reply = await _read_message(reader)
+            result = self._unwrap(reply)
+            if op in EngineHostServer.AUDIO_OPS:
+                result = collect_audio(result)
+                writer.write(_ACK)
+            return result
+        except (asyncio.IncompleteReadError, ConnectionError):
+            raise EngineHostError(f"{self.engine} engine host exited during {op}")
+        finally:
+            # Closing before the reply is how the host learns a call was cancelled
+            writer.close()
+
+    def _call_sync(self, op: str, **args):
+        """Blocking call (warmup, voice listing, pre-rendering)"""
+        self._ensure_running()
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(self.socket_path)
+            sock.sendall(_encode({"op": op, "args": args}))
+            try:
+                size = _HEADER.unpack(_recv_exactly(sock, _HEADER.size))[0]
+                reply = json.loads(_recv_exactly(sock, size))
+            except EOFError:
+                raise EngineHostError(f"{self.engine} engine host exited during {op}")
+        return self._unwrap(reply)
+
+    def _unwrap(self, reply: dict):
+        if not reply["ok"]:
+            raise EngineHostError(f"{self.engine}: {reply['error']}")
+        return reply["result"]
+
+    async def synthesize(
+        self,
+        text: str,
+        voice_id: str,
+        emotion: EmotionParams,
+        max_duration: Optional[float] = None
+    ) -> bytes:
+        """Generate audio in the engine host"""
+        clips = await self._call(
+            "synthesize",
+            text=text,
+            voice_id=voice_id,
+            emotion=emotion.model_dump(),
+            max_duration=max_duration
+        )
+        return clips[0]
+
+    async def synthesize_batch(self, items: List[SynthesisItem]) -> List[bytes]:
+        """Generate several lines in the engine host (one shared-memory segment for all)"""
+        return await self._call("synthesize_batch", items=[item.model_dump() for item in items])
+
+    def list_voices(self) -> List[VoiceInfo]:
+        """Voices of the hosted engine"""
+        return [VoiceInfo(**voice) for voice in self._call_sync("list_voices")]
+
+    def warmup(self) -> None:
+        """Wait for the host to start, then warm up its model"""
+        self._call_sync("warmup")
+
+    def prerender_short_utterances(self) -> int:
+        """Pre-render the hosted engine's short-utterance bank (0 if unsupported)"""
+        return self._call_sync("prerender_short_utterances")
+
+    def close(self) -> None:
+        """Stop the host process"""
+        if self.alive:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.socket_path)
@@ -3,7 +3,7 @@ Index TTS adapter implementation
 """
 
 import os
-from typing import List
+from typing import List, Optional
 from .base import TTSAdapter, VoiceInfo, EmotionParams
 
 
@@ -25,7 +25,8 @@ class IndexTTSAdapter(TTSAdapter):
         self,
         text: str,
         voice_id: str,
-        emotion: EmotionParams
+        emotion: EmotionParams,
+        max_duration: Optional[float] = None
     ) -> bytes:
         """Generate audio using Index TTS"""
 
@@ -45,6 +46,7 @@ class IndexTTSAdapter(TTSAdapter):
         #     spk_audio_prompt=voice_prompt_path,
         #     text=text,
         #     emo_alpha=emo_alpha,
+        #     max_mel_tokens=...,  # derived from max_duration
         #     ...
         # )
 
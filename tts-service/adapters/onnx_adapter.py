@@ -0,0 +1,385 @@
+"""
+Chatterbox ONNX Runtime adapter
+Runs an ONNX export of the Chatterbox pipeline (see export_onnx.py) on ORT's CPU provider
+
+Export layout (`model_dir`):
+    manifest.json          Model dimensions, special tokens, iSTFT parameters
+    tokenizer.json         Chatterbox text tokenizer
+    text_encoder.onnx      text tokens + voice conditioning → prompt embeddings (cond/uncond rows)
+    decoder.onnx           one T3 step: embeddings + KV cache → speech logits + new KV cache
+    vocoder.onnx           speech tokens + voice prompt → packed log-magnitude/phase spectrum
+    speech_emb.npy         Speech token embedding table (decoder input for sampled tokens)
+    speech_pos_emb.npy     Speech position embedding table
+    default_voice.npz      Built-in voice conditioning
+"""
+
+import json
+import logging
+import os
+import re
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .base import TTSAdapter, VoiceInfo, EmotionParams
+from .decode_guard import GenerationAborted, check_cancelled, run_cancellable
+from services.eviction import WeightedCache
+from services.metrics import metrics
+from services.post_processing import PostProcessConfig, render_wav
+from services.voice_library import VoiceLibrary, VoiceEntry
+
+logger = logging.getLogger(__name__)
+
+# Scale applied by export_onnx.py to the packed spectrum (keeps it inside HiFT's output clamp)
+PACK_SCALE = 1e-4
+
+
+class ChatterboxOnnxAdapter(TTSAdapter):
+    """Adapter for the ONNX-exported Chatterbox pipeline (CPU, no PyTorch model in memory)"""
+
+    ENGINE = "chatterbox-onnx"
+
+    def __init__(
+        self,
+        model_dir: str,
+        device: str,
+        voice_library: Optional[VoiceLibrary] = None,
+        intra_op_threads: int = 0,
+        max_retries: int = 1,
+        post_processing: Optional[PostProcessConfig] = None,
+        conditioning_cache: Optional[WeightedCache] = None
+    ):
+        """
+        Initialize ONNX Runtime sessions
+
+        Args:
+            model_dir: Directory produced by export_onnx.py
+            device: Ignored (CPU execution provider)
+            voice_library: Indexed voices; conditioning is read from the
+                Chatterbox artifacts or `voices/<digest>.npz` exports
+            intra_op_threads: ORT intra-op threads (0 = ORT default)
+            max_retries: Re-seeded attempts after a generation overruns its budget
+            post_processing: Trim/normalize/pad settings applied to every line
+            conditioning_cache: Bounded cache for loaded voice conditioning
+                (default: 256 MB, GDSF eviction)
+        """
+        self.model_dir = model_dir
+        self.device = "cpu"
+        self.voice_library = voice_library
+        self.max_retries = max_retries
+        self.post_config = post_processing or PostProcessConfig()
+        self.conditioning_cache = conditioning_cache or WeightedCache(256 * 1024 * 1024)
+
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError:
+            raise RuntimeError(
+                "ONNX Runtime not installed. Install with: pip install onnxruntime tokenizers"
+            )
+
+        with open(os.path.join(model_dir, "manifest.json")) as f:
+            self.manifest = json.load(f)
+        self.sr = self.manifest["sample_rate"]
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.speech_emb = np.load(os.path.join(model_dir, "speech_emb.npy"), mmap_mode="r")
+        self.speech_pos_emb = np.load(os.path.join(model_dir, "speech_pos_emb.npy"), mmap_mode="r")
+        self._default_voice = dict(np.load(os.path.join(model_dir, "default_voice.npz")))
+
+        self._ort = ort
+        self.text_encoder = self._session("text_encoder", intra_op_threads)
+        self.decoder = self._session("decoder", intra_op_threads)
+        self.vocoder = self._session("vocoder", intra_op_threads)
+
+    def _session(self, name: str, intra_op_threads: int):
+        """
+        Create a CPU inference session with full graph optimization
+
+        The optimized graph is cached next to the export, so later startups
+        skip the optimization passes.
+        """
+        ort = self._ort
+        optimized = os.path.join(self.model_dir, f"{name}.optimized.onnx")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+
+        if os.path.exists(optimized):
+            source = optimized
+        else:
+            source = os.path.join(self.model_dir, f"{name}.onnx")
+            options.optimized_model_filepath = optimized
+
+        return ort.InferenceSession(source, options, providers=["CPUExecutionProvider"])
+
+    async def synthesize(
+        self,
+        text: str,
+        voice_id: str,
+        emotion: EmotionParams,
+        max_duration: Optional[float] = None
+    ) -> bytes:
+        """
+        Generate audio with the ONNX pipeline
+
+        Args:
+            text: Text to synthesize
+            voice_id: Voice id or reference WAV path (must be indexed)
+            emotion: Emotion parameters (intensity maps to exaggeration)
+            max_duration: Generation budget in seconds (None = model limit)
+
+        Returns:
+            WAV audio bytes
+        """
+        voice = self._voice(voice_id)
+        max_steps = self.manifest["max_new_tokens"]
+        if max_duration is not None:
+            max_steps = min(max_steps, int(max_duration * self.manifest["speech_token_rate"]))
+
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    tokens = await run_cancellable(
+                        self._decode, text, voice, emotion.intensity, max_steps, seed=42 + attempt
+                    )
+                    break
+                except GenerationAborted as e:
+                    metrics.increment("generation_aborts", engine=self.ENGINE)
+                    logger.warning(f"Generation overran budget (attempt {attempt + 1}): {e}")
+                    aborted = e
+            else:
+                metrics.increment("generation_abort_failures", engine=self.ENGINE)
+                raise aborted
+
+            audio = await run_cancellable(self._vocode, tokens, voice)
+        except Exception as e:
+            raise RuntimeError(f"Chatterbox ONNX synthesis failed: {e}")
+
+        # Trim, normalize and encode off the event loop
+        return await render_wav(audio, self.sr, self.post_config)
+
+    def _voice(self, voice_id: str) -> Dict[str, np.ndarray]:
+        """Conditioning arrays for a voice (cached, bounded by CONDITIONING_CACHE_MB)"""
+        entry = self.voice_library.resolve(voice_id) if self.voice_library else None
+        if entry is None:
+            if os.path.exists(voice_id):
+                raise ValueError(f"Voice not indexed: {voice_id}")
+            return self._default_voice
+
+        voice = self.conditioning_cache.get(entry.digest)
+        if voice is None:
+            start = time.perf_counter()
+            voice = self._load_voice(entry)
+            self.conditioning_cache.put(
+                entry.digest, voice, sum(array.nbytes for array in voice.values()), time.perf_counter() - start
+            )
+        return voice
+
+    def _load_voice(self, entry: VoiceEntry) -> Dict[str, np.ndarray]:
+        """
+        Load voice conditioning from an ONNX voice export or the Chatterbox artifact
+
+        The torch artifact is converted once; PyTorch is only imported here.
+        """
+        exported = os.path.join(self.model_dir, "voices", f"{entry.digest}.npz")
+        if os.path.exists(exported):
+            return dict(np.load(exported))
+
+        artifact = entry.conditioning.get("chatterbox")
+        if not artifact or not os.path.exists(artifact):
+            raise ValueError(f"No conditioning for voice {entry.id}; run export_onnx.py --voices")
+
+        import torch
+        data = torch.load(artifact, map_location="cpu")
+        return {
+            "speaker_emb": data["t3"]["speaker_emb"].numpy(),
+            "cond_prompt_speech_tokens": data["t3"]["cond_prompt_speech_tokens"].numpy(),
+            "prompt_token": data["gen"]["prompt_token"].numpy(),
+            "prompt_feat": data["gen"]["prompt_feat"].numpy(),
+            "embedding": data["gen"]["embedding"].numpy(),
+        }
+
+    def _decode(
+        self,
+        text: str,
+        voice: Dict[str, np.ndarray],
+        exaggeration: float,
+        max_steps: int,
+        seed: int,
+        cfg_weight: float = 0.7,
+        temperature: float = 0.8,
+        repetition_penalty: float = 1.2,
+        min_p: float = 0.05
+    ) -> np.ndarray:
+        """
+        Autoregressive T3 decoding with an IO-bound KV cache
+
+        The KV cache stays in ORT-owned buffers: each step's `present_*`
+        outputs are bound directly as the next step's `past_*` inputs.
+
+        Raises:
+            GenerationAborted: If no stop token is produced within `max_steps`
+        """
+        m = self.manifest
+        rng = np.random.default_rng(seed)
+
+        ids = self.tokenizer.encode(_punc_norm(text).replace(" ", "[SPACE]")).ids
+        text_tokens = np.array([[m["start_text_token"], *ids, m["stop_text_token"]]] * 2, dtype=np.int64)
+
+        embeds = self.text_encoder.run(None, {
+            "text_tokens": text_tokens,
+            "speaker_emb": voice["speaker_emb"].astype(np.float32),
+            "cond_prompt_speech_tokens": voice["cond_prompt_speech_tokens"].astype(np.int64),
+            "emotion_adv": np.full((1, 1, 1), exaggeration, dtype=np.float32),
+        })[0]
+
+        n_layers, n_heads, head_dim = m["num_layers"], m["num_kv_heads"], m["head_dim"]
+        length = embeds.shape[1]
+        past = [
+            self._ort.OrtValue.ortvalue_from_numpy(np.zeros((2, n_heads, 0, head_dim), dtype=np.float32))
+            for _ in range(2 * n_layers)
+        ]
+        inputs = embeds.astype(np.float32)
+        positions = np.arange(length, dtype=np.int64)[None].repeat(2, axis=0)
+
+        generated: List[int] = []
+        seen = None
+        binding = self.decoder.io_binding()
+
+        for step in range(max_steps):
+            check_cancelled(step)
+            total = length + step
+            binding.bind_cpu_input("inputs_embeds", np.ascontiguousarray(inputs))
+            binding.bind_cpu_input("attention_mask", np.ones((2, total), dtype=np.int64))
+            binding.bind_cpu_input("position_ids", positions)
+            for i, value in enumerate(past):
+                binding.bind_ortvalue_input(f"past_{i}", value)
+            binding.bind_output("logits", "cpu")
+            for i in range(2 * n_layers):
+                binding.bind_output(f"present_{i}", "cpu")
+
+            self.decoder.run_with_iobinding(binding)
+            outputs = binding.get_outputs()
+            logits = outputs[0].numpy()
+            past = outputs[1:]
+
+            # Classifier-free guidance, repetition penalty, min-p sampling
+            cond, uncond = logits[0], logits[1]
+            scores = cond + cfg_weight * (cond - uncond)
+            if seen is None:
+                seen = np.zeros(scores.shape[-1], dtype=bool)
+            scores = np.where(seen, np.where(scores > 0, scores / repetition_penalty, scores * repetition_penalty), scores)
+            probs = np.exp((scores - scores.max()) / temperature)
+            probs /= probs.sum()
+            probs[probs < min_p * probs.max()] = 0.0
+            probs /= probs.sum()
+            token = int(rng.choice(len(probs), p=probs))
+
+            if token == m["stop_speech_token"]:
+                return np.array([t for t in generated if t < m["speech_vocab_size"]], dtype=np.int64)
+            generated.append(token)
+            seen[token] = True
+
+            embed = self.speech_emb[token] + self.speech_pos_emb[step + 1]
+            inputs = np.broadcast_to(embed, (2, 1, embed.shape[-1])).astype(np.float32)
+            positions = np.full((2, 1), total, dtype=np.int64)
+            binding.clear_binding_inputs()
+            binding.clear_binding_outputs()
+
+        raise GenerationAborted(max_steps + 1, max_steps)
+
+    def _vocode(self, tokens: np.ndarray, voice: Dict[str, np.ndarray]) -> np.ndarray:
+        """Speech tokens → waveform (ONNX flow + HiFT, inverse STFT in NumPy)"""
+        m = self.manifest
+        packed = self.vocoder.run(None, {
+            "speech_tokens": tokens[None],
+            "prompt_token": voice["prompt_token"].astype(np.int64),
+            "prompt_feat": voice["prompt_feat"].astype(np.float32),
+            "embedding": voice["embedding"].astype(np.float32),
+        })[0][0] / PACK_SCALE
+
+        bins = m["n_fft"] // 2 + 1
+        magnitude = np.minimum(np.exp(packed[:bins]), 1e2)
+        audio = _istft(magnitude * np.exp(1j * packed[bins:]), m["n_fft"], m["hop_length"])
+        audio = np.clip(audio, -m["audio_limit"], m["audio_limit"])
+
+        # Same fade-in S3Gen applies to hide the prompt boundary
+        n_trim = self.sr // 50
+        fade = np.zeros(2 * n_trim, dtype=np.float32)
+        fade[n_trim:] = (np.cos(np.linspace(np.pi, 0, n_trim)) + 1) / 2
+        audio[:len(fade)] *= fade[:len(audio)]
+        return audio.astype(np.float32)
+
+    def list_voices(self) -> List[VoiceInfo]:
+        """Indexed reference voices (shared with the Chatterbox engine)"""
+        if self.voice_library is None:
+            return []
+        return [
+            VoiceInfo(
+                id=entry.path,
+                name=entry.name,
+                gender=entry.gender,
+                age_range=entry.age_range,
+                digest=entry.digest,
+                duration=entry.duration,
+                sample_rate=entry.sample_rate
+            )
+            for entry in self.voice_library.list()
+        ]
+
+    def warmup(self) -> None:
+        """Run one short line through all three graphs"""
+        start = time.perf_counter()
+        try:
+            tokens = self._decode("Hello.", self._default_voice, 0.5, self.manifest["max_new_tokens"], seed=42)
+            self._vocode(tokens, self._default_voice)
+            logger.info(f"{self.ENGINE} warmup took {time.perf_counter() - start:.1f}s")
+        except Exception as e:
+            logger.warning(f"{self.ENGINE} warmup warning: {e}")
+
+
+def _istft(spec: np.ndarray, n_fft: int, hop_length: int) -> np.ndarray:
+    """
+    Inverse STFT matching torch.istft(center=True, periodic Hann window)
+
+    Args:
+        spec: Complex spectrum (n_fft // 2 + 1, frames)
+
+    Returns:
+        Waveform of length (frames - 1) * hop_length
+    """
+    window = 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(n_fft) / n_fft)
+    frames = np.fft.irfft(spec, n=n_fft, axis=0) * window[:, None]
+    n_frames = frames.shape[1]
+    length = n_fft + hop_length * (n_frames - 1)
+
+    audio = np.zeros(length)
+    envelope = np.zeros(length)
+    for i in range(n_frames):
+        start = i * hop_length
+        audio[start:start + n_fft] += frames[:, i]
+        envelope[start:start + n_fft] += window ** 2
+
+    pad = n_fft // 2
+    audio = audio[pad:length - pad]
+    envelope = envelope[pad:length - pad]
+    return audio / np.where(envelope > 1e-11, envelope, 1.0)
+
+
+def _punc_norm(text: str) -> str:
+    """Chatterbox's text clean-up (capitalize, normalize punctuation, ensure final stop)"""
+    if not text:
+        return "You need to add some text for me to talk."
+    text = " ".join(text.split())
+    text = text[0].upper() + text[1:]
+    for old, new in (("...", ", "), ("…", ", "), (":", ","), (" - ", ", "), (";", ", "),
+                     ("—", "-"), ("–", "-"), (" ,", ","), ("“", '"'), ("”", '"'),
+                     ("‘", "'"), ("’", "'")):
+        text = text.replace(old, new)
+    text = re.sub(r"\s+$", "", text)
+    if not text.endswith((".", "!", "?", "-", ",")):
+        text += "."
+    return text
@@ -0,0 +1,82 @@
+"""
+Shared model weights
+Snapshots loaded model components to one file that every worker process mmaps read-only
+"""
+
+import fcntl
+import gc
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+
+def snapshot_path(weights_dir: str, name: str, version: str) -> str:
+    """
+    Snapshot file for a model build
+
+    The torch version is part of the name because pickled modules are only
+    guaranteed to load under the version that wrote them.
+    """
+    torch_version = torch.__version__.split('+')[0]
+    return os.path.join(weights_dir, f"{name}-{version}-torch{torch_version}.pt")
+
+
+def load_shared(path: str, build: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Load model components from an mmap'd snapshot, writing it first if missing
+
+    Tensor storages are mapped from the file instead of copied into each
+    process, so N workers share one copy of the weights through the page
+    cache and start without deserializing them. Pages are private
+    copy-on-write mappings: inference only reads them, so they stay shared.
+
+    Args:
+        path: Snapshot file (see `snapshot_path`)
+        build: Loads the components normally (called once, by whichever
+            process gets the lock first; the others wait and then map it)
+
+    Returns:
+        The components dict returned by `build`, backed by the snapshot
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    if not os.path.exists(path):
+        with file_lock(f"{path}.lock"):
+            if not os.path.exists(path):
+                logger.info(f"Writing shared weight snapshot: {path}")
+                components = build()
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                torch.save(components, tmp_path)
+                os.replace(tmp_path, path)
+                # Drop the heap copy so this process maps the snapshot like the others
+                del components
+                gc.collect()
+
+    start = time.perf_counter()
+    components = torch.load(path, map_location="cpu", mmap=True, weights_only=False)
+    logger.info(
+        f"Mapped shared weights {os.path.basename(path)} "
+        f"({os.path.getsize(path) / 1e9:.2f} GB) in {time.perf_counter() - start:.2f}s"
+    )
+
+    for component in components.values():
+        if isinstance(component, torch.nn.Module):
+            component.eval().requires_grad_(False)
+    return components
+
+
+@contextmanager
+def file_lock(path: str):
+    """Exclusive advisory lock shared by all worker processes"""
+    with open(path, 'w') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
@@ -0,0 +1,95 @@
+"""
+Short-utterance fast path
+Tuned generation settings and an in-memory clip bank for one- and two-word lines
+"""
+
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+# Common interjections pre-rendered for every voice
+DEFAULT_INTERJECTIONS = [
+    "Help!",
+    "Yes.",
+    "No.",
+    "No!",
+    "What?",
+    "Hey!",
+    "Okay.",
+    "Wait!",
+    "Run!",
+    "Oh no!",
+    "Hello.",
+    "Huh?",
+    "Really?",
+    "Thanks.",
+    "Come on!",
+    "Let's go!",
+]
+
+
+class ShortUtteranceConfig(BaseModel):
+    """Generation settings for short lines"""
+    max_words: int = 2
+    max_seconds: float = 3.0      # Decoder budget; "Help!" should never take 10s
+    cfg_weight: float = 0.7
+    temperature: float = 0.6      # Less sampling noise → fewer stretched/garbled clips
+    retries: int = 1              # Re-seeded attempts after hitting the budget
+    cache_size: int = 2048        # Clips kept in memory
+    phrases: List[str] = Field(default_factory=lambda: list(DEFAULT_INTERJECTIONS))
+
+
+def is_short_utterance(text: str, max_words: int) -> bool:
+    """True if the line has at most `max_words` words"""
+    return 0 < len(text.split()) <= max_words
+
+
+def utterance_key(text: str) -> str:
+    """Cache key for a line: case and whitespace insensitive, punctuation kept"""
+    return " ".join(text.split()).lower()
+
+
+class ShortUtteranceBank:
+    """
+    Thread-safe LRU of rendered short clips (WAV bytes)
+
+    Keyed by (voice, utterance, exaggeration) so pre-rendered interjections
+    and previously rendered short lines are served without touching the model.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._clips: "OrderedDict[Tuple[str, str, float], bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(voice_key: str, text: str, exaggeration: float) -> Tuple[str, str, float]:
+        return (voice_key, utterance_key(text), round(exaggeration, 2))
+
+    def get(self, key: Tuple[str, str, float]) -> Optional[bytes]:
+        with self._lock:
+            clip = self._clips.get(key)
+            if clip is None:
+                self.misses += 1
+                return None
+            self._clips.move_to_end(key)
+            self.hits += 1
+            return clip
+
+    def put(self, key: Tuple[str, str, float], clip: bytes) -> None:
+        with self._lock:
+            self._clips[key] = clip
+            self._clips.move_to_end(key)
+            while len(self._clips) > self.max_entries:
+                self._clips.popitem(last=False)
+
+    def __contains__(self, key: Tuple[str, str, float]) -> bool:
+        with self._lock:
+            return key in self._clips
+
+    def __len__(self) -> int:
+        return len(self._clips)
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Autotune: find the fastest threads / batch size / dtype for Chatterbox on this host
+
+The winning profile is saved to $CACHE_DIR/autotune.json under this host's
+fingerprint; start the service with AUTOTUNE=apply (or startup) to use it.
+
+Usage:
+    python autotune.py [--voice reference-voices/teen-male.wav] [--show]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import engines
+from services.autotune import host_fingerprint
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--voice", help="Reference voice to time (default AUTOTUNE_VOICE or teen-male.wav)")
+    parser.add_argument("--show", action="store_true", help="Print the saved profile for this host and exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO'), format='%(message)s')
+
+    fingerprint, host = host_fingerprint(engines.DEVICE)
+    print(f"🖥️  Host {fingerprint}: {json.dumps(host)}")
+
+    if args.show:
+        profile = engines.profile_store.load(fingerprint)
+        print(json.dumps(profile.model_dump(), indent=2) if profile else "No saved profile")
+        return
+
+    if args.voice:
+        engines.AUTOTUNE_VOICE = args.voice
+    engines.voice_library.refresh()
+    profile = engines.tune_host()
+
+    print()
+    print(f"{'dtype':<8}{'threads':>9}{'batch':>7}{'RTF':>9}")
+    for trial in profile.trials:
+        s = trial.settings
+        marker = "  ←" if s == profile.settings else ""
+        print(f"{s.dtype:<8}{str(s.intra_op_threads or '-'):>9}{s.batch_size:>7}{trial.rtf:>9.3f}{marker}")
+    print(f"\n✅ Saved profile to {engines.profile_store.path}")
+
+
+if __name__ == "__main__":
+    main()
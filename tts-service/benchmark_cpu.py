@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+CPU benchmark: Chatterbox real-time factor, eager fp32 vs CPU performance mode
+
+RTF = synthesis time / audio duration (lower is better, < 1.0 is faster than real time)
+
+Usage:
+    python benchmark_cpu.py [--threads 8] [--voice reference-voices/teen-male.wav]
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import sys
+import time
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import torchaudio
+
+from adapters.base import EmotionParams
+from adapters.chatterbox_adapter import ChatterboxAdapter
+from adapters.cpu_optimizations import CpuOptimizationConfig
+
+LINES = [
+    "Help!",
+    "We need to get to the roof before they break through the door.",
+    "Rule number one: always check the back seat. Rule number two: never, ever "
+    "split up, no matter how good the plan sounds at the time.",
+]
+
+MODES = {
+    "eager-fp32": CpuOptimizationConfig(quantize=False, compile=False),
+    "int8": CpuOptimizationConfig(quantize=True, compile=False),
+    "int8+compile": CpuOptimizationConfig(quantize=True, compile=True),
+}
+
+
+def audio_seconds(wav_bytes: bytes) -> float:
+    """Duration of a WAV buffer"""
+    audio, sr = torchaudio.load(io.BytesIO(wav_bytes))
+    return audio.shape[-1] / sr
+
+
+def run_mode(name: str, config: CpuOptimizationConfig, voice: str, repeats: int) -> dict:
+    """Load the adapter in one mode and measure RTF over the test lines"""
+    print(f"⏳ [{name}] loading...")
+    start = time.perf_counter()
+    adapter = ChatterboxAdapter(model_dir=".", device="cpu", cpu_optimizations=config)
+    load_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    adapter.warmup()
+    warmup_s = time.perf_counter() - start
+    print(f"   load {load_s:.1f}s, warmup {warmup_s:.1f}s")
+
+    emotion = EmotionParams(intensity=0.5, valence="neutral")
+    synth_s = 0.0
+    audio_s = 0.0
+    for _ in range(repeats):
+        for text in LINES:
+            start = time.perf_counter()
+            # Bypass the short-utterance clip bank so every run hits the model
+            adapter.short_bank = type(adapter.short_bank)(adapter.short_config.cache_size)
+            wav = asyncio.run(adapter.synthesize(text=text, voice_id=voice, emotion=emotion))
+            synth_s += time.perf_counter() - start
+            audio_s += audio_seconds(wav)
+
+    rtf = synth_s / audio_s
+    print(f"   RTF {rtf:.2f} ({synth_s:.1f}s for {audio_s:.1f}s of audio)")
+    return {
+        "mode": name,
+        "load_s": round(load_s, 2),
+        "warmup_s": round(warmup_s, 2),
+        "synthesis_s": round(synth_s, 2),
+        "audio_s": round(audio_s, 2),
+        "rtf": round(rtf, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=0, help="Intra-op threads (0 = torch default)")
+    parser.add_argument("--voice", default=os.path.join(os.path.dirname(__file__), "reference-voices", "teen-male.wav"))
+    parser.add_argument("--repeats", type=int, default=2)
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args()
+
+    print("🖥️  Chatterbox CPU benchmark")
+    print("=" * 50)
+
+    results = []
+    for name in args.modes:
+        config = MODES[name].model_copy(update={"intra_op_threads": args.threads or None})
+        results.append(run_mode(name, config, args.voice, args.repeats))
+
+    baseline = next((r for r in results if r["mode"] == "eager-fp32"), None)
+    print()
+    print(f"{'mode':<15}{'RTF':>8}{'speedup':>10}{'load':>8}")
+    for r in results:
+        speedup = f"{baseline['rtf'] / r['rtf']:.2f}x" if baseline else "-"
+        print(f"{r['mode']:<15}{r['rtf']:>8.2f}{speedup:>10}{r['load_s']:>7.1f}s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✅ Results saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
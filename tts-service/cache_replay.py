@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Cache replay: compare eviction policies on recorded audio cache traffic
+
+Record traffic by starting the service with AUDIO_CACHE_TRACE=/path/trace.jsonl,
+then replay it against each policy at one or more cache sizes.
+
+Usage:
+    python cache_replay.py trace.jsonl [--capacity-mb 16 64 256] [--policies lru gdsf]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.eviction import POLICIES, WeightedCache
+
+
+def replay(events, capacity: int, policy: str) -> dict:
+    """
+    Run trace events through one cache
+
+    A get that misses is filled with the size and cost it had in the trace
+    (a read from a lower tier or a re-render); a put stores a new render.
+    """
+    cache = WeightedCache(capacity, policy)
+    for event in events:
+        if event["op"] == "get":
+            if cache.get(event["key"]) is None and "size" in event:
+                cache.put(event["key"], True, event["size"], event["cost"])
+        else:
+            cache.put(event["key"], True, event["size"], event["cost"])
+    return cache.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("trace", help="JSON lines written via AUDIO_CACHE_TRACE")
+    parser.add_argument("--capacity-mb", type=float, nargs="+", default=[16, 64, 256], help="Cache sizes to try")
+    parser.add_argument("--policies", nargs="+", default=list(POLICIES), choices=POLICIES)
+    args = parser.parse_args()
+
+    with open(args.trace) as f:
+        events = [json.loads(line) for line in f if line.strip()]
+    gets = sum(1 for event in events if event["op"] == "get")
+    print(f"📼 {len(events)} events ({gets} gets, {len(events) - gets} puts)\n")
+
+    print(f"{'MB':>8}  {'policy':<6}{'hit rate':>10}{'byte hit':>10}{'s saved':>10}{'evictions':>11}")
+    for capacity_mb in args.capacity_mb:
+        for policy in args.policies:
+            stats = replay(events, int(capacity_mb * 1024 * 1024), policy)
+            print(
+                f"{capacity_mb:>8g}  {policy:<6}"
+                f"{stats['hit_rate'] or 0:>10.3f}{stats['byte_hit_rate'] or 0:>10.3f}"
+                f"{stats['seconds_saved']:>10.1f}{stats['evictions']:>11}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Engine host worker
+Runs one TTS engine in its own process for the API (started by EngineHostAdapter, see ENGINE_HOSTS)
+
+Usage:
+    python engine_worker.py --engine chatterbox --socket /tmp/runthru-engines/chatterbox.sock
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from adapters.engine_host import EngineHostServer
+from engines import VOICE_WATCH_INTERVAL, create_adapter, load_profile, voice_library
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve one TTS engine over a unix socket")
+    parser.add_argument("--engine", required=True, help="Engine name (chatterbox, index-tts, chatterbox-onnx)")
+    parser.add_argument("--socket", required=True, help="Unix socket path to listen on")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=os.getenv('LOG_LEVEL', 'INFO'),
+        format=f'%(asctime)s - [{args.engine} host] %(name)s - %(levelname)s - %(message)s'
+    )
+
+    load_profile(allow_tuning=args.engine == "chatterbox")
+    adapter = create_adapter(args.engine)
+    voice_library.refresh()
+    voice_library.start_watching(VOICE_WATCH_INTERVAL)
+
+    try:
+        asyncio.run(EngineHostServer(adapter, args.socket).serve())
+    finally:
+        voice_library.stop_watching()
+
+
+if __name__ == "__main__":
+    main()
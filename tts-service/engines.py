@@ -0,0 +1,218 @@
+"""
+TTS engines
+Engine configuration and adapter construction, shared by the API and engine host workers
+"""
+
+import logging
+import os
+from typing import List, Optional
+
+import torch
+
+from adapters.base import TTSAdapter
+from adapters.shared_weights import file_lock
+from adapters.short_utterance import ShortUtteranceConfig
+from adapters.cpu_optimizations import CpuOptimizationConfig
+from services.voice_library import VoiceLibrary
+from services.reference_audio import PreprocessConfig
+from services.post_processing import PostProcessConfig
+from services.eviction import WeightedCache
+from services.emotion_quantizer import EmotionQuantizer, parse_levels
+from services.autotune import ProfileStore, TuneProfile, TuneSettings, host_fingerprint, tune
+
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    # Engine interpreters may not ship python-dotenv; hosts inherit the API's environment
+    pass
+
+logger = logging.getLogger(__name__)
+
+MODEL_DIR = os.getenv('MODEL_DIR', './index-tts')
+DEVICE = "cuda:0" if torch.cuda.is_available() else "cpu"
+CACHE_DIR = os.getenv('CACHE_DIR', './cache')
+REFERENCE_VOICES_DIR = os.getenv(
+    'REFERENCE_VOICES_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'reference-voices')
+)
+VOICE_PRESETS_PATH = os.getenv('VOICE_PRESETS_PATH', '../backend/src/config/voice-presets.json')
+VOICE_WATCH_INTERVAL = float(os.getenv('VOICE_WATCH_INTERVAL', '5'))
+GENERATION_RETRIES = int(os.getenv('GENERATION_RETRIES', '1'))
+BATCH_SIZE = int(os.getenv('BATCH_SIZE', '8'))
+ONNX_MODEL_DIR = os.getenv('ONNX_MODEL_DIR', './onnx/chatterbox')
+ONNX_INTRA_OP_THREADS = int(os.getenv('ONNX_INTRA_OP_THREADS', '0'))
+# Reduced-precision Chatterbox generation on CUDA: fp16 | bf16 (empty = fp32)
+AUTOCAST_DTYPE = os.getenv('AUTOCAST_DTYPE') or None
+
+# Audio and conditioning cache eviction: gdsf (render time vs size vs use count) | lru
+CACHE_EVICTION_POLICY = os.getenv('CACHE_EVICTION_POLICY', 'gdsf').lower()
+CONDITIONING_CACHE_MB = float(os.getenv('CONDITIONING_CACHE_MB', '256'))
+
+# Emotion intensity snapped to these levels (empty = use the exact value);
+# Chatterbox preconditions every indexed voice at each level during warmup
+emotion_quantizer = EmotionQuantizer(parse_levels(os.getenv('EMOTION_LEVELS', '0,0.25,0.5,0.75,1')))
+
+# Per-host tuned settings: off | apply (use a saved profile) | startup (tune if none is saved)
+AUTOTUNE = os.getenv('AUTOTUNE', 'off').lower()
+AUTOTUNE_VOICE = os.getenv('AUTOTUNE_VOICE', '')
+
+# Several uvicorn workers map one weight snapshot instead of each loading a copy
+SHARED_WEIGHTS = os.getenv(
+    'SHARED_WEIGHTS', 'true' if int(os.getenv('WORKERS', '1')) > 1 else 'false'
+).lower() == 'true'
+
+# CPU performance mode (only used when CUDA is unavailable)
+cpu_optimizations = CpuOptimizationConfig(
+    quantize=os.getenv('CPU_QUANTIZE', 'false').lower() == 'true',
+    compile=os.getenv('CPU_COMPILE', 'false').lower() == 'true',
+    intra_op_threads=int(os.getenv('CPU_INTRA_OP_THREADS', '0')) or None,
+    inter_op_threads=int(os.getenv('CPU_INTER_OP_THREADS', '0')) or None,
+)
+
+short_utterances = ShortUtteranceConfig(
+    max_words=int(os.getenv('SHORT_UTTERANCE_MAX_WORDS', '2')),
+    max_seconds=float(os.getenv('SHORT_UTTERANCE_MAX_SECONDS', '3')),
+)
+
+# Applied to every generated line before encoding
+post_processing = PostProcessConfig(
+    enabled=os.getenv('POST_PROCESS', 'true').lower() == 'true',
+    trim_db=float(os.getenv('POST_TRIM_DB', '45')),
+    target_dbfs=float(os.getenv('POST_TARGET_DBFS', '-18')),
+    pad_ms=float(os.getenv('POST_PAD_MS', '0')),
+)
+
+voice_library = VoiceLibrary(
+    REFERENCE_VOICES_DIR,
+    os.path.join(CACHE_DIR, 'voice-index'),
+    presets_path=VOICE_PRESETS_PATH,
+    preprocess=PreprocessConfig(
+        max_seconds=float(os.getenv('REFERENCE_MAX_SECONDS', '10')),
+        trim_db=float(os.getenv('REFERENCE_TRIM_DB', '40')),
+        target_dbfs=float(os.getenv('REFERENCE_TARGET_DBFS', '-20')),
+    )
+)
+
+
+# Tuned profiles by host fingerprint; the applied one is reported by /health
+profile_store = ProfileStore(os.path.join(CACHE_DIR, 'autotune.json'))
+active_profile: Optional[TuneProfile] = None
+
+
+def apply_settings(settings: TuneSettings) -> None:
+    """Use tuned settings for adapters created from now on"""
+    global BATCH_SIZE, AUTOCAST_DTYPE
+    BATCH_SIZE = settings.batch_size
+    if DEVICE == "cpu":
+        cpu_optimizations.intra_op_threads = settings.intra_op_threads
+        cpu_optimizations.quantize = settings.dtype == "int8"
+    else:
+        AUTOCAST_DTYPE = None if settings.dtype == "fp32" else settings.dtype
+
+
+def tune_host(engine: str = "chatterbox") -> TuneProfile:
+    """Benchmark `engine` on this host and save the winning profile"""
+    voice = AUTOTUNE_VOICE or os.path.join(REFERENCE_VOICES_DIR, 'teen-male.wav')
+
+    def build(settings: TuneSettings) -> TTSAdapter:
+        apply_settings(settings)
+        return create_adapter(engine)
+
+    profile = tune(build, engine, DEVICE, voice)
+    profile_store.save(profile)
+    return profile
+
+
+def load_profile(allow_tuning: bool = True) -> Optional[TuneProfile]:
+    """
+    Apply this host's tuned profile according to AUTOTUNE
+
+    With AUTOTUNE=startup and no saved profile, the first process to get
+    the lock tunes; other workers wait and then load its result.
+
+    Args:
+        allow_tuning: False in processes that do not run the tuned engine
+
+    Returns:
+        The applied profile, if any
+    """
+    global active_profile
+    if AUTOTUNE == 'off':
+        return None
+
+    fingerprint, _ = host_fingerprint(DEVICE)
+    profile = profile_store.load(fingerprint)
+    if profile is None and AUTOTUNE == 'startup' and allow_tuning:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with file_lock(os.path.join(CACHE_DIR, 'autotune.lock')):
+            profile = profile_store.load(fingerprint)
+            if profile is None:
+                logger.info(f"No tuned profile for host {fingerprint}; running autotune")
+                profile = tune_host()
+
+    if profile is None:
+        logger.info(f"No tuned profile for host {fingerprint}; using configured settings")
+        return None
+
+    apply_settings(profile.settings)
+    active_profile = profile
+    logger.info(f"Applied tuned profile {fingerprint}: {profile.settings.model_dump()} (RTF {profile.rtf})")
+    return profile
+
+
+def available_engines() -> List[str]:
+    """Engines this installation can offer, in load order"""
+    engines = ["index-tts", "chatterbox"]
+    if os.path.isdir(ONNX_MODEL_DIR):
+        engines.append("chatterbox-onnx")
+    return engines
+
+
+def create_adapter(engine: str) -> TTSAdapter:
+    """
+    Load one TTS engine in this process
+
+    Adapter modules are imported here, so a process only imports the
+    dependencies of the engine it runs.
+
+    Args:
+        engine: Engine name (see `available_engines`)
+
+    Returns:
+        Initialized adapter
+    """
+    if engine == "index-tts":
+        from adapters.index_tts_adapter import IndexTTSAdapter
+        return IndexTTSAdapter(MODEL_DIR, DEVICE)
+
+    if engine == "chatterbox":
+        from adapters.chatterbox_adapter import ChatterboxAdapter
+        return ChatterboxAdapter(
+            MODEL_DIR,
+            DEVICE,
+            voice_library=voice_library,
+            short_utterances=short_utterances,
+            max_retries=GENERATION_RETRIES,
+            max_batch_size=BATCH_SIZE,
+            cpu_optimizations=cpu_optimizations,
+            shared_weights_dir=os.path.join(CACHE_DIR, 'weights') if SHARED_WEIGHTS else None,
+            post_processing=post_processing,
+            autocast_dtype=AUTOCAST_DTYPE,
+            emotion_levels=emotion_quantizer.levels,
+            conditioning_cache=WeightedCache(int(CONDITIONING_CACHE_MB * 1024 * 1024), CACHE_EVICTION_POLICY)
+        )
+
+    if engine == "chatterbox-onnx":
+        from adapters.onnx_adapter import ChatterboxOnnxAdapter
+        return ChatterboxOnnxAdapter(
+            ONNX_MODEL_DIR,
+            DEVICE,
+            voice_library=voice_library,
+            intra_op_threads=ONNX_INTRA_OP_THREADS,
+            max_retries=GENERATION_RETRIES,
+            post_processing=post_processing,
+            conditioning_cache=WeightedCache(int(CONDITIONING_CACHE_MB * 1024 * 1024), CACHE_EVICTION_POLICY)
+        )
+
+    raise ValueError(f"Unknown engine: {engine}")
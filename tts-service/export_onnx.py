@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Export Chatterbox to ONNX for the `chatterbox-onnx` engine
+
+Writes text_encoder.onnx, decoder.onnx and vocoder.onnx plus the tables and
+manifest that adapters/onnx_adapter.py expects.
+
+Usage:
+    python export_onnx.py --output ./onnx/chatterbox [--voices]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+import numpy as np
+import torch
+
+import engines
+from adapters.onnx_adapter import PACK_SCALE
+from services.reference_audio import prepare_reference
+from services.voice_library import VoiceLibrary
+
+OPSET = 17
+
+
+class TextEncoder(torch.nn.Module):
+    """text tokens + voice conditioning → [cond | text | BOS] embeddings (cond/uncond rows)"""
+
+    def __init__(self, t3):
+        super().__init__()
+        self.t3 = t3
+
+    def forward(self, text_tokens, speaker_emb, cond_prompt_speech_tokens, emotion_adv):
+        from chatterbox.models.t3.modules.cond_enc import T3Cond
+
+        t3 = self.t3
+        cond = T3Cond(
+            speaker_emb=speaker_emb,
+            cond_prompt_speech_tokens=cond_prompt_speech_tokens,
+            emotion_adv=emotion_adv,
+        )
+        bos = torch.full_like(text_tokens[:, :1], t3.hp.start_speech_token)
+        # cfg_weight > 0 zeroes the text embedding of the second (unconditional) row
+        embeds, _ = t3.prepare_input_embeds(t3_cond=cond, text_tokens=text_tokens, speech_tokens=bos, cfg_weight=0.5)
+        bos_embed = t3.speech_emb(bos) + t3.speech_pos_emb.get_fixed_embedding(0)
+        return torch.cat([embeds, bos_embed], dim=1)
+
+
+class Decoder(torch.nn.Module):
+    """One T3 step over a flat list of past key/value tensors"""
+
+    def __init__(self, t3):
+        super().__init__()
+        self.t3 = t3
+        self.num_layers = t3.cfg.num_hidden_layers
+
+    def forward(self, inputs_embeds, attention_mask, position_ids, *past):
+        legacy = tuple((past[2 * i], past[2 * i + 1]) for i in range(self.num_layers))
+        try:
+            from transformers import DynamicCache
+            cache = DynamicCache.from_legacy_cache(legacy)
+        except ImportError:
+            cache = legacy
+
+        out = self.t3.tfmr(
+            inputs_embeds=inputs_embeds,
+            attention_mask=attention_mask,
+            position_ids=position_ids,
+            past_key_values=cache,
+            use_cache=True,
+            return_dict=True,
+        )
+        logits = self.t3.speech_head(out.last_hidden_state[:, -1])
+
+        present = out.past_key_values
+        if hasattr(present, "to_legacy_cache"):
+            present = present.to_legacy_cache()
+        return (logits, *[t for kv in present for t in kv])
+
+
+class Vocoder(torch.nn.Module):
+    """
+    speech tokens + voice prompt → packed HiFT spectrum
+
+    torch.istft does not export, so HiFT's `_istft` is swapped for a function
+    returning [log-magnitude | phase] scaled into HiFT's output clamp; the
+    adapter finishes the inverse STFT in NumPy.
+    """
+
+    def __init__(self, s3gen):
+        super().__init__()
+        self.s3gen = s3gen
+        s3gen.mel2wav._istft = lambda magnitude, phase: torch.cat(
+            [torch.log(magnitude.clamp(min=1e-5)), phase], dim=1
+        ) * PACK_SCALE
+
+    def forward(self, speech_tokens, prompt_token, prompt_feat, embedding):
+        ref_dict = {
+            "prompt_token": prompt_token,
+            "prompt_token_len": torch.tensor([prompt_token.size(1)]),
+            "prompt_feat": prompt_feat,
+            "prompt_feat_len": None,
+            "embedding": embedding,
+        }
+        mels = self.s3gen.flow_inference(speech_tokens, ref_dict=ref_dict, finalize=True)
+        packed, _ = self.s3gen.mel2wav.inference(speech_feat=mels)
+        return packed
+
+
+def voice_arrays(conds) -> dict:
+    """Conditionals → arrays stored in voice .npz files"""
+    return {
+        "speaker_emb": conds.t3.speaker_emb.cpu().numpy(),
+        "cond_prompt_speech_tokens": conds.t3.cond_prompt_speech_tokens.cpu().numpy(),
+        "prompt_token": conds.gen["prompt_token"].cpu().numpy(),
+        "prompt_feat": conds.gen["prompt_feat"].cpu().numpy(),
+        "embedding": conds.gen["embedding"].cpu().numpy(),
+    }
+
+
+def export_voices(model, output: str, reference_dir: str, index_dir: str) -> None:
+    """
+    Precompute conditioning for every reference voice as voices/<digest>.npz
+
+    Prompts are preprocessed with the service's REFERENCE_* settings, so
+    exported voices match what the PyTorch engine conditions on.
+    """
+    os.makedirs(os.path.join(output, "voices"), exist_ok=True)
+    preprocess = engines.voice_library.preprocess
+    library = VoiceLibrary(reference_dir, index_dir, preprocess=preprocess)
+    library.refresh()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for entry in library.list():
+            prompt = os.path.join(tmp, f"{entry.digest}.wav")
+            prepare_reference(entry.path, prompt, model.sr, preprocess)
+            model.prepare_conditionals(prompt, exaggeration=0.5)
+            np.savez(os.path.join(output, "voices", f"{entry.digest}.npz"), **voice_arrays(model.conds))
+            print(f"   🎤 {entry.id}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default="./onnx/chatterbox")
+    parser.add_argument("--voices", action="store_true", help="Also export reference voice conditioning")
+    parser.add_argument("--reference-dir", default=os.path.join(os.path.dirname(__file__), "reference-voices"))
+    parser.add_argument("--index-dir", default=os.path.join(os.getenv("CACHE_DIR", "./cache"), "voice-index"))
+    args = parser.parse_args()
+
+    from chatterbox import ChatterboxTTS
+
+    print("📦 Exporting Chatterbox to ONNX")
+    print("=" * 50)
+    os.makedirs(args.output, exist_ok=True)
+
+    model = ChatterboxTTS.from_pretrained(device="cpu")
+    t3, s3gen = model.t3.eval(), model.s3gen.eval()
+    cfg = t3.cfg
+    num_layers = cfg.num_hidden_layers
+    num_kv_heads = getattr(cfg, "num_key_value_heads", cfg.num_attention_heads)
+    head_dim = cfg.hidden_size // cfg.num_attention_heads
+    conds = model.conds
+
+    # Text encoder
+    text_tokens = torch.tensor([[t3.hp.start_text_token, 10, 20, 30, t3.hp.stop_text_token]] * 2)
+    torch.onnx.export(
+        TextEncoder(t3),
+        (text_tokens, conds.t3.speaker_emb, conds.t3.cond_prompt_speech_tokens, torch.full((1, 1, 1), 0.5)),
+        os.path.join(args.output, "text_encoder.onnx"),
+        input_names=["text_tokens", "speaker_emb", "cond_prompt_speech_tokens", "emotion_adv"],
+        output_names=["embeds"],
+        dynamic_axes={
+            "text_tokens": {1: "text_len"},
+            "cond_prompt_speech_tokens": {1: "cond_len"},
+            "embeds": {1: "prompt_len"},
+        },
+        opset_version=OPSET,
+    )
+    print("✅ text_encoder.onnx")
+
+    # Decoder (single step with KV cache)
+    past_len = 4
+    past = [torch.zeros(2, num_kv_heads, past_len, head_dim) for _ in range(2 * num_layers)]
+    past_names = [f"past_{i}" for i in range(2 * num_layers)]
+    present_names = [f"present_{i}" for i in range(2 * num_layers)]
+    torch.onnx.export(
+        Decoder(t3),
+        (torch.zeros(2, 1, cfg.hidden_size), torch.ones(2, past_len + 1, dtype=torch.long),
+         torch.full((2, 1), past_len, dtype=torch.long), *past),
+        os.path.join(args.output, "decoder.onnx"),
+        input_names=["inputs_embeds", "attention_mask", "position_ids", *past_names],
+        output_names=["logits", *present_names],
+        dynamic_axes={
+            "inputs_embeds": {1: "step_len"},
+            "attention_mask": {1: "total_len"},
+            "position_ids": {1: "step_len"},
+            **{name: {2: "past_len"} for name in past_names},
+            **{name: {2: "total_len"} for name in present_names},
+        },
+        opset_version=OPSET,
+    )
+    print("✅ decoder.onnx")
+
+    # Vocoder (flow + HiFT up to the spectrum)
+    istft = dict(s3gen.mel2wav.istft_params)
+    audio_limit = float(s3gen.mel2wav.audio_limit)
+    torch.onnx.export(
+        Vocoder(s3gen),
+        (torch.randint(0, 6561, (1, 50)), conds.gen["prompt_token"], conds.gen["prompt_feat"], conds.gen["embedding"]),
+        os.path.join(args.output, "vocoder.onnx"),
+        input_names=["speech_tokens", "prompt_token", "prompt_feat", "embedding"],
+        output_names=["spectrum"],
+        dynamic_axes={
+            "speech_tokens": {1: "n_tokens"},
+            "prompt_token": {1: "prompt_tokens"},
+            "prompt_feat": {1: "prompt_frames"},
+            "spectrum": {2: "frames"},
+        },
+        opset_version=OPSET,
+    )
+    print("✅ vocoder.onnx")
+
+    # Embedding tables, tokenizer, default voice, manifest
+    np.save(os.path.join(args.output, "speech_emb.npy"), t3.speech_emb.weight.detach().numpy())
+    np.save(os.path.join(args.output, "speech_pos_emb.npy"), t3.speech_pos_emb.emb.weight.detach().numpy())
+    np.savez(os.path.join(args.output, "default_voice.npz"), **voice_arrays(conds))
+
+    from huggingface_hub import hf_hub_download
+    shutil.copy(hf_hub_download(repo_id="ResembleAI/chatterbox", filename="tokenizer.json"),
+                os.path.join(args.output, "tokenizer.json"))
+
+    manifest = {
+        "sample_rate": model.sr,
+        "speech_token_rate": 25,
+        "max_new_tokens": 1000,
+        "num_layers": num_layers,
+        "num_kv_heads": num_kv_heads,
+        "head_dim": head_dim,
+        "start_text_token": t3.hp.start_text_token,
+        "stop_text_token": t3.hp.stop_text_token,
+        "start_speech_token": t3.hp.start_speech_token,
+        "stop_speech_token": t3.hp.stop_speech_token,
+        "speech_vocab_size": 6561,
+        "n_fft": istft["n_fft"],
+        "hop_length": istft["hop_len"],
+        "audio_limit": audio_limit,
+    }
+    with open(os.path.join(args.output, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    print("✅ manifest.json, tables, tokenizer, default voice")
+
+    if args.voices:
+        print("⏳ Exporting reference voices...")
+        export_voices(model, args.output, args.reference_dir, args.index_dir)
+
+    print(f"\n🎯 Export complete: {args.output}")
+    print("   Start the service with ONNX_MODEL_DIR set to enable engine 'chatterbox-onnx'")
+
+
+if __name__ == "__main__":
+    main()
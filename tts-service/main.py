@@ -3,16 +3,56 @@ RunThru TTS Service
 FastAPI application for text-to-speech synthesis
 """
 
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import Response
+import asyncio
+import re
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 import os
+import threading
+import time
+from typing import Dict, List, Set
 from dotenv import load_dotenv
 
-from adapters.base import TTSRequest
-from adapters.index_tts_adapter import IndexTTSAdapter
-from adapters.chatterbox_adapter import ChatterboxAdapter
+from adapters.base import TTSRequest, SynthesisItem, EmotionParams, track_cached_clips
+from adapters.engine_host import EngineHostAdapter, parse_engine_hosts
+import engines
+from engines import (
+    CACHE_DIR,
+    CACHE_EVICTION_POLICY,
+    DEVICE,
+    VOICE_WATCH_INTERVAL,
+    available_engines,
+    create_adapter,
+    emotion_quantizer,
+    post_processing,
+    voice_library,
+)
+from services.post_processing import wav_seconds
+from services.text_normalizer import NormalizerConfig, TextNormalizer
+from services.warmup import WarmupPlan, WarmupReport, run_warmup
+from services.duration_budget import duration_budget
+from services.metrics import metrics
+from services.audio_store import AudioStore, asset_key
+from services.shared_store import open_shared_store
+from services.script_revisions import (
+    SCRIPT_ID_PATTERN,
+    LineAsset,
+    ScriptRevisionRequest,
+    ScriptRevisionResult,
+    ScriptRevisionStore,
+    diff_lines,
+    revision_id,
+)
+from services.character_cards import CardAsset, CardBatchRequest, CardBatchResult, card_filename, pack_archive
+from services.render_planner import RenderPlan, RenderPlanRequest, expected_seconds, plan_render
+from services.inference_queue import InferenceQueue, QueueFull, SynthesisEstimate
+from services.routing import POLICIES, RoutingConfig, hedged, load_voice_map, parse_alternates, with_fallback
+from services.render_farm import FarmBroker, FarmCoordinator, FarmWorker, FarmWorkerInfo
+from services.render_jobs import JobJournal, JobLine, JobStatus, RenderJob, RenderJobRunner, new_job_id
+from services.wav_concat import ConcatRequest, read_wav_info, plan_concat, stream_concat
 
 load_dotenv()
 
@@ -39,41 +79,215 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize TTS adapters
-import torch
+# Service settings (engine settings live in engines.py)
+SHORT_UTTERANCE_PRERENDER = os.getenv('SHORT_UTTERANCE_PRERENDER', 'true').lower() == 'true'
+DURATION_BUDGET_FACTOR = float(os.getenv('DURATION_BUDGET_FACTOR', '2.0'))
+# Real-time factor assumed for render ETAs until synthesis has been measured
+DEFAULT_RTF = float(os.getenv('DEFAULT_RTF', '1.0'))
+# /estimate suggests max(ESTIMATE_MIN_TIMEOUT, expected x ESTIMATE_TIMEOUT_FACTOR) as client deadline
+ESTIMATE_TIMEOUT_FACTOR = float(os.getenv('ESTIMATE_TIMEOUT_FACTOR', '2.0'))
+ESTIMATE_MIN_TIMEOUT = float(os.getenv('ESTIMATE_MIN_TIMEOUT', '10'))
+# Shortest-job-first scheduling: priority gained per second waited (prevents starvation)
+SCHEDULER_AGING = float(os.getenv('SCHEDULER_AGING', '1.0'))
+# Reject /synthesize requests expected to finish later than this (seconds, 0 = never)
+ADMISSION_BUDGET_SECONDS = float(os.getenv('ADMISSION_BUDGET_SECONDS', '0'))
+
+# Interactive routing when an engine is slow or fails: single | fallback | hedge
+# ROUTING_ALTERNATES=index-tts=chatterbox,chatterbox=chatterbox-onnx
+routing = RoutingConfig(
+    policy=os.getenv('ROUTING_POLICY', 'single').lower(),
+    alternates=parse_alternates(os.getenv('ROUTING_ALTERNATES', '')),
+    voice_map=load_voice_map(os.getenv('ROUTING_VOICE_MAP', '')),
+    slo_seconds=float(os.getenv('ROUTING_SLO_SECONDS', '10')),
+    hedge_quantile=float(os.getenv('ROUTING_HEDGE_QUANTILE', '0.95')),
+    hedge_min_delay=float(os.getenv('ROUTING_HEDGE_MIN_DELAY', '0.5')),
+)
+if routing.policy not in POLICIES:
+    logger.warning(f"Unknown ROUTING_POLICY {routing.policy!r}; using single")
+    routing.policy = "single"
 
-MODEL_DIR = os.getenv('MODEL_DIR', './index-tts')
-DEVICE = "cuda:0" if torch.cuda.is_available() else "cpu"
+WORKERS = int(os.getenv('WORKERS', '1'))
 
-adapters = {}
+# Render farm on one box: off | coordinator (splits /render/jobs into line tasks)
+# | worker (renders farm tasks). Every instance shares FARM_DB and CACHE_DIR/audio
+FARM_MODE = os.getenv('FARM_MODE', 'off').lower()
+FARM_DB = os.getenv('FARM_DB') or os.path.join(CACHE_DIR, 'farm.db')
+FARM_POLL_SECONDS = float(os.getenv('FARM_POLL_SECONDS', '0.5'))
 
-try:
-    logger.info(f"Initializing Index TTS adapter (device: {DEVICE})...")
-    adapters["index-tts"] = IndexTTSAdapter(MODEL_DIR, DEVICE)
-    logger.info("Index TTS adapter initialized")
-except Exception as e:
-    logger.error(f"Failed to initialize Index TTS: {e}")
+# Engines run in their own subprocess (optionally another interpreter):
+# ENGINE_HOSTS=index-tts=/path/to/index-tts/.venv/bin/python,chatterbox
+ENGINE_HOSTS = parse_engine_hosts(os.getenv('ENGINE_HOSTS', ''))
+ENGINE_HOST_START_TIMEOUT = float(os.getenv('ENGINE_HOST_START_TIMEOUT', '600'))
 
-try:
-    logger.info(f"Initializing Chatterbox adapter (device: {DEVICE})...")
-    adapters["chatterbox"] = ChatterboxAdapter(MODEL_DIR, DEVICE)
-    logger.info("Chatterbox adapter initialized")
-except Exception as e:
-    logger.error(f"Failed to initialize Chatterbox: {e}")
+# Spoken-form rewrite of every line before it reaches an engine (and its asset key)
+text_normalizer = TextNormalizer(NormalizerConfig(
+    enabled=os.getenv('TEXT_NORMALIZE', 'true').lower() == 'true',
+    cache_size=int(os.getenv('TEXT_NORMALIZE_CACHE', '4096')),
+))
 
+# Run before the service reports ready (GET /ready)
+warmup_plan = WarmupPlan(
+    enabled=os.getenv('WARMUP_PLAN', 'true').lower() == 'true',
+    voices=os.getenv('WARMUP_VOICES', 'true').lower() == 'true',
+    buckets=[b.strip() for b in os.getenv('WARMUP_BUCKETS', 'short,medium,long').split(',') if b.strip()],
+)
+warmup_report = WarmupReport()
 
-@app.on_event("startup")
-async def startup_event():
-    """Warm up models on startup"""
-    logger.info("Warming up TTS models...")
-    for name, adapter in adapters.items():
+# Rendered lines by content hash (memory LRU -> CACHE_DIR/audio -> optional
+# shared store for other nodes), and the latest line list per script
+audio_store = AudioStore(
+    os.path.join(CACHE_DIR, 'audio'),
+    memory_bytes=int(float(os.getenv('AUDIO_CACHE_MEMORY_MB', '64')) * 1024 * 1024),
+    shared=open_shared_store(
+        os.getenv('AUDIO_SHARED_STORE', ''),
+        endpoint_url=os.getenv('AUDIO_S3_ENDPOINT_URL')
+    ),
+    disk_bytes=int(float(os.getenv('AUDIO_CACHE_DISK_MB', '0')) * 1024 * 1024),
+    policy=CACHE_EVICTION_POLICY,
+    default_rtf=DEFAULT_RTF,
+    trace_path=os.getenv('AUDIO_CACHE_TRACE') or None
+)
+revision_store = ScriptRevisionStore(os.path.join(CACHE_DIR, 'scripts'))
+
+ASSET_KEY_PATTERN = re.compile(r'^[0-9a-f]{40}$')
+
+
+def _create_adapters():
+    """Load every available TTS engine, in process or in an engine host"""
+    adapters = {}
+
+    # Tuned settings apply to in-process engines; a hosted chatterbox tunes in its host
+    engines.load_profile(allow_tuning="chatterbox" not in ENGINE_HOSTS)
+
+    for name in available_engines():
         try:
-            logger.info(f"Warming up {name}...")
-            adapter.warmup()
-            logger.info(f"{name} ready!")
+            if name in ENGINE_HOSTS:
+                adapters[name] = EngineHostAdapter(
+                    name,
+                    python=ENGINE_HOSTS[name],
+                    start_timeout=ENGINE_HOST_START_TIMEOUT
+                )
+                logger.info(f"{name} engine host started")
+            else:
+                logger.info(f"Initializing {name} adapter (device: {DEVICE})...")
+                adapters[name] = create_adapter(name)
+                logger.info(f"{name} adapter initialized")
         except Exception as e:
-            logger.error(f"Failed to warm up {name}: {e}")
-    logger.info("All models ready!")
+            logger.error(f"Failed to initialize {name}: {e}")
+
+    return adapters
+
+
+# With WORKERS > 1, `python main.py` only supervises: each uvicorn worker
+# imports this module and loads its own adapters (over shared weights)
+SUPERVISOR = __name__ == "__main__" and WORKERS > 1
+adapters = {} if SUPERVISOR else _create_adapters()
+
+# Requests wait per engine here, where a disconnect can still drop them
+inference_queues = {
+    name: InferenceQueue(aging=SCHEDULER_AGING, budget=ADMISSION_BUDGET_SECONDS)
+    for name in adapters
+}
+
+# How often a running synthesis checks whether its client is still connected
+DISCONNECT_POLL_SECONDS = 0.25
+
+# Renders planned script jobs in the background (see /render/jobs); the
+# journal lets unfinished jobs resume after a restart, and is shared by all
+# worker processes, which claim jobs from it so each renders only once
+farm_broker = None if SUPERVISOR or FARM_MODE == 'off' else FarmBroker(
+    FARM_DB,
+    worker_timeout=float(os.getenv('FARM_WORKER_TIMEOUT', '30')),
+    affinity_seconds=float(os.getenv('FARM_AFFINITY_SECONDS', '30'))
+)
+render_jobs = RenderJobRunner(
+    render=lambda engine, pending: _render_assets(engine, adapters[engine], pending),
+    rtf=lambda engine: _current_rtf(engine),
+    # Farm workers share the coordinator's CACHE_DIR; only the coordinator journals jobs
+    journal=None if SUPERVISOR or FARM_MODE == 'worker' else JobJournal(
+        os.path.join(CACHE_DIR, 'jobs.db'),
+        retention_days=float(os.getenv('JOB_RETENTION_DAYS', '7'))
+    ),
+    lease_seconds=float(os.getenv('JOB_LEASE_SECONDS', '60')),
+    farm=FarmCoordinator(
+        farm_broker,
+        cost=lambda engine, item: _estimate_cost(engine, [item.text], item.voice_id),
+        voice=voice_library.identity,
+        poll_seconds=FARM_POLL_SECONDS
+    ) if FARM_MODE == 'coordinator' and farm_broker else None
+)
+
+# Claims line tasks from the farm once warmup has finished
+farm_worker = FarmWorker(
+    farm_broker,
+    engines=list(adapters),
+    render=lambda engine, pending: _render_assets(engine, adapters[engine], pending),
+    batch_size=engines.BATCH_SIZE,
+    poll_seconds=FARM_POLL_SECONDS
+) if FARM_MODE == 'worker' and farm_broker else None
+
+# Index reference voices (conditioning is cached on disk by content digest)
+if not SUPERVISOR:
+    voice_library.refresh()
+
+
+@app.on_event("startup")
+async def startup_event():
+    """Start background workers and the warmup plan"""
+    # Pick up new reference voices without a restart
+    voice_library.start_watching(VOICE_WATCH_INTERVAL)
+
+    # Background renderer for planned script jobs
+    render_jobs.start()
+
+    # Requests are accepted meanwhile; /ready answers 503 until the plan completes
+    app.state.warmup = asyncio.create_task(_warm_up())
+
+
+async def _warm_up():
+    """Background task: run the warmup plan, then join the farm and fill the short-utterance clip banks"""
+    await run_warmup(
+        adapters,
+        warmup_plan,
+        lambda name: inference_queues[name].run,
+        warmup_report
+    )
+
+    if farm_worker is not None:
+        await farm_worker.start()
+
+    if SHORT_UTTERANCE_PRERENDER:
+        for name, adapter in adapters.items():
+            if hasattr(adapter, 'prerender_short_utterances'):
+                threading.Thread(
+                    target=_prerender_short_utterances,
+                    args=(name, adapter),
+                    name=f"{name}-prerender",
+                    daemon=True
+                ).start()
+
+
+def _prerender_short_utterances(name, adapter):
+    """Background task: pre-render common interjections for every voice"""
+    try:
+        rendered = adapter.prerender_short_utterances()
+        logger.info(f"{name}: pre-rendered {rendered} short utterances")
+    except Exception as e:
+        logger.error(f"{name}: short utterance pre-render failed: {e}")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background workers and engine hosts"""
+    voice_library.stop_watching()
+    if farm_worker is not None:
+        await farm_worker.stop()
+    await render_jobs.stop()
+    # Let write-behind uploads reach the shared store
+    await asyncio.get_running_loop().run_in_executor(None, audio_store.flush, 30)
+    for adapter in adapters.values():
+        if isinstance(adapter, EngineHostAdapter):
+            adapter.close()
 
 
 @app.get("/")
@@ -86,6 +300,20 @@ async def root():
     }
 
 
+@app.get("/ready")
+async def readiness():
+    """
+    Readiness probe: 200 once the warmup plan has completed, 503 before
+
+    Returns: Warmup progress with per-voice and per-bucket timings
+    """
+    return Response(
+        content=warmup_report.model_dump_json(),
+        media_type="application/json",
+        status_code=200 if warmup_report.ready else 503
+    )
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint with GPU status"""
@@ -93,19 +321,43 @@ async def health_check():
 
     return {
         "status": "healthy",
+        "ready": warmup_report.ready,
+        "warmup": warmup_report.state,
         "timestamp": "2025-10-23",
         "gpu_available": torch.cuda.is_available(),
         "gpu_name": torch.cuda.get_device_name(0) if torch.cuda.is_available() else None,
         "gpu_memory_allocated_gb": round(torch.cuda.memory_allocated(0) / 1e9, 2) if torch.cuda.is_available() else 0,
         "engines": list(adapters.keys()),
+        "autotune": {
+            "mode": engines.AUTOTUNE,
+            "fingerprint": engines.active_profile.fingerprint if engines.active_profile else None,
+            "settings": engines.active_profile.settings.model_dump() if engines.active_profile else None,
+            "rtf": engines.active_profile.rtf if engines.active_profile else None,
+            "tuned_at": engines.active_profile.tuned_at if engines.active_profile else None,
+        },
+        "routing": {"policy": routing.policy, "alternates": routing.alternates},
+        "engine_hosts": {
+            name: {"alive": adapter.alive, "restarts": adapter.restarts}
+            for name, adapter in adapters.items()
+            if isinstance(adapter, EngineHostAdapter)
+        },
     }
 
 
 @app.post("/synthesize")
-async def synthesize(request: TTSRequest):
+async def synthesize(request: TTSRequest, http_request: Request):
     """
     Generate speech audio from text
 
+    Identical requests are served from the audio store; the asset key is
+    returned in the X-Asset-Key header. If the client disconnects, queued
+    work is dropped and a running generation stops at its next decoder step.
+
+    Under ROUTING_POLICY=fallback or hedge the line may be served by the
+    engine's alternate (X-Engine header names the engine that rendered it).
+    Emotion intensity is snapped to EMOTION_LEVELS; X-Emotion-Intensity is
+    the value used.
+
     Returns: WAV audio file (audio/wav)
     """
     logger.info(f"Synthesis request: engine={request.engine}, voice={request.voice_id}")
@@ -117,31 +369,690 @@ async def synthesize(request: TTSRequest):
             detail=f"Unknown engine: {request.engine}. Available: {list(adapters.keys())}"
         )
 
+    key = _asset_key(request.engine, request.voice_id, request.text, request.emotion)
+    # Intensity actually rendered (quantized), reported back to the caller
+    intensity = f"{emotion_quantizer.snap(request.emotion.intensity):g}"
+    # A shared-store read may go over the network
+    cached = await asyncio.get_running_loop().run_in_executor(None, audio_store.get, key)
+    if cached is not None:
+        metrics.increment("audio_store_hits", engine=request.engine)
+        return Response(
+            content=cached,
+            media_type="audio/wav",
+            headers={"X-Asset-Key": key, "X-Emotion-Intensity": intensity}
+        )
+
+    route = (request.engine, request.voice_id)
+    alternate = _alternate_route(*route)
     try:
-        audio_bytes = await adapter.synthesize(
-            text=request.text,
-            voice_id=request.voice_id,
-            emotion=request.emotion
+        wait, cost = _admit(*route, request.text)
+    except QueueFull as e:
+        if alternate is None:
+            raise _overloaded(e)
+        # Primary is saturated: send the line straight to the alternate
+        _record_route(request.engine, "fallback_admission")
+        route, alternate = alternate, None
+        try:
+            wait, cost = _admit(*route, request.text)
+        except QueueFull as e:
+            raise _overloaded(e)
+
+    async def attempt(engine: str, voice_id: str):
+        item = _synthesis_item(request.text, voice_id, request.emotion)
+        audio_bytes = await inference_queues[engine].run(
+            lambda: _synthesize_item(engine, adapters[engine], item),
+            cost=_estimate_cost(engine, [item.text], voice_id)
         )
+        return engine, voice_id, audio_bytes
+
+    try:
+        start = time.perf_counter()
+        if alternate is None:
+            routed = await _cancel_on_disconnect(http_request, attempt(*route))
+        elif routing.policy == "hedge":
+            routed, decision = await _cancel_on_disconnect(http_request, hedged(
+                lambda: attempt(*route),
+                lambda: attempt(*alternate),
+                delay=_hedge_delay(*route, request.text, wait)
+            ))
+            _record_route(request.engine, decision)
+        else:
+            routed, decision = await _cancel_on_disconnect(http_request, with_fallback(
+                lambda: attempt(*route),
+                lambda: attempt(*alternate),
+                slo_seconds=routing.slo_seconds
+            ))
+            _record_route(request.engine, decision)
+        metrics.observe("synthesis_seconds", time.perf_counter() - start, engine=request.engine)
+
+        engine, voice_id, audio_bytes = routed
+        if (engine, voice_id) != (request.engine, request.voice_id):
+            # Served by the alternate: store under the alternate's own key
+            key = _asset_key(engine, voice_id, request.text, request.emotion)
+        audio_store.put(key, audio_bytes, cost=_render_cost(engine, voice_id, audio_bytes))
 
         return Response(
             content=audio_bytes,
-            media_type="audio/wav"
+            media_type="audio/wav",
+            headers={
+                "X-Asset-Key": key,
+                "X-Engine": engine,
+                "X-Emotion-Intensity": intensity,
+                "X-Queue-Wait-Estimate": f"{wait:.2f}",
+                "X-Render-Estimate": f"{cost:.2f}",
+            }
         )
+    except HTTPException:
+        raise
     except Exception as e:
+        metrics.increment("synthesis_failures", engine=request.engine)
         logger.error(f"TTS generation failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _admit(engine: str, voice_id: str, text: str) -> tuple:
+    """Admission check for one line on `engine`: (expected queue wait, estimated render seconds)"""
+    cost = _estimate_cost(engine, [text_normalizer.normalize(text)], voice_id)
+    try:
+        return inference_queues[engine].admit(cost), cost
+    except QueueFull:
+        metrics.increment("admission_rejections", engine=engine)
+        raise
+
+
+def _overloaded(e: QueueFull) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail=str(e),
+        headers={"Retry-After": str(max(1, round(e.expected_seconds - e.budget_seconds)))}
+    )
+
+
+def _alternate_route(engine: str, voice_id: str):
+    """(engine, voice) to fall back or hedge to under the routing policy, or None"""
+    alternate = routing.alternate(engine)
+    if alternate is None or alternate not in adapters:
+        return None
+    route = (alternate, routing.alternate_voice(alternate, voice_id))
+    return None if route == (engine, voice_id) else route
+
+
+def _hedge_delay(engine: str, voice_id: str, text: str, wait: float) -> float:
+    """
+    Seconds before hedging a line: expected queue wait plus its render time
+    at the engine's tail (ROUTING_HEDGE_QUANTILE) RTF, so only outliers hedge
+    """
+    q = routing.hedge_quantile
+    rtf = (
+        metrics.percentile("voice_rtf", q, engine=engine, voice=voice_library.identity(voice_id))
+        or metrics.percentile("synthesis_rtf", q, engine=engine)
+        or DEFAULT_RTF
+    )
+    return max(routing.hedge_min_delay, wait + expected_seconds(text_normalizer.normalize(text)) * rtf)
+
+
+def _record_route(engine: str, decision: str) -> None:
+    """Count a routing decision (primary, fallback_slo, fallback_error, fallback_admission, hedge_*)"""
+    metrics.increment("routing_decisions", engine=engine, policy=routing.policy, decision=decision)
+    if decision != "primary":
+        logger.info(f"Routing ({routing.policy}) for {engine}: {decision}")
+
+
+@app.post("/estimate", response_model=SynthesisEstimate)
+async def estimate_synthesis(request: TTSRequest):
+    """
+    Expected completion time for a /synthesize request, computed server-side
+
+    Clients use `suggested_timeout_seconds` as their deadline instead of a
+    fixed timeout.
+
+    Returns: Queue wait, render time and total, in seconds
+    """
+    if request.engine not in adapters:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown engine: {request.engine}. Available: {list(adapters.keys())}"
+        )
+
+    key = _asset_key(request.engine, request.voice_id, request.text, request.emotion)
+    if await _stored([key]):
+        return SynthesisEstimate(cached=True, suggested_timeout_seconds=ESTIMATE_MIN_TIMEOUT)
+
+    queue = inference_queues[request.engine]
+    render = _estimate_cost(request.engine, [text_normalizer.normalize(request.text)], request.voice_id)
+    wait = queue.expected_wait(render)
+    return SynthesisEstimate(
+        queue_seconds=round(wait, 2),
+        render_seconds=round(render, 2),
+        expected_seconds=round(wait + render, 2),
+        queued=len(queue),
+        suggested_timeout_seconds=round(
+            max(ESTIMATE_MIN_TIMEOUT, (wait + render) * ESTIMATE_TIMEOUT_FACTOR), 1
+        ),
+    )
+
+
+async def _cancel_on_disconnect(http_request: Request, work):
+    """
+    Await `work`, cancelling it if the HTTP client goes away
+
+    Cancellation removes queued work from its InferenceQueue and sets the
+    running generation's cancel flag (see adapters.decode_guard).
+    """
+    task = asyncio.ensure_future(work)
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+        if done:
+            return task.result()
+        if await http_request.is_disconnected():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+            metrics.increment("synthesis_cancelled")
+            logger.info("Client disconnected; synthesis cancelled")
+            # Nobody is listening; the status is only for logs
+            raise HTTPException(status_code=499, detail="Client disconnected")
+
+
+@app.post("/scripts/{script_id}/revisions", response_model=ScriptRevisionResult)
+async def submit_script_revision(script_id: str, request: ScriptRevisionRequest):
+    """
+    Submit the full line list of a script revision and render only what changed
+
+    Lines are diffed against the previous revision by content hash (text,
+    voice, emotion, engine). Lines whose audio is already stored are reused,
+    so editing one line of a long script costs one render.
+
+    Returns: Mapping from each new line index to its asset (fetch via GET /assets/{asset_key})
+    """
+    adapter = adapters.get(request.engine)
+    if not adapter:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown engine: {request.engine}. Available: {list(adapters.keys())}"
+        )
+    if not SCRIPT_ID_PATTERN.match(script_id):
+        raise HTTPException(status_code=400, detail=f"Invalid script id: {script_id}")
+
+    keys = [
+        _asset_key(request.engine, line.voice_id, line.text, line.emotion)
+        for line in request.lines
+    ]
+    previous = revision_store.latest(script_id)
+    changes, removed = diff_lines(previous["keys"] if previous else [], keys)
+
+    # Render each missing asset once (repeated lines share a key)
+    pending = {}
+    stored = await _stored(keys)
+    for line, key in zip(request.lines, keys):
+        if key not in pending and key not in stored:
+            pending[key] = _synthesis_item(line.text, line.voice_id, line.emotion)
+    errors = await _render_assets(request.engine, adapter, pending)
+
+    lines = []
+    for line, key, change in zip(request.lines, keys, changes):
+        if key in errors:
+            lines.append(LineAsset(
+                index=change.index, character=line.character, status="failed", error=errors[key]
+            ))
+        else:
+            lines.append(LineAsset(
+                index=change.index,
+                character=line.character,
+                asset_key=key,
+                status=change.status,
+                previous_index=change.previous_index
+            ))
+
+    revision = revision_id(keys)
+    revision_store.save(script_id, revision, keys)
+    rendered = len(pending) - len(errors)
+    logger.info(
+        f"Script {script_id} revision {revision}: {len(keys)} lines, "
+        f"{rendered} rendered, {len(errors)} failed, {len(removed)} removed"
+    )
+
+    return ScriptRevisionResult(
+        script_id=script_id,
+        revision=revision,
+        previous_revision=previous["revision"] if previous else None,
+        lines=lines,
+        removed=removed,
+        rendered=rendered,
+        reused=sum(1 for key in keys if key not in pending),
+    )
+
+
+@app.get("/assets/{key}")
+async def get_asset(key: str):
+    """Rendered line audio by asset key (audio/wav)"""
+    if not ASSET_KEY_PATTERN.match(key):
+        raise HTTPException(status_code=400, detail=f"Invalid asset key: {key}")
+    audio = await asyncio.get_running_loop().run_in_executor(None, audio_store.get, key)
+    if audio is None:
+        raise HTTPException(status_code=404, detail=f"Asset not found: {key}")
+    return Response(content=audio, media_type="audio/wav", headers={"X-Asset-Key": key})
+
+
+@app.post("/render/plan", response_model=RenderPlan)
+async def plan_script_render(request: RenderPlanRequest):
+    """
+    Plan a script render without running it
+
+    Lines are grouped into voice batches inside scene-sized windows, windows
+    in script order; the ETA uses the engine's measured RTF.
+
+    Returns: Render plan (batches in render order, ETA per batch)
+    """
+    _require_adapter(request.engine)
+    keys = _plan_keys(request)
+    return await _plan(request, keys)
+
+
+@app.post("/render/jobs", response_model=JobStatus, status_code=202)
+async def submit_render_job(request: RenderPlanRequest):
+    """
+    Plan a script render and run it in the background
+
+    Poll GET /render/jobs/{job_id}; each line's asset_key is usable (GET
+    /assets, /concat) as soon as its status is done or cached.
+
+    Returns: Job status
+    """
+    _require_adapter(request.engine)
+    keys = _plan_keys(request)
+    plan = await _plan(request, keys)
+    assignments = {a.character: a for a in request.voice_assignments}
+
+    lines, items = [], {}
+    cached, unassigned = set(plan.cached), set(plan.unassigned)
+    for index, (line, key) in enumerate(zip(request.lines, keys)):
+        status = "unassigned" if index in unassigned else "cached" if index in cached else "pending"
+        lines.append(JobLine(index=index, character=line.character, asset_key=key, status=status))
+        if status == "pending" and key not in items:
+            assignment = assignments[line.character]
+            items[key] = _synthesis_item(line.text, assignment.voice_id, assignment.emotion)
+
+    job = RenderJob(
+        id=new_job_id(),
+        engine=request.engine,
+        script_id=request.script_id,
+        created=time.time(),
+        lines=lines,
+        plan=plan,
+        items=items,
+        state="queued" if plan.batches else "done",
+    )
+    await render_jobs.submit(job)
+    logger.info(
+        f"Render job {job.id}: {len(items)} to render, {len(cached)} cached, "
+        f"ETA {plan.eta_seconds:.0f}s (first window {plan.first_window_eta_seconds:.0f}s)"
+    )
+    return await render_jobs.status(job)
+
+
+@app.get("/render/jobs/{job_id}", response_model=JobStatus)
+async def get_render_job(job_id: str):
+    """Render job progress"""
+    job = await render_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return await render_jobs.status(job)
+
+
+@app.get("/farm", response_model=List[FarmWorkerInfo])
+async def get_farm():
+    """Render farm workers with their queues, warm voices and steal counts"""
+    if farm_broker is None:
+        raise HTTPException(status_code=404, detail="Render farm is off (FARM_MODE)")
+    return await asyncio.get_running_loop().run_in_executor(None, farm_broker.workers)
+
+
+def _require_adapter(engine: str):
+    adapter = adapters.get(engine)
+    if not adapter:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown engine: {engine}. Available: {list(adapters.keys())}"
+        )
+    return adapter
+
+
+def _plan_keys(request: RenderPlanRequest) -> list:
+    """Asset key per line (None where the character has no voice)"""
+    assignments = {a.character: a for a in request.voice_assignments}
+    keys = []
+    for line in request.lines:
+        assignment = assignments.get(line.character)
+        keys.append(
+            _asset_key(request.engine, assignment.voice_id, line.text, assignment.emotion)
+            if assignment else None
+        )
+    return keys
+
+
+async def _plan(request: RenderPlanRequest, keys: list) -> RenderPlan:
+    # Batches group by the intensity actually rendered
+    assignments = {
+        a.character: a.model_copy(update={"emotion": emotion_quantizer.quantize(a.emotion)})
+        for a in request.voice_assignments
+    }
+    return plan_render(
+        request.lines,
+        assignments,
+        keys,
+        cached=await _stored(key for key in keys if key),
+        rtf=_current_rtf(request.engine),
+        window=request.window,
+        batch_size=engines.BATCH_SIZE,
+    )
+
+
+@app.post("/cards")
+async def render_character_cards(request: CardBatchRequest):
+    """
+    Render every character card for a script in one batched pass
+
+    Cards are grouped by voice and rendered through the adapter's batch path;
+    cards already in the audio store are reused.
+
+    Returns: Manifest (JSON), or a zip of `<name>-catchphrase.wav` files plus
+        manifest.json when `archive` is true
+    """
+    adapter = adapters.get(request.engine)
+    if not adapter:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown engine: {request.engine}. Available: {list(adapters.keys())}"
+        )
+
+    keys = [
+        _asset_key(request.engine, card.voice_id, card.text, card.emotion)
+        for card in request.cards
+    ]
+
+    # Voice-grouped render order keeps conditioning hot for sequential adapters too
+    pending = {}
+    order = sorted(
+        range(len(request.cards)),
+        key=lambda i: voice_library.identity(request.cards[i].voice_id)
+    )
+    stored = await _stored(keys)
+    for i in order:
+        card, key = request.cards[i], keys[i]
+        if key not in pending and key not in stored:
+            pending[key] = _synthesis_item(card.text, card.voice_id, card.emotion)
+    errors = await _render_assets(request.engine, adapter, pending)
+
+    cards = []
+    for card, key in zip(request.cards, keys):
+        filename = card_filename(card.character)
+        if key in errors:
+            cards.append(CardAsset(character=card.character, filename=filename, error=errors[key]))
+        else:
+            cards.append(CardAsset(
+                character=card.character, filename=filename, asset_key=key, cached=key not in pending
+            ))
+
+    result = CardBatchResult(
+        cards=cards,
+        rendered=len(pending) - len(errors),
+        reused=sum(1 for card in cards if card.cached),
+    )
+    logger.info(f"Character cards: {result.rendered} rendered, {result.reused} reused, {len(errors)} failed")
+
+    if not request.archive:
+        return result
+    archive = pack_archive(result, await _asset_paths(key for key in keys if key not in errors))
+    return Response(
+        content=archive,
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="character-cards.zip"'}
+    )
+
+
+@app.post("/concat")
+async def concat_assets(request: ConcatRequest):
+    """
+    Stream stored line assets as one gapless WAV (a scene, act or line range)
+
+    Lines are joined with `pause_ms` silence (or per-gap `pauses_ms`). The
+    WAV carries cue markers at each line start; the X-Line-Offsets header
+    lists the same starts in milliseconds.
+
+    Returns: WAV audio stream (audio/wav)
+    """
+    if request.assets is not None:
+        keys = request.assets
+    elif request.script_id:
+        if not SCRIPT_ID_PATTERN.match(request.script_id):
+            raise HTTPException(status_code=400, detail=f"Invalid script id: {request.script_id}")
+        latest = revision_store.latest(request.script_id)
+        if latest is None:
+            raise HTTPException(status_code=404, detail=f"No revision for script: {request.script_id}")
+        keys = latest["keys"][request.start:request.end]
+    else:
+        raise HTTPException(status_code=400, detail="Provide assets or script_id")
+
+    if not keys:
+        raise HTTPException(status_code=400, detail="No lines to concatenate")
+    if request.pauses_ms is not None and len(request.pauses_ms) != len(keys) - 1:
+        raise HTTPException(
+            status_code=400,
+            detail=f"pauses_ms needs {len(keys) - 1} entries, got {len(request.pauses_ms)}"
+        )
+
+    for key in keys:
+        if not ASSET_KEY_PATTERN.match(key):
+            raise HTTPException(status_code=400, detail=f"Invalid asset key: {key}")
+    stored = await _stored(keys)
+    for key in keys:
+        if key not in stored:
+            raise HTTPException(status_code=404, detail=f"Asset not found: {key}")
+
+    infos = []
+    paths = await _asset_paths(keys)
+    for key in keys:
+        try:
+            infos.append(read_wav_info(paths[key]))
+        except ValueError:
+            raise HTTPException(status_code=422, detail=f"Asset is not a PCM WAV: {key}")
+
+    try:
+        plan = plan_concat(
+            infos,
+            labels=[f"line {i}" for i in range(len(keys))],
+            pauses_ms=request.pauses_ms or [request.pause_ms] * (len(keys) - 1),
+            lead_in_ms=request.lead_in_ms
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    return StreamingResponse(
+        stream_concat(plan),
+        media_type="audio/wav",
+        headers={
+            "Content-Length": str(plan.content_length),
+            "X-Line-Offsets": ",".join(str(ms) for ms in plan.offsets_ms),
+        }
+    )
+
+
+async def _stored(keys) -> Set[str]:
+    """Asset keys already rendered, looked up off the event loop (the shared store may be remote)"""
+    return await asyncio.get_running_loop().run_in_executor(None, audio_store.stored, list(keys))
+
+
+async def _asset_paths(keys) -> Dict[str, str]:
+    """Local file per asset key, off the event loop (shared-store assets are downloaded first)"""
+    keys = list(keys)
+    return await asyncio.get_running_loop().run_in_executor(
+        None, lambda: {key: audio_store.path(key) for key in keys}
+    )
+
+
+def _asset_key(engine: str, voice_id: str, text: str, emotion: EmotionParams) -> str:
+    """
+    Audio store key for a line
+
+    The voice is resolved to its content identity, the text normalized and
+    the emotion quantized, so cosmetic variants of a line ("NARRATOR ONE" /
+    "Narrator One", intensity 0.62 / 0.65) share one render.
+    """
+    return asset_key(
+        engine,
+        voice_library.identity(voice_id),
+        text_normalizer.normalize(text),
+        emotion_quantizer.quantize(emotion),
+        settings=post_processing.tag()
+    )
+
+
+def _synthesis_item(text: str, voice_id: str, emotion: EmotionParams) -> SynthesisItem:
+    """Render request for a line: normalized text and quantized emotion, with its generation budget"""
+    text = text_normalizer.normalize(text)
+    return SynthesisItem(
+        text=text,
+        voice_id=voice_id,
+        emotion=emotion_quantizer.quantize(emotion),
+        max_duration=duration_budget(text, factor=DURATION_BUDGET_FACTOR)
+    )
+
+
+def _observe_rtf(engine: str, elapsed: float, audio_seconds: float, voice_id: str = None) -> None:
+    """Record a real-time factor sample (render seconds per audio second), per engine and voice"""
+    if audio_seconds > 0:
+        metrics.observe("synthesis_rtf", elapsed / audio_seconds, engine=engine)
+        if voice_id is not None:
+            metrics.observe(
+                "voice_rtf", elapsed / audio_seconds, engine=engine, voice=voice_library.identity(voice_id)
+            )
+
+
+def _current_rtf(engine: str, voice_id: str = None) -> float:
+    """Median measured RTF for a voice, else for the engine, or DEFAULT_RTF before any renders"""
+    if voice_id is not None:
+        rtf = metrics.percentile("voice_rtf", 0.5, engine=engine, voice=voice_library.identity(voice_id))
+        if rtf:
+            return rtf
+    return metrics.percentile("synthesis_rtf", 0.5, engine=engine) or DEFAULT_RTF
+
+
+def _estimate_cost(engine: str, texts: list, voice_id: str = None) -> float:
+    """Estimated engine seconds to render normalized `texts` (expected audio length x RTF)"""
+    return sum(expected_seconds(text) for text in texts) * _current_rtf(engine, voice_id)
+
+
+def _render_cost(engine: str, voice_id: str, audio_bytes: bytes) -> float:
+    """Render seconds a stored clip stands for (its length x the voice's measured RTF), for cache eviction"""
+    return wav_seconds(audio_bytes) * _current_rtf(engine, voice_id)
+
+
+async def _synthesize_item(engine: str, adapter, item: SynthesisItem) -> bytes:
+    """Render one line, recording its RTF (render time only, not queue wait; not for clip bank hits)"""
+    start = time.perf_counter()
+    with track_cached_clips() as cached:
+        audio_bytes = await adapter.synthesize(
+            text=item.text,
+            voice_id=item.voice_id,
+            emotion=item.emotion,
+            max_duration=item.max_duration
+        )
+    if not cached:
+        _observe_rtf(engine, time.perf_counter() - start, wav_seconds(audio_bytes), item.voice_id)
+    return audio_bytes
+
+
+async def _synthesize_batch(engine: str, adapter, items: list) -> list:
+    """Render several lines in one adapter call, recording the batch RTF (clip bank hits left out)"""
+    start = time.perf_counter()
+    with track_cached_clips() as cached:
+        results = await adapter.synthesize_batch(items)
+    voices = {item.voice_id for item in items}
+    _observe_rtf(
+        engine,
+        time.perf_counter() - start,
+        sum(
+            wav_seconds(audio_bytes) for audio_bytes in results
+            if not any(audio_bytes is clip for clip in cached)
+        ),
+        voices.pop() if len(voices) == 1 else None
+    )
+    return results
+
+
+async def _render_assets(engine: str, adapter, pending: dict) -> dict:
+    """
+    Render and store missing assets (asset key -> SynthesisItem)
+
+    Uses the adapter's batch path; if the batch fails, items are retried one
+    by one so a single bad line does not fail the rest.
+
+    Returns: Error message per asset key that could not be rendered
+    """
+    if not pending:
+        return {}
+
+    queue = inference_queues[engine]
+    start = time.perf_counter()
+    try:
+        items = list(pending.values())
+        results = await queue.run(
+            lambda: _synthesize_batch(engine, adapter, items),
+            cost=sum(_estimate_cost(engine, [item.text], item.voice_id) for item in items)
+        )
+        for (key, item), audio_bytes in zip(pending.items(), results):
+            audio_store.put(key, audio_bytes, cost=_render_cost(engine, item.voice_id, audio_bytes))
+        metrics.observe("revision_render_seconds", time.perf_counter() - start, engine=engine)
+        return {}
+    except Exception as e:
+        logger.warning(f"Batch render failed, retrying lines individually: {e}")
+
+    errors = {}
+    stored = await _stored(pending)
+    for key, item in pending.items():
+        if key in stored:
+            continue
+        try:
+            audio_bytes = await queue.run(
+                lambda: _synthesize_item(engine, adapter, item),
+                cost=_estimate_cost(engine, [item.text], item.voice_id)
+            )
+            audio_store.put(key, audio_bytes, cost=_render_cost(engine, item.voice_id, audio_bytes))
+        except Exception as e:
+            metrics.increment("synthesis_failures", engine=engine)
+            logger.error(f"TTS generation failed: {e}")
+            errors[key] = str(e)
+    metrics.observe("revision_render_seconds", time.perf_counter() - start, engine=engine)
+    return errors
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Service counters and timing summaries (aborts, retries, latency)"""
+    snapshot = metrics.snapshot()
+    cache = text_normalizer.cache_info()
+    snapshot["text_normalizer"] = {"hits": cache.hits, "misses": cache.misses, "size": cache.currsize}
+    snapshot["audio_cache"] = audio_store.stats()
+    snapshot["conditioning_cache"] = {
+        name: adapter.conditioning_cache.stats()
+        for name, adapter in adapters.items()
+        if hasattr(adapter, 'conditioning_cache')
+    }
+    return snapshot
+
+
 @app.get("/voices")
 async def list_voices(engine: str):
     """
     List available voices for a TTS engine
 
     Args:
-        engine: TTS engine name (index-tts, chatterbox)
+        engine: TTS engine name (index-tts, chatterbox, chatterbox-onnx)
 
-    Returns: List of voice info objects
+    Returns: List of voice info objects (served from the in-memory voice index)
     """
     adapter = adapters.get(engine)
     if not adapter:
@@ -160,8 +1071,9 @@ if __name__ == "__main__":
     host = os.getenv('HOST', '0.0.0.0')
 
     uvicorn.run(
-        app,
+        "main:app" if WORKERS > 1 else app,
         host=host,
         port=port,
+        workers=WORKERS,
         log_level=os.getenv('LOG_LEVEL', 'info').lower()
     )
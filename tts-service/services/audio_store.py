@@ -0,0 +1,339 @@
+"""
+Content-addressed audio store
+Rendered WAVs keyed by a hash of everything that determines the audio, cached in memory, on disk and in a shared store
+"""
+
+import hashlib
+import json
+import logging
+import os
+import queue
+import threading
+from typing import Iterable, Optional, Set
+
+from adapters.base import EmotionParams
+from .eviction import WeightedCache
+from .shared_store import SharedStore
+
+logger = logging.getLogger(__name__)
+
+# Bump to invalidate every stored asset (e.g. after a change to rendering)
+ASSET_VERSION = 1
+
+# 24 kHz 16-bit mono PCM: estimates a clip's length (and so its render time) from its size
+WAV_BYTES_PER_SECOND = 48000
+WAV_HEADER_BYTES = 44
+
+
+def asset_key(engine: str, voice: str, text: str, emotion: EmotionParams, settings: str = "") -> str:
+    """
+    Key for one rendered line
+
+    Args:
+        engine: TTS engine name
+        voice: Voice identity (reference digest + preprocessing tag, or the raw voice id)
+        text: Line text
+        emotion: Emotion parameters
+        settings: Tag of output settings that change the audio (post-processing)
+
+    Returns:
+        40-char hex digest
+    """
+    payload = json.dumps(
+        {
+            "v": ASSET_VERSION,
+            "engine": engine,
+            "voice": voice,
+            "text": text,
+            "emotion": emotion.model_dump(),
+            "settings": settings,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class AudioStore:
+    """
+    Tiered WAV cache by asset key
+
+    Hot clips live in an in-process cache (`memory_bytes`), warm clips as
+    files under `root/<key[:2]>/<key>.wav` (atomic writes), and cold clips in
+    an optional shared store used by every node. Reads fall through the
+    tiers and promote what they find into the faster ones; writes go to
+    memory and disk at once and to the shared store from a background
+    thread (write-behind), so a render never waits on the network.
+
+    The memory tier, and the disk tier when `disk_bytes` is set, evict by
+    `policy` (see services.eviction): with "gdsf" a clip's recorded render
+    time weighs against its size and use count.
+    """
+
+    TIERS = ("memory", "disk", "shared")
+
+    def __init__(
+        self,
+        root: str,
+        memory_bytes: int = 0,
+        shared: Optional[SharedStore] = None,
+        disk_bytes: int = 0,
+        policy: str = "gdsf",
+        default_rtf: float = 1.0,
+        trace_path: Optional[str] = None
+    ):
+        """
+        Args:
+            root: Local disk tier directory
+            memory_bytes: In-process cache capacity (0 = no memory tier)
+            shared: Cold tier shared between nodes (None = local only)
+            disk_bytes: Disk tier budget (0 = unbounded, nothing is deleted)
+            policy: Eviction policy for memory and disk ("lru" or "gdsf")
+            default_rtf: Render seconds per audio second assumed for clips
+                whose render time was not recorded (found on disk or shared)
+            trace_path: Append every get/put as JSON lines, for cache_replay.py
+        """
+        self.root = root
+        self.shared = shared
+        self.default_rtf = default_rtf
+        os.makedirs(root, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._memory: WeightedCache[str, bytes] = WeightedCache(memory_bytes, policy)
+        self._disk: Optional[WeightedCache[str, bool]] = WeightedCache(disk_bytes, policy) if disk_bytes else None
+        self._hits = {tier: 0 for tier in self.TIERS}
+        self._misses = {tier: 0 for tier in self.TIERS}
+
+        self._uploads: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._uploading: Set[str] = set()
+        self._pending_deletes: Set[str] = set()  # Evicted while uploading: deleted once uploaded
+        self._uploader: Optional[threading.Thread] = None
+        self._upload_failures = 0
+
+        self._trace = open(trace_path, 'a', buffering=1) if trace_path else None
+        if self._disk is not None:
+            self._index_disk()
+
+    def path(self, key: str) -> str:
+        """
+        Local file path for an asset key
+
+        An asset held only by the shared store is downloaded first, so the
+        path can be opened directly (concat, archives).
+        """
+        path = self._disk_path(key)
+        if self.shared is not None and not os.path.exists(path):
+            data = self._shared_get(key)
+            if data is not None:
+                self._store_disk(key, data, self._estimated_cost(len(data)))
+        return path
+
+    def contains(self, key: str) -> bool:
+        """Whether the asset has been rendered (in any tier; may query the shared store)"""
+        if key in self._memory or os.path.exists(self._disk_path(key)):
+            return True
+        return self.shared is not None and self._shared_contains(key)
+
+    def stored(self, keys: Iterable[str]) -> Set[str]:
+        """Those of `keys` that have been rendered (in any tier)"""
+        return {key for key in keys if self.contains(key)}
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Stored WAV bytes (read through the tiers, promoting hits), or None"""
+        data = self._memory.get(key)
+        self._count("memory", data is not None)
+        if data is not None:
+            self._record("get", key, len(data), self._memory.cost(key))
+            return data
+
+        try:
+            with open(self._disk_path(key), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            data = None
+        self._count("disk", data is not None)
+        if data is not None:
+            cost = self._disk_cost(key, len(data))
+            if self._disk is not None:
+                self._drop(self._disk.touch(key, True, len(data), cost))
+            self._memory.put(key, data, len(data), cost)
+            self._record("get", key, len(data), cost)
+            return data
+
+        data = self._shared_get(key) if self.shared is not None else None
+        if self.shared is not None:
+            self._count("shared", data is not None)
+        if data is None:
+            self._record("get", key)
+            return None
+        cost = self._estimated_cost(len(data))
+        self._store_disk(key, data, cost)
+        self._memory.put(key, data, len(data), cost)
+        self._record("get", key, len(data), cost)
+        return data
+
+    def put(self, key: str, data: bytes, cost: Optional[float] = None) -> str:
+        """
+        Store WAV bytes in memory and on disk; the shared store is written behind
+
+        Args:
+            cost: Seconds the render took (weighs eviction; estimated if None)
+
+        Returns:
+            Path of the stored asset
+        """
+        if cost is None:
+            cost = self._estimated_cost(len(data))
+        path = self._store_disk(key, data, cost)
+        self._memory.put(key, data, len(data), cost)
+        self._record("put", key, len(data), cost)
+        if self.shared is not None:
+            self._queue_upload(key)
+        return path
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Finish pending shared-store uploads and stop the uploader (call on shutdown)"""
+        if self._uploader is None:
+            return
+        self._uploads.put(None)
+        self._uploader.join(timeout)
+        self._uploader = None
+
+    def stats(self) -> dict:
+        """Per-tier hit rates; eviction statistics for bounded tiers; upload backlog"""
+        with self._lock:
+            tiers = {}
+            for tier in self.TIERS:
+                hits, misses = self._hits[tier], self._misses[tier]
+                tiers[tier] = {
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+                }
+            upload_backlog, upload_failures = len(self._uploading), self._upload_failures
+
+        for tier, cache in (("memory", self._memory), ("disk", self._disk)):
+            if cache is not None:
+                tiers[tier]["eviction"] = {
+                    name: value for name, value in cache.stats().items() if name not in ("hits", "misses", "hit_rate")
+                }
+        if self.shared is None:
+            del tiers["shared"]
+        else:
+            tiers["shared"].update(
+                store=self.shared.name,
+                upload_backlog=upload_backlog,
+                upload_failures=upload_failures,
+            )
+        return tiers
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.wav")
+
+    def _estimated_cost(self, size: int) -> float:
+        return max(0, size - WAV_HEADER_BYTES) / WAV_BYTES_PER_SECOND * self.default_rtf
+
+    def _disk_cost(self, key: str, size: int) -> float:
+        """Recorded render time of a disk clip, else estimated from its length"""
+        cost = self._disk.cost(key) if self._disk is not None else None
+        return cost if cost is not None else self._memory.cost(key) or self._estimated_cost(size)
+
+    def _store_disk(self, key: str, data: bytes, cost: float) -> str:
+        path = self._disk_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        if self._disk is not None:
+            self._drop(self._disk.put(key, True, len(data), cost))
+        return path
+
+    def _index_disk(self) -> None:
+        """Index existing disk clips (render time estimated) and trim to the budget"""
+        found = []
+        for shard in os.scandir(self.root):
+            if not shard.is_dir():
+                continue
+            for item in os.scandir(shard.path):
+                if item.name.endswith(".wav"):
+                    stat = item.stat()
+                    found.append((stat.st_mtime, item.name[:-len(".wav")], stat.st_size))
+        # Oldest first, so a budget smaller than the tree keeps the newest clips
+        for _, key, size in sorted(found):
+            self._drop(self._disk.put(key, True, size, self._estimated_cost(size)))
+        logger.info(f"Audio disk tier: {len(self._disk)} clips, {self._disk.used / 1e6:.0f} MB")
+
+    def _drop(self, evicted) -> None:
+        """Delete disk clips evicted from the disk tier (once uploaded, if shared)"""
+        for key in evicted:
+            with self._lock:
+                if key in self._uploading:
+                    self._pending_deletes.add(key)
+                    continue
+            try:
+                os.remove(self._disk_path(key))
+            except FileNotFoundError:
+                pass
+
+    def _count(self, tier: str, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self._hits[tier] += 1
+            else:
+                self._misses[tier] += 1
+
+    def _record(self, op: str, key: str, size: Optional[int] = None, cost: Optional[float] = None) -> None:
+        """Trace one access for offline policy comparison"""
+        if self._trace is None:
+            return
+        event = {"op": op, "key": key}
+        if size is not None:
+            event.update(size=size, cost=round(cost or 0.0, 4))
+        with self._lock:
+            self._trace.write(json.dumps(event) + "\n")
+
+    def _shared_get(self, key: str) -> Optional[bytes]:
+        try:
+            return self.shared.get(key)
+        except Exception as e:
+            logger.warning(f"Shared audio store read failed for {key}: {e}")
+            return None
+
+    def _shared_contains(self, key: str) -> bool:
+        try:
+            return self.shared.contains(key)
+        except Exception as e:
+            logger.warning(f"Shared audio store lookup failed for {key}: {e}")
+            return False
+
+    def _queue_upload(self, key: str) -> None:
+        with self._lock:
+            if key in self._uploading:
+                return
+            self._uploading.add(key)
+            if self._uploader is None:
+                self._uploader = threading.Thread(target=self._upload_loop, name="audio-upload", daemon=True)
+                self._uploader.start()
+        self._uploads.put(key)
+
+    def _upload_loop(self) -> None:
+        """Background thread: copy stored assets to the shared store"""
+        while True:
+            key = self._uploads.get()
+            if key is None:
+                return
+            try:
+                with open(self._disk_path(key), 'rb') as f:
+                    self.shared.put(key, f.read())
+            except Exception as e:
+                with self._lock:
+                    self._upload_failures += 1
+                logger.warning(f"Shared audio store upload failed for {key}: {e}")
+            finally:
+                with self._lock:
+                    self._uploading.discard(key)
+                    evicted = key in self._pending_deletes
+                    self._pending_deletes.discard(key)
+                # Unless the clip was stored again since it was evicted
+                if evicted and key not in self._disk:
+                    self._drop([key])
@@ -0,0 +1,272 @@
+"""
+Autotuning
+Benchmarks inference settings on this host and persists the fastest profile per host fingerprint
+"""
+
+import asyncio
+import gc
+import threading
+import hashlib
+import json
+import logging
+import os
+import platform
+import time
+from typing import Callable, Dict, List, Optional
+
+import torch
+from pydantic import BaseModel
+
+from adapters.base import EmotionParams, SynthesisItem, TTSAdapter
+from .duration_budget import duration_budget
+from .post_processing import wav_seconds
+
+logger = logging.getLogger(__name__)
+
+# Stub script lines timed for every candidate (none short enough for the clip bank)
+TUNE_LINES = [
+    "We need to get to the roof before they break through the door.",
+    "Rule number one: always check the back seat.",
+    "I told you this was a terrible idea, and nobody ever listens to me.",
+    "Grab the flashlight and whatever food you can carry.",
+    "If we split up now, we will never find each other again.",
+    "Stay quiet. They follow the sound.",
+    "Is anyone else hearing that scratching in the walls?",
+    "Makes sense, but I still think we should run.",
+]
+
+
+class TuneSettings(BaseModel):
+    """One candidate configuration"""
+    intra_op_threads: Optional[int] = None   # None = torch default (CUDA: unused)
+    batch_size: int = 8
+    dtype: str = "fp32"                      # CPU: fp32 | int8; CUDA: fp32 | fp16 | bf16
+
+
+class TuneTrial(BaseModel):
+    """Measured real-time factor of a candidate"""
+    settings: TuneSettings
+    rtf: float
+
+
+class TuneProfile(BaseModel):
+    """Winning settings for a host"""
+    fingerprint: str
+    host: Dict[str, str]
+    engine: str
+    device: str
+    settings: TuneSettings
+    rtf: float
+    tuned_at: float
+    trials: List[TuneTrial]
+
+
+def host_fingerprint(device: str) -> tuple:
+    """
+    Identify the hardware/software combination a profile is valid for
+
+    Returns:
+        (fingerprint, host description)
+    """
+    cpu = platform.processor() or platform.machine()
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    cpu = line.split(":", 1)[1].strip()
+                    break
+    except OSError:
+        pass
+
+    host = {
+        "cpu": cpu,
+        "cpus": str(os.cpu_count()),
+        "torch": torch.__version__,
+        "device": device,
+    }
+    if device.startswith("cuda") and torch.cuda.is_available():
+        host["gpu"] = torch.cuda.get_device_name(0)
+    payload = json.dumps(host, sort_keys=True).encode()
+    return hashlib.sha1(payload).hexdigest()[:12], host
+
+
+def candidate_settings(device: str) -> Dict[str, list]:
+    """Values tried for each setting on this device"""
+    if device.startswith("cuda"):
+        dtypes = ["fp32", "fp16"]
+        if torch.cuda.is_available() and torch.cuda.is_bf16_supported():
+            dtypes.append("bf16")
+        return {"dtype": dtypes, "intra_op_threads": [None], "batch_size": [1, 4, 8, 16]}
+
+    cores = os.cpu_count() or 1
+    threads = sorted({max(1, cores // 4), max(1, cores // 2), cores})
+    return {"dtype": ["int8", "fp32"], "intra_op_threads": threads, "batch_size": [1, 4, 8]}
+
+
+class ProfileStore:
+    """Tuned profiles by host fingerprint, in one JSON file"""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: JSON file (created on first save)
+        """
+        self.path = path
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def load(self, fingerprint: str) -> Optional[TuneProfile]:
+        """Saved profile for a host, if any"""
+        data = self._read().get(fingerprint)
+        return TuneProfile(**data) if data else None
+
+    def save(self, profile: TuneProfile) -> None:
+        """Store (or replace) a host's profile"""
+        data = self._read()
+        data[profile.fingerprint] = profile.model_dump()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+async def _measure(adapter: TTSAdapter, settings: TuneSettings, voice_id: str, lines: List[str]) -> float:
+    """Real-time factor of one pass over `lines` with `settings` applied at runtime"""
+    if settings.intra_op_threads:
+        torch.set_num_threads(settings.intra_op_threads)
+    if hasattr(adapter, "max_batch_size"):
+        adapter.max_batch_size = settings.batch_size
+
+    emotion = EmotionParams(intensity=0.5, valence="neutral")
+    items = [
+        SynthesisItem(text=text, voice_id=voice_id, emotion=emotion, max_duration=duration_budget(text))
+        for text in lines
+    ]
+    start = time.perf_counter()
+    wavs = await adapter.synthesize_batch(items)
+    elapsed = time.perf_counter() - start
+    audio = sum(wav_seconds(wav) for wav in wavs)
+    return elapsed / audio if audio > 0 else float("inf")
+
+
+def _run_in_own_loop(coroutine) -> float:
+    """
+    Run a coroutine to completion on a fresh event loop in a helper thread
+
+    `tune` is reached synchronously from module import (AUTOTUNE=startup),
+    which under uvicorn with several workers happens inside a running loop,
+    where `asyncio.run` refuses to start.
+    """
+    result = {}
+
+    def run():
+        try:
+            result["value"] = asyncio.run(coroutine)
+        except BaseException as e:
+            result["error"] = e
+
+    thread = threading.Thread(target=run, name="autotune", daemon=True)
+    thread.start()
+    thread.join()
+    if "error" in result:
+        raise result["error"]
+    return result["value"]
+
+
+def tune(
+    build: Callable[[TuneSettings], TTSAdapter],
+    engine: str,
+    device: str,
+    voice_id: str,
+    lines: Optional[List[str]] = None
+) -> TuneProfile:
+    """
+    Find the fastest settings for this host
+
+    A full grid would reload the model for every combination, so the search
+    is coordinate-wise: dtype first (one model load each, at default threads
+    and batch size), then intra-op threads and batch size on the winning
+    model, which can change at runtime. Candidates are compared by
+    real-time factor over the same stub lines.
+
+    Args:
+        build: Loads the engine with a candidate's load-time settings (dtype, threads)
+        engine: Engine name recorded in the profile
+        device: 'cuda:0' or 'cpu'
+        voice_id: Reference voice used for every candidate
+        lines: Texts to time (default TUNE_LINES)
+
+    Returns:
+        Profile with the winning settings and every trial
+    """
+    lines = lines or TUNE_LINES
+    candidates = candidate_settings(device)
+    fingerprint, host = host_fingerprint(device)
+    trials: List[TuneTrial] = []
+    default_threads = candidates["intra_op_threads"][-1]
+    default_batch = candidates["batch_size"][-1]
+
+    def trial(adapter: TTSAdapter, settings: TuneSettings) -> float:
+        rtf = _run_in_own_loop(_measure(adapter, settings, voice_id, lines))
+        trials.append(TuneTrial(settings=settings, rtf=round(rtf, 4)))
+        logger.info(f"Autotune {engine}: {settings.model_dump()} -> RTF {rtf:.3f}")
+        return rtf
+
+    best_adapter, best, best_rtf = None, None, float("inf")
+    for dtype in candidates["dtype"]:
+        settings = TuneSettings(intra_op_threads=default_threads, batch_size=default_batch, dtype=dtype)
+        adapter = None
+        try:
+            adapter = build(settings)
+            adapter.warmup()
+            rtf = trial(adapter, settings)
+        except Exception as e:
+            logger.warning(f"Autotune {engine}: dtype {dtype} failed: {e}")
+            rtf = float("inf")
+        # A discarded candidate is released first: shared services (the voice
+        # library's conditioning hook) would otherwise keep its weights alive
+        if adapter is not None and rtf < best_rtf:
+            if best_adapter is not None:
+                best_adapter.release()
+            best_adapter, best, best_rtf = adapter, settings, rtf
+        elif adapter is not None:
+            adapter.release()
+        del adapter
+        gc.collect()
+    if best is None:
+        raise RuntimeError(f"Autotune {engine}: no candidate completed")
+
+    for field in ("intra_op_threads", "batch_size"):
+        for value in candidates[field]:
+            if value == getattr(best, field):
+                continue
+            settings = best.model_copy(update={field: value})
+            try:
+                rtf = trial(best_adapter, settings)
+            except Exception as e:
+                # e.g. out of memory at a large batch: skip the value, keep tuning
+                logger.warning(f"Autotune {engine}: {field}={value} failed: {e}")
+                continue
+            if rtf < best_rtf:
+                best, best_rtf = settings, rtf
+
+    best_adapter.release()
+    del best_adapter
+    gc.collect()
+    logger.info(f"Autotune {engine}: best {best.model_dump()} (RTF {best_rtf:.3f})")
+    return TuneProfile(
+        fingerprint=fingerprint,
+        host=host,
+        engine=engine,
+        device=device,
+        settings=best,
+        rtf=round(best_rtf, 4),
+        tuned_at=time.time(),
+        trials=trials,
+    )
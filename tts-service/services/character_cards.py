@@ -0,0 +1,71 @@
+"""
+Character cards
+Request/response models and archive packing for batched catchphrase card renders
+"""
+
+import io
+import json
+import re
+import zipfile
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from adapters.base import EmotionParams
+
+
+class CharacterCard(BaseModel):
+    """One character's card line ("Sam. Who put you in charge?")"""
+    character: str
+    text: str
+    voice_id: str
+    emotion: EmotionParams
+
+
+class CardBatchRequest(BaseModel):
+    """All cards for a script"""
+    engine: str = "chatterbox"
+    cards: List[CharacterCard]
+    archive: bool = False       # True: return a zip of WAVs + manifest.json
+
+
+class CardAsset(BaseModel):
+    """Rendered card (or the reason it failed)"""
+    character: str
+    filename: str
+    asset_key: Optional[str] = None
+    cached: bool = False
+    error: Optional[str] = None
+
+
+class CardBatchResult(BaseModel):
+    """Manifest of a card batch"""
+    cards: List[CardAsset]
+    rendered: int
+    reused: int
+
+
+def card_filename(character: str) -> str:
+    """Same name the backend's CharacterCardAudioService writes: `<name>-catchphrase.wav`"""
+    name = re.sub(r'[^a-z0-9]', '-', character.lower())
+    name = re.sub(r'-+', '-', name).strip('-')
+    return f"{name}-catchphrase.wav"
+
+
+def pack_archive(result: CardBatchResult, paths: dict) -> bytes:
+    """
+    Zip rendered cards with their manifest
+
+    PCM barely deflates, so WAVs are stored uncompressed.
+
+    Args:
+        result: Batch manifest (written as manifest.json)
+        paths: Asset key -> stored WAV path
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_STORED) as archive:
+        archive.writestr('manifest.json', json.dumps(result.model_dump(), indent=2))
+        for card in result.cards:
+            if card.asset_key:
+                archive.write(paths[card.asset_key], arcname=card.filename)
+    return buffer.getvalue()
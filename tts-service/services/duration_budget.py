@@ -0,0 +1,58 @@
+"""
+Duration budget
+Expected speech length for a line, used to cap runaway generations
+"""
+
+
+def estimate_expected_duration(text: str) -> tuple[float, float]:
+    """
+    Estimate expected audio duration based on dialogue text.
+
+    Same word-rate model as the corruption analyzer
+    (throwaway-tests/003-audio-corruption-detection/analyze_audio_enhanced.py).
+
+    Returns (min_duration, max_duration) in seconds.
+
+    Assumptions:
+    - Average speaking rate: 120-180 words/minute (2-3 words/sec)
+    - TTS tends to be slower (pauses, emphasis)
+    - Short lines have overhead (min ~0.5s for even one word)
+    """
+    word_count = len(text.split())
+
+    # Short utterances (1-3 words)
+    if word_count <= 3:
+        # Minimum 0.3s per word, max 2s per word (with pauses/emphasis)
+        min_duration = word_count * 0.3
+        max_duration = word_count * 2.0
+        return (max(min_duration, 0.5), max(max_duration, 1.5))
+
+    # Longer dialogue
+    # TTS speaking rate: ~1.5-3 words/second (slower than human)
+    min_duration = word_count / 3.0  # Fast TTS
+    max_duration = word_count / 1.5  # Slow, dramatic TTS
+
+    # Add buffer for very long monologues (they tend to have more pauses)
+    if word_count > 50:
+        max_duration *= 1.5
+
+    return (min_duration, max_duration)
+
+
+def duration_budget(text: str, factor: float = 2.0, floor: float = 2.0) -> float:
+    """
+    Longest acceptable generation for a line, in seconds
+
+    The analyzer flags clips over 3x the expected maximum as corrupt; the
+    budget stops well before that so repetition loops are cut short.
+
+    Args:
+        text: Line to synthesize
+        factor: Multiple of the expected maximum duration allowed
+        floor: Minimum budget in seconds
+
+    Returns:
+        Budget in seconds
+    """
+    _, max_duration = estimate_expected_duration(text)
+    return max(max_duration * factor, floor)
@@ -0,0 +1,53 @@
+"""
+Emotion quantizer
+Snaps emotion intensity to a few levels so renders and voice conditioning are reused across sessions
+"""
+
+from typing import List, Optional
+
+from adapters.base import EmotionParams
+
+# Default levels for the 0-100 emotion slider (intensity = emotion / 100)
+DEFAULT_LEVELS = [0.0, 0.25, 0.5, 0.75, 1.0]
+
+
+def parse_levels(spec: str) -> List[float]:
+    """Parse EMOTION_LEVELS ("0,0.25,0.5,0.75,1"); empty disables quantization"""
+    return sorted({float(level) for level in spec.split(",") if level.strip()})
+
+
+class EmotionQuantizer:
+    """
+    Maps intensity to the nearest configured level
+
+    The backend's slider yields a slightly different float for nearly every
+    session (0.62, 0.65, 0.7...), so audio keys and conditioning never
+    match. Snapping to a handful of levels makes them match, and each level
+    can be preconditioned per voice.
+    """
+
+    def __init__(self, levels: Optional[List[float]] = None):
+        """
+        Args:
+            levels: Allowed intensities (empty or None = pass through unchanged)
+        """
+        self.levels = sorted(levels or [])
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.levels)
+
+    def snap(self, intensity: float) -> float:
+        """Nearest level (ties go to the lower one)"""
+        if not self.levels:
+            return intensity
+        return min(self.levels, key=lambda level: (abs(level - intensity), level))
+
+    def quantize(self, emotion: EmotionParams) -> EmotionParams:
+        """Emotion with its intensity snapped (valence unchanged)"""
+        if not self.levels:
+            return emotion
+        intensity = self.snap(emotion.intensity)
+        if intensity == emotion.intensity:
+            return emotion
+        return emotion.model_copy(update={"intensity": intensity})
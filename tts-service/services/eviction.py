@@ -0,0 +1,223 @@
+"""
+Cache eviction
+Size-bounded caches with LRU or cost-aware (GreedyDual-Size-Frequency) eviction, and the statistics to compare them
+"""
+
+import heapq
+import itertools
+import threading
+from typing import Any, Dict, Generic, Hashable, List, Optional, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+POLICIES = ("lru", "gdsf")
+
+
+class _Entry:
+    __slots__ = ("value", "size", "cost", "frequency", "priority", "seq")
+
+    def __init__(self, value: Any, size: int, cost: float):
+        self.value = value
+        self.size = size
+        self.cost = cost
+        self.frequency = 0
+        self.priority = 0.0
+        self.seq = 0
+
+
+class WeightedCache(Generic[K, V]):
+    """
+    Thread-safe cache bounded by total entry size
+
+    Each entry carries its size and cost (seconds to recompute it). When an
+    insert overflows `capacity`, entries are evicted lowest priority first:
+
+    - lru: priority is the time of last access
+    - gdsf: priority is `clock + frequency x cost / size`, and the clock rises
+      to each evicted priority. Expensive, small and often used entries stay;
+      a 40-second monologue render outlives "Yes." even if it was used less
+      recently, and entries that stop being used age out as the clock moves.
+
+    Statistics report the hit rate, the byte hit rate (bytes served from the
+    cache over bytes served plus bytes inserted on misses) and the recompute
+    seconds saved by hits, so policies can be compared on the same traffic.
+    """
+
+    def __init__(self, capacity: int, policy: str = "gdsf"):
+        """
+        Args:
+            capacity: Most total size held (bytes, or entries with size 1)
+            policy: "lru" or "gdsf"
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown eviction policy: {policy} (expected one of {', '.join(POLICIES)})")
+        self.capacity = capacity
+        self.policy = policy
+        self._entries: Dict[K, _Entry] = {}
+        self._heap: List[Tuple[float, int, K]] = []
+        self._ticks = itertools.count(1)
+        self._clock = 0.0
+        self._used = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.bytes_hit = 0
+        self.bytes_inserted = 0
+        self.seconds_saved = 0.0
+        self.evictions = 0
+        self.seconds_evicted = 0.0
+
+    def __contains__(self, key: K) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def used(self) -> int:
+        """Total size of cached entries"""
+        return self._used
+
+    def get(self, key: K) -> Optional[V]:
+        """Cached value (counted as a hit or miss), or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._hit(key, entry)
+            return entry.value
+
+    def cost(self, key: K) -> Optional[float]:
+        """Recorded cost of a cached entry (not counted as an access)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry.cost if entry else None
+
+    def touch(self, key: K, value: V, size: int, cost: float) -> List[K]:
+        """
+        Count a hit on an item held outside the cache, adopting it if unknown
+
+        Used for the disk tier: a file written by another process is a hit
+        here, even though this process has not indexed it yet.
+
+        Returns:
+            Evicted keys
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._hit(key, entry)
+                return []
+            evicted = self._insert(key, value, size, cost)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                self.bytes_hit += entry.size
+                self.seconds_saved += entry.cost
+            return evicted
+
+    def put(self, key: K, value: V, size: int, cost: float) -> List[K]:
+        """
+        Insert or replace an entry, evicting as needed
+
+        Entries larger than the whole capacity are not cached.
+
+        Args:
+            size: Entry size in the capacity's unit
+            cost: Seconds it took (or would take) to produce the value
+
+        Returns:
+            Evicted keys (the caller drops anything it keeps outside the cache)
+        """
+        with self._lock:
+            self.bytes_inserted += size
+            return self._insert(key, value, size, cost)
+
+    def pop(self, key: K) -> Optional[V]:
+        """Remove an entry without counting an eviction"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            self._used -= entry.size
+            return entry.value
+
+    def stats(self) -> Dict[str, Any]:
+        """Policy, occupancy, hit rate, byte hit rate and seconds saved"""
+        with self._lock:
+            requests = self.hits + self.misses
+            served = self.bytes_hit + self.bytes_inserted
+            return {
+                "policy": self.policy,
+                "entries": len(self._entries),
+                "used": self._used,
+                "capacity": self.capacity,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / requests, 3) if requests else None,
+                "byte_hit_rate": round(self.bytes_hit / served, 3) if served else None,
+                "seconds_saved": round(self.seconds_saved, 1),
+                "evictions": self.evictions,
+                "seconds_evicted": round(self.seconds_evicted, 1),
+            }
+
+    def _hit(self, key: K, entry: _Entry) -> None:
+        self.hits += 1
+        self.bytes_hit += entry.size
+        self.seconds_saved += entry.cost
+        self._reprioritize(key, entry)
+
+    def _insert(self, key: K, value: V, size: int, cost: float) -> List[K]:
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._used -= previous.size
+        if size > self.capacity:
+            return []
+
+        entry = _Entry(value, size, cost)
+        entry.frequency = previous.frequency if previous else 0
+        self._entries[key] = entry
+        self._used += size
+        self._reprioritize(key, entry)
+
+        evicted = []
+        kept = None
+        while self._used > self.capacity and self._heap:
+            priority, seq, victim = heapq.heappop(self._heap)
+            candidate = self._entries.get(victim)
+            if candidate is None or candidate.seq != seq:
+                continue    # Stale heap item (re-prioritized or removed)
+            if victim == key:
+                # The entry being inserted is always admitted
+                kept = (priority, seq, victim)
+                continue
+            del self._entries[victim]
+            self._used -= candidate.size
+            self.evictions += 1
+            self.seconds_evicted += candidate.cost
+            if self.policy == "gdsf":
+                self._clock = max(self._clock, priority)
+            evicted.append(victim)
+        if kept is not None:
+            heapq.heappush(self._heap, kept)
+
+        # Lazy deletion leaves stale items behind; rebuild before the heap balloons
+        if len(self._heap) > 4 * len(self._entries) + 64:
+            self._heap = [
+                (e.priority, e.seq, k) for k, e in self._entries.items()
+            ]
+            heapq.heapify(self._heap)
+        return evicted
+
+    def _reprioritize(self, key: K, entry: _Entry) -> None:
+        entry.frequency += 1
+        entry.seq = next(self._ticks)
+        if self.policy == "lru":
+            entry.priority = float(entry.seq)
+        else:
+            entry.priority = self._clock + entry.frequency * entry.cost / max(entry.size, 1)
+        heapq.heappush(self._heap, (entry.priority, entry.seq, key))
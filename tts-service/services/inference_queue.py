@@ -0,0 +1,154 @@
+"""
+Inference queue
+Per-engine admission and shortest-job-first scheduling of synthesis work, with expected-wait estimates
+"""
+
+import asyncio
+import itertools
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+
+class SynthesisEstimate(BaseModel):
+    """Server-side expected completion time for a synthesis request"""
+    cached: bool = False                # Served from the audio store (no render)
+    queue_seconds: float = 0.0          # Expected wait before rendering starts
+    render_seconds: float = 0.0         # Expected render time (expected audio x RTF)
+    expected_seconds: float = 0.0
+    queued: int = 0                     # Requests ahead (queued + running)
+    suggested_timeout_seconds: float
+
+
+class QueueFull(Exception):
+    """Raised when a request's estimated completion exceeds the admission budget"""
+
+    def __init__(self, expected_seconds: float, budget_seconds: float):
+        super().__init__(
+            f"Estimated completion {expected_seconds:.1f}s exceeds the {budget_seconds:.0f}s budget"
+        )
+        self.expected_seconds = expected_seconds
+        self.budget_seconds = budget_seconds
+
+
+class _Waiter:
+    __slots__ = ("cost", "enqueued", "future")
+
+    def __init__(self, cost: float, future: asyncio.Future):
+        self.cost = cost
+        self.enqueued = time.monotonic()
+        self.future = future
+
+
+class InferenceQueue:
+    """
+    Shortest-job-first gate in front of one engine
+
+    Requests wait here (not on the model lock), so a request whose client
+    disconnects while queued is simply dropped: cancelling the waiting task
+    removes it before it ever reaches the model. Each entry carries an
+    estimated cost in seconds. When a slot frees, the waiter with the lowest
+    `cost - aging * seconds_waited` runs next (ties in arrival order), so
+    "Help!" overtakes a queued monologue, but a long line that has waited
+    long enough can no longer be overtaken.
+    """
+
+    def __init__(self, concurrency: int = 1, aging: float = 1.0, budget: float = 0.0):
+        """
+        Args:
+            concurrency: Syntheses allowed to run at once (1 = model is serialized)
+            aging: Seconds of priority gained per second waited (0 = pure SJF)
+            budget: Reject work expected to finish later than this many seconds (0 = never)
+        """
+        self.aging = aging
+        self.budget = budget
+        self._free = concurrency
+        self._tickets = itertools.count()
+        self._waiting: Dict[int, _Waiter] = {}
+        self._running: Dict[int, Tuple[float, float]] = {}   # ticket -> (cost, started)
+
+    def __len__(self) -> int:
+        return len(self._waiting) + len(self._running)
+
+    def _priority(self, waiter: _Waiter, now: float) -> float:
+        return waiter.cost - self.aging * (now - waiter.enqueued)
+
+    def expected_wait(self, cost: Optional[float] = None) -> float:
+        """
+        Seconds until newly queued work would start (estimated)
+
+        Args:
+            cost: Estimated cost of the new work; only waiters that would be
+                scheduled ahead of it count (None = every waiter)
+        """
+        now = time.monotonic()
+        running = sum(max(0.0, c - (now - started)) for c, started in self._running.values())
+        ahead = sum(
+            waiter.cost for waiter in self._waiting.values()
+            if cost is None or self._priority(waiter, now) <= cost
+        )
+        if not self._free or self._waiting:
+            return running + ahead
+        return 0.0
+
+    def admit(self, cost: float) -> float:
+        """
+        Check a request against the admission budget
+
+        Returns:
+            Expected queue wait in seconds
+
+        Raises:
+            QueueFull: If wait + cost exceeds the budget
+        """
+        wait = self.expected_wait(cost)
+        if self.budget and wait + cost > self.budget:
+            raise QueueFull(wait + cost, self.budget)
+        return wait
+
+    def _dispatch(self) -> None:
+        now = time.monotonic()
+        while self._free > 0 and self._waiting:
+            ticket = min(self._waiting, key=lambda t: (self._priority(self._waiting[t], now), t))
+            waiter = self._waiting.pop(ticket)
+            self._free -= 1
+            waiter.future.set_result(None)
+
+    def _release(self) -> None:
+        self._free += 1
+        self._dispatch()
+
+    async def run(self, work: Callable[[], Awaitable[T]], cost: float) -> T:
+        """
+        Wait for a slot (shortest estimated job first), then run `work()`
+
+        Args:
+            work: Coroutine factory performing the synthesis
+            cost: Estimated seconds of engine time
+
+        Returns:
+            Result of `work()`
+        """
+        ticket = next(self._tickets)
+        if self._free > 0 and not self._waiting:
+            self._free -= 1
+        else:
+            waiter = _Waiter(cost, asyncio.get_running_loop().create_future())
+            self._waiting[ticket] = waiter
+            try:
+                await waiter.future
+            except asyncio.CancelledError:
+                if self._waiting.pop(ticket, None) is None:
+                    # Granted a slot in the same tick it was cancelled
+                    self._release()
+                raise
+
+        self._running[ticket] = (cost, time.monotonic())
+        try:
+            return await work()
+        finally:
+            del self._running[ticket]
+            self._release()
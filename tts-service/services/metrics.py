@@ -0,0 +1,93 @@
+"""
+Service metrics
+In-process counters and timing summaries, exposed at GET /metrics
+"""
+
+import threading
+from collections import defaultdict, deque
+from typing import Deque, Dict, Optional
+
+# Recent samples kept per timing series (for percentiles)
+WINDOW = 512
+
+
+def _series(name: str, labels: dict) -> str:
+    """Series key, e.g. generation_aborts{engine=chatterbox}"""
+    if not labels:
+        return name
+    rendered = ",".join(f"{k}={labels[k]}" for k in sorted(labels))
+    return f"{name}{{{rendered}}}"
+
+
+class _Timing:
+    """Count/sum/max plus a window of recent samples"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent: Deque[float] = deque(maxlen=WINDOW)
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.recent.append(value)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.recent:
+            return None
+        ordered = sorted(self.recent)
+        index = min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))
+        return ordered[index]
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 4) if self.count else None,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "max": self.max,
+        }
+
+
+class Metrics:
+    """Thread-safe registry of counters and timings"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._timings: Dict[str, _Timing] = defaultdict(_Timing)
+
+    def increment(self, name: str, value: float = 1, **labels) -> None:
+        """Add to a counter"""
+        with self._lock:
+            self._counters[_series(name, labels)] += value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Record a timing/size sample"""
+        with self._lock:
+            self._timings[_series(name, labels)].observe(value)
+
+    def counter(self, name: str, **labels) -> float:
+        """Current counter value"""
+        with self._lock:
+            return self._counters.get(_series(name, labels), 0)
+
+    def percentile(self, name: str, q: float, **labels) -> Optional[float]:
+        """Percentile of recent samples for a timing series (None if no samples)"""
+        with self._lock:
+            timing = self._timings.get(_series(name, labels))
+            return timing.percentile(q) if timing else None
+
+    def snapshot(self) -> dict:
+        """All counters and timing summaries"""
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "timings": {key: timing.summary() for key, timing in self._timings.items()},
+            }
+
+
+# Process-wide registry
+metrics = Metrics()
@@ -0,0 +1,123 @@
+"""
+Synthesis post-processing
+Silence trimming, loudness normalization, padding and PCM16 encoding of generated lines
+"""
+
+import asyncio
+import hashlib
+import io
+import json
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from pydantic import BaseModel
+
+# Post-processing and encoding run here so they never block the event loop
+_encoder = ThreadPoolExecutor(max_workers=2, thread_name_prefix="encode")
+
+
+class PostProcessConfig(BaseModel):
+    """Generated line post-processing settings"""
+    enabled: bool = True
+    trim_db: float = 45.0          # Frames this far below the loudest frame are silence
+    silence_dbfs: float = -60.0    # Frames below this are always silence
+    frame_ms: float = 10.0         # Analysis frame for silence detection / gating
+    margin_ms: float = 40.0        # Kept around detected speech (protects breaths, plosives)
+    target_dbfs: float = -18.0     # Gated RMS loudness target
+    peak_dbfs: float = -1.0        # Never exceed this peak after gain
+    pad_ms: float = 0.0            # Fixed silence added at both ends after trimming
+
+    def tag(self) -> str:
+        """Short stable hash identifying these settings (part of audio store keys)"""
+        payload = json.dumps(self.model_dump(), sort_keys=True).encode()
+        return hashlib.sha1(payload).hexdigest()[:8]
+
+
+def post_process(audio: np.ndarray, sample_rate: int, config: PostProcessConfig) -> np.ndarray:
+    """
+    Trim, normalize and pad a generated line
+
+    Frame energies are computed in one reshape; loudness is measured only
+    over frames above the silence threshold (a gated RMS, close to LUFS
+    gating for speech) so pauses inside a line do not pull the gain up.
+
+    Args:
+        audio: Mono waveform (T,) in [-1, 1]
+        sample_rate: Sample rate of `audio`
+        config: Post-processing settings
+
+    Returns:
+        Processed float32 waveform (T',)
+    """
+    audio = np.asarray(audio, dtype=np.float32).reshape(-1)
+    if not config.enabled or audio.size == 0:
+        return audio
+
+    frame = max(1, int(sample_rate * config.frame_ms / 1000))
+    n_frames = audio.size // frame
+    if n_frames > 0:
+        frames = audio[:n_frames * frame].reshape(n_frames, frame)
+        energy = np.mean(frames * frames, axis=1)
+        energy_db = 10 * np.log10(energy + 1e-10)
+        threshold = max(energy_db.max() - config.trim_db, config.silence_dbfs)
+        active = energy_db > threshold
+
+        if active.any():
+            # Trim to the first/last active frame plus margin
+            margin = int(sample_rate * config.margin_ms / 1000)
+            indices = np.flatnonzero(active)
+            start = max(0, indices[0] * frame - margin)
+            end = min(audio.size, (indices[-1] + 1) * frame + margin)
+
+            # Gated RMS normalization with a peak ceiling
+            rms = float(np.sqrt(energy[active].mean()))
+            audio = audio[start:end]
+            peak = float(np.abs(audio).max())
+            if rms > 1e-6 and peak > 1e-6:
+                gain = min(
+                    10 ** (config.target_dbfs / 20) / rms,
+                    10 ** (config.peak_dbfs / 20) / peak,
+                )
+                audio = audio * np.float32(gain)
+
+    if config.pad_ms > 0:
+        pad = np.zeros(int(sample_rate * config.pad_ms / 1000), dtype=np.float32)
+        audio = np.concatenate([pad, audio, pad])
+    return audio
+
+
+def encode_wav(audio: np.ndarray, sample_rate: int) -> bytes:
+    """Mono float waveform → 16-bit PCM WAV bytes"""
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def wav_seconds(data: bytes) -> float:
+    """Duration of PCM WAV bytes in seconds (0.0 if unreadable)"""
+    try:
+        with wave.open(io.BytesIO(data), "rb") as f:
+            return f.getnframes() / f.getframerate()
+    except (wave.Error, EOFError):
+        return 0.0
+
+
+def _render(audio: np.ndarray, sample_rate: int, config: PostProcessConfig) -> bytes:
+    return encode_wav(post_process(audio, sample_rate, config), sample_rate)
+
+
+async def render_wav(audio: np.ndarray, sample_rate: int, config: PostProcessConfig) -> bytes:
+    """
+    Post-process and encode a generated line on the encode worker pool
+
+    Returns:
+        16-bit PCM WAV bytes
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_encoder, _render, audio, sample_rate, config)
@@ -0,0 +1,138 @@
+"""
+Reference audio preprocessing
+Turns raw reference WAVs into clean, engine-rate voice prompts (done once per voice)
+"""
+
+import hashlib
+import json
+import math
+import os
+
+import torch
+import torchaudio
+from pydantic import BaseModel
+
+
+class PreprocessConfig(BaseModel):
+    """Reference prompt preprocessing settings"""
+    max_seconds: float = 10.0      # Chatterbox only conditions on the first 10s
+    trim_db: float = 40.0          # Frames this far below the loudest frame are silence
+    target_dbfs: float = -20.0     # RMS loudness target
+    peak_dbfs: float = -1.0        # Never exceed this peak after gain
+    frame_ms: float = 20.0         # Analysis frame for silence detection
+    margin_ms: float = 60.0        # Kept around detected speech
+
+    def tag(self) -> str:
+        """Short stable hash identifying these settings (used in artifact names)"""
+        payload = json.dumps(self.model_dump(), sort_keys=True).encode()
+        return hashlib.sha1(payload).hexdigest()[:8]
+
+
+def prepare_reference(
+    src_path: str,
+    dst_path: str,
+    sample_rate: int,
+    config: PreprocessConfig
+) -> float:
+    """
+    Resample, trim, normalize and cap a reference WAV, writing a 16-bit mono prompt
+
+    Args:
+        src_path: Raw reference WAV
+        dst_path: Output path for the prepared prompt
+        sample_rate: Engine native sample rate
+        config: Preprocessing settings
+
+    Returns:
+        Duration of the prepared prompt in seconds
+    """
+    audio, source_rate = torchaudio.load(src_path)
+    audio = audio.mean(dim=0, keepdim=True)
+
+    if source_rate != sample_rate:
+        audio = torchaudio.functional.resample(audio, source_rate, sample_rate)
+
+    audio = trim_silence(audio, sample_rate, config.trim_db, config.frame_ms, config.margin_ms)
+
+    max_samples = int(config.max_seconds * sample_rate)
+    if audio.shape[-1] > max_samples:
+        audio = audio[..., :max_samples]
+        # Short fade so the cut does not click
+        fade = min(int(0.02 * sample_rate), max_samples)
+        audio[..., -fade:] *= torch.linspace(1.0, 0.0, fade)
+
+    audio = normalize_loudness(audio, config.target_dbfs, config.peak_dbfs)
+
+    # Write then rename: several worker processes may prepare the same voice
+    tmp_path = f"{dst_path}.{os.getpid()}.tmp"
+    torchaudio.save(
+        tmp_path,
+        audio,
+        sample_rate,
+        format="wav",
+        encoding="PCM_S",
+        bits_per_sample=16
+    )
+    os.replace(tmp_path, dst_path)
+    return audio.shape[-1] / sample_rate
+
+
+def trim_silence(
+    audio: torch.Tensor,
+    sample_rate: int,
+    trim_db: float,
+    frame_ms: float,
+    margin_ms: float
+) -> torch.Tensor:
+    """
+    Drop leading and trailing frames quieter than `trim_db` below the loudest frame
+
+    Args:
+        audio: Mono audio (1, T)
+        sample_rate: Sample rate of `audio`
+        trim_db: Silence threshold relative to the peak frame
+        frame_ms: Analysis frame length
+        margin_ms: Audio kept on either side of detected speech
+
+    Returns:
+        Trimmed audio (1, T')
+    """
+    frame = max(1, int(sample_rate * frame_ms / 1000))
+    n_frames = audio.shape[-1] // frame
+    if n_frames == 0:
+        return audio
+
+    frames = audio[..., :n_frames * frame].reshape(n_frames, frame)
+    energy_db = 10 * torch.log10(frames.pow(2).mean(dim=1) + 1e-10)
+    active = torch.nonzero(energy_db > energy_db.max() - trim_db).flatten()
+    if active.numel() == 0:
+        return audio
+
+    margin = int(sample_rate * margin_ms / 1000)
+    start = max(0, int(active[0]) * frame - margin)
+    end = min(audio.shape[-1], (int(active[-1]) + 1) * frame + margin)
+    return audio[..., start:end]
+
+
+def normalize_loudness(audio: torch.Tensor, target_dbfs: float, peak_dbfs: float) -> torch.Tensor:
+    """
+    Scale audio to a target RMS level without exceeding a peak ceiling
+
+    Args:
+        audio: Audio tensor (C, T)
+        target_dbfs: RMS target in dBFS
+        peak_dbfs: Peak ceiling in dBFS
+
+    Returns:
+        Gain-adjusted audio
+    """
+    rms = audio.pow(2).mean().sqrt().item()
+    peak = audio.abs().max().item()
+    if rms < 1e-6 or peak < 1e-6:
+        return audio
+
+    gain = 10 ** (target_dbfs / 20) / rms
+    gain = min(gain, 10 ** (peak_dbfs / 20) / peak)
+    if math.isclose(gain, 1.0, rel_tol=1e-3):
+        return audio
+    return audio * gain
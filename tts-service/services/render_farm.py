@@ -0,0 +1,519 @@
+"""
+Render farm
+Splits render jobs into line tasks for several service instances, via a shared SQLite broker,
+with voice-affinity assignment and work stealing
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from adapters.base import SynthesisItem
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# (engine, asset key -> item) -> error message per key that failed
+RenderFn = Callable[[str, Dict[str, SynthesisItem]], Awaitable[Dict[str, str]]]
+
+# (asset keys finished, error per failed key) -> None
+ProgressFn = Callable[[List[str], Dict[str, str]], Awaitable[None]]
+
+_COLUMNS = "job_id, asset_key, engine, voice, grp, priority, cost, item"
+
+# Voices remembered per worker as having warm conditioning caches
+WARM_VOICES = 8
+
+
+async def _in_broker(fn, *args):
+    """Run a broker call off the event loop (BEGIN IMMEDIATE can wait out the busy timeout)"""
+    return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+
+class FarmTask(BaseModel):
+    """One line of a render job, as queued on the farm"""
+    job_id: str
+    asset_key: str
+    engine: str
+    voice: str                       # Voice identity (affinity key)
+    group: str                       # Voice + emotion: tasks batched together
+    priority: int                    # Plan order (lower renders first)
+    cost: float                      # Estimated render seconds
+    item: SynthesisItem
+
+
+class FarmWorkerInfo(BaseModel):
+    """A registered worker, as reported by GET /farm"""
+    id: str
+    engines: List[str]
+    warm: List[str]                  # Recently rendered voice identities
+    alive: bool
+    queued: int                      # Tasks assigned and waiting
+    running: int
+    rendered: int
+    stolen: int                      # Tasks taken from other workers' queues
+
+
+class FarmBroker:
+    """
+    Task queue shared by the coordinator and workers (one SQLite file)
+
+    Each queued task has an owner: the worker it was assigned to for voice
+    affinity. A worker takes its own tasks first, then unowned ones, then
+    steals a batch from the back of the most loaded worker's queue. Running
+    tasks of a worker that stops heartbeating are put back in the queue.
+    """
+
+    def __init__(self, path: str, worker_timeout: float = 30.0, affinity_seconds: float = 30.0):
+        """
+        Args:
+            path: SQLite database file (shared by every process on the box)
+            worker_timeout: Seconds without a heartbeat before a worker counts as gone
+            affinity_seconds: Extra queued seconds a warm worker may carry before a
+                voice goes to a colder, less loaded one
+        """
+        self.worker_timeout = worker_timeout
+        self.affinity_seconds = affinity_seconds
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS workers (
+                id TEXT PRIMARY KEY,
+                engines TEXT NOT NULL,
+                warm TEXT NOT NULL DEFAULT '[]',
+                heartbeat REAL NOT NULL,
+                rendered INTEGER NOT NULL DEFAULT 0,
+                stolen INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS tasks (
+                job_id TEXT NOT NULL,
+                asset_key TEXT NOT NULL,
+                engine TEXT NOT NULL,
+                voice TEXT NOT NULL,
+                grp TEXT NOT NULL,
+                priority INTEGER NOT NULL,
+                cost REAL NOT NULL,
+                item TEXT NOT NULL,
+                owner TEXT,
+                state TEXT NOT NULL,
+                error TEXT,
+                updated REAL NOT NULL,
+                PRIMARY KEY (job_id, asset_key)
+            );
+            CREATE INDEX IF NOT EXISTS tasks_queue ON tasks (state, engine, owner, priority);
+        """)
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """Write transaction that holds the database lock from the first read"""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._db
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def register(self, worker_id: str, engines: List[str]) -> None:
+        """Add (or refresh) a worker"""
+        with self._transaction() as db:
+            db.execute(
+                "INSERT INTO workers (id, engines, heartbeat) VALUES (?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET engines = excluded.engines, heartbeat = excluded.heartbeat",
+                (worker_id, json.dumps(engines), time.time()),
+            )
+
+    def heartbeat(self, worker_id: str) -> None:
+        with self._transaction() as db:
+            db.execute("UPDATE workers SET heartbeat = ? WHERE id = ?", (time.time(), worker_id))
+
+    def deregister(self, worker_id: str) -> None:
+        """Remove a worker; its running tasks go back to the queue, its queued ones lose their owner"""
+        with self._transaction() as db:
+            db.execute(
+                "UPDATE tasks SET state = 'queued', owner = NULL, updated = ? "
+                "WHERE owner = ? AND state IN ('queued', 'running')",
+                (time.time(), worker_id),
+            )
+            db.execute("DELETE FROM workers WHERE id = ?", (worker_id,))
+
+    def _live_workers(self, db, engine: Optional[str] = None) -> Dict[str, List[str]]:
+        """Worker id -> warm voices, for workers with a recent heartbeat (serving `engine`)"""
+        rows = db.execute(
+            "SELECT id, engines, warm FROM workers WHERE heartbeat >= ?",
+            (time.time() - self.worker_timeout,),
+        ).fetchall()
+        return {
+            worker_id: json.loads(warm)
+            for worker_id, engines, warm in rows
+            if engine is None or engine in json.loads(engines)
+        }
+
+    def _requeue_stale(self, db) -> None:
+        """Put tasks of workers that stopped heartbeating back in the shared queue"""
+        live = set(self._live_workers(db))
+        stale = db.execute(
+            "SELECT DISTINCT owner FROM tasks WHERE state IN ('queued', 'running') AND owner IS NOT NULL"
+        ).fetchall()
+        for (owner,) in stale:
+            if owner not in live:
+                count = db.execute(
+                    "UPDATE tasks SET state = 'queued', owner = NULL, updated = ? "
+                    "WHERE owner = ? AND state IN ('queued', 'running')",
+                    (time.time(), owner),
+                ).rowcount
+                logger.warning(f"Farm worker {owner} stopped heartbeating; requeued {count} tasks")
+
+    def live_workers(self, engine: Optional[str] = None) -> int:
+        """Number of workers currently serving `engine` (any engine if None)"""
+        with self._lock:
+            return len(self._live_workers(self._db, engine))
+
+    def enqueue(self, tasks: List[FarmTask]) -> None:
+        """
+        Queue a job's tasks, assigning each voice group to a worker
+
+        A group goes to the worker with the least queued work, counting
+        `affinity_seconds` less for workers whose conditioning for the voice
+        is warm. Tasks already queued for the job (a resumed job) are kept.
+        """
+        if not tasks:
+            return
+        with self._transaction() as db:
+            self._requeue_stale(db)
+            engine = tasks[0].engine
+            warm = self._live_workers(db, engine)
+            load = {worker_id: 0.0 for worker_id in warm}
+            for owner, cost in db.execute(
+                "SELECT owner, SUM(cost) FROM tasks WHERE state IN ('queued', 'running') "
+                "AND owner IS NOT NULL GROUP BY owner"
+            ):
+                if owner in load:
+                    load[owner] = cost
+
+            groups: Dict[str, List[FarmTask]] = {}
+            for task in sorted(tasks, key=lambda t: t.priority):
+                groups.setdefault(task.group, []).append(task)
+
+            now = time.time()
+            for group_tasks in groups.values():
+                voice = group_tasks[0].voice
+                owner = min(
+                    load,
+                    key=lambda w: load[w] - (self.affinity_seconds if voice in warm[w] else 0.0),
+                    default=None,
+                )
+                if owner is not None:
+                    load[owner] += sum(task.cost for task in group_tasks)
+                    if voice not in warm[owner]:
+                        warm[owner].append(voice)
+                db.executemany(
+                    "INSERT OR IGNORE INTO tasks (job_id, asset_key, engine, voice, grp, priority, "
+                    "cost, item, owner, state, updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'queued', ?)",
+                    [
+                        (t.job_id, t.asset_key, t.engine, t.voice, t.group, t.priority,
+                         t.cost, t.item.model_dump_json(), owner, now)
+                        for t in group_tasks
+                    ],
+                )
+
+    def claim(self, worker_id: str, engines: List[str], limit: int) -> List[FarmTask]:
+        """
+        Take the next batch for a worker: up to `limit` tasks of one voice group
+
+        Own queue first (plan order), then unowned tasks, then a steal from
+        the back of the most loaded worker's queue, preferring a group whose
+        voice this worker already has warm.
+
+        Returns:
+            Claimed tasks (empty if there is nothing to do)
+        """
+        marks = ",".join("?" for _ in engines)
+        with self._transaction() as db:
+            self._requeue_stale(db)
+            stolen = False
+
+            head = db.execute(
+                f"SELECT engine, grp, owner FROM tasks WHERE state = 'queued' AND engine IN ({marks}) "
+                f"AND (owner = ? OR owner IS NULL) ORDER BY owner IS NULL, priority LIMIT 1",
+                (*engines, worker_id),
+            ).fetchone()
+            if head is not None:
+                engine, group, owner = head
+                rows = db.execute(
+                    f"SELECT {_COLUMNS} FROM tasks WHERE state = 'queued' AND engine = ? AND grp = ? "
+                    f"AND owner IS ? ORDER BY priority LIMIT ?",
+                    (engine, group, owner, limit),
+                ).fetchall()
+            else:
+                victim = db.execute(
+                    f"SELECT owner FROM tasks WHERE state = 'queued' AND engine IN ({marks}) "
+                    f"AND owner != ? GROUP BY owner ORDER BY SUM(cost) DESC LIMIT 1",
+                    (*engines, worker_id),
+                ).fetchone()
+                if victim is None:
+                    return []
+                warm = json.loads(
+                    (db.execute("SELECT warm FROM workers WHERE id = ?", (worker_id,)).fetchone() or ["[]"])[0]
+                )
+                candidates = db.execute(
+                    f"SELECT engine, grp, voice FROM tasks WHERE state = 'queued' AND engine IN ({marks}) "
+                    f"AND owner = ? ORDER BY priority DESC",
+                    (*engines, victim[0]),
+                ).fetchall()
+                engine, group, _ = next((c for c in candidates if c[2] in warm), candidates[0])
+                rows = db.execute(
+                    f"SELECT {_COLUMNS} FROM tasks WHERE state = 'queued' AND engine = ? AND grp = ? "
+                    f"AND owner = ? ORDER BY priority DESC LIMIT ?",
+                    (engine, group, victim[0], limit),
+                ).fetchall()
+                stolen = True
+
+            claimed = sorted((self._task(row) for row in rows), key=lambda t: t.priority)
+            db.executemany(
+                "UPDATE tasks SET state = 'running', owner = ?, updated = ? WHERE job_id = ? AND asset_key = ?",
+                [(worker_id, time.time(), t.job_id, t.asset_key) for t in claimed],
+            )
+            if stolen:
+                db.execute("UPDATE workers SET stolen = stolen + ? WHERE id = ?", (len(claimed), worker_id))
+        if stolen:
+            metrics.increment("farm_steals", len(claimed))
+        return claimed
+
+    def complete(self, worker_id: str, tasks: List[FarmTask], errors: Dict[str, str]) -> None:
+        """Record a claimed batch as done (or failed) and mark its voice warm"""
+        now = time.time()
+        with self._transaction() as db:
+            db.executemany(
+                "UPDATE tasks SET state = ?, error = ?, updated = ? "
+                "WHERE job_id = ? AND asset_key = ? AND owner = ?",
+                [
+                    ("failed" if t.asset_key in errors else "done", errors.get(t.asset_key), now,
+                     t.job_id, t.asset_key, worker_id)
+                    for t in tasks
+                ],
+            )
+            row = db.execute("SELECT warm FROM workers WHERE id = ?", (worker_id,)).fetchone()
+            warm = json.loads(row[0]) if row else []
+            for voice in {t.voice for t in tasks}:
+                if voice in warm:
+                    warm.remove(voice)
+                warm.append(voice)
+            db.execute(
+                "UPDATE workers SET warm = ?, rendered = rendered + ?, heartbeat = ? WHERE id = ?",
+                (json.dumps(warm[-WARM_VOICES:]), len(tasks), now, worker_id),
+            )
+
+    def progress(self, job_id: str) -> Dict[str, Optional[str]]:
+        """Finished tasks of a job: asset key -> error (None when rendered)"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT asset_key, state, error FROM tasks WHERE job_id = ? AND state IN ('done', 'failed')",
+                (job_id,),
+            ).fetchall()
+        return {key: (error or "Render failed") if state == "failed" else None for key, state, error in rows}
+
+    def requeue_stale(self) -> None:
+        """Recover tasks of workers that stopped heartbeating"""
+        with self._transaction() as db:
+            self._requeue_stale(db)
+
+    def forget(self, job_id: str) -> None:
+        """Drop a finished job's tasks (its progress lives in the job journal)"""
+        with self._transaction() as db:
+            db.execute("DELETE FROM tasks WHERE job_id = ?", (job_id,))
+
+    def workers(self) -> List[FarmWorkerInfo]:
+        """Every registered worker with its queue"""
+        with self._lock:
+            live = self._live_workers(self._db)
+            counts: Dict[tuple, int] = {
+                (owner, state): count for owner, state, count in self._db.execute(
+                    "SELECT owner, state, COUNT(*) FROM tasks WHERE state IN ('queued', 'running') "
+                    "GROUP BY owner, state"
+                )
+            }
+            rows = self._db.execute(
+                "SELECT id, engines, warm, rendered, stolen FROM workers ORDER BY id"
+            ).fetchall()
+        return [
+            FarmWorkerInfo(
+                id=worker_id,
+                engines=json.loads(engines),
+                warm=json.loads(warm),
+                alive=worker_id in live,
+                queued=counts.get((worker_id, "queued"), 0),
+                running=counts.get((worker_id, "running"), 0),
+                rendered=rendered,
+                stolen=stolen,
+            )
+            for worker_id, engines, warm, rendered, stolen in rows
+        ]
+
+    @staticmethod
+    def _task(row) -> FarmTask:
+        job_id, key, engine, voice, group, priority, cost, item = row
+        return FarmTask(
+            job_id=job_id, asset_key=key, engine=engine, voice=voice, group=group,
+            priority=priority, cost=cost, item=SynthesisItem.model_validate_json(item),
+        )
+
+
+class FarmCoordinator:
+    """Renders a job's pending lines on the farm instead of locally (used by RenderJobRunner)"""
+
+    def __init__(
+        self,
+        broker: FarmBroker,
+        cost: Callable[[str, SynthesisItem], float],
+        voice: Callable[[str], str],
+        poll_seconds: float = 0.5
+    ):
+        """
+        Args:
+            broker: Shared task queue
+            cost: (engine, item) -> estimated render seconds
+            voice: Voice id -> identity (lines of one identity share conditioning)
+            poll_seconds: How often job progress is read back
+        """
+        self.broker = broker
+        self._cost = cost
+        self._voice = voice
+        self._poll = poll_seconds
+
+    async def parallelism(self, engine: str) -> int:
+        """Workers currently rendering `engine` (at least 1, for ETAs)"""
+        return max(1, await _in_broker(self.broker.live_workers, engine))
+
+    async def render(self, job_id: str, engine: str, pending: Dict[str, SynthesisItem], record: ProgressFn) -> None:
+        """
+        Queue `pending` (in plan order) and wait until every line is finished
+
+        `record` is called with each set of newly finished keys, so job
+        progress advances line by line while workers render in parallel.
+        """
+        tasks = []
+        for priority, (key, item) in enumerate(pending.items()):
+            voice = self._voice(item.voice_id)
+            tasks.append(FarmTask(
+                job_id=job_id,
+                asset_key=key,
+                engine=engine,
+                voice=voice,
+                group=f"{voice}:{item.emotion.model_dump_json()}",
+                priority=priority,
+                cost=self._cost(engine, item),
+                item=item,
+            ))
+        await _in_broker(self.broker.enqueue, tasks)
+        if not await _in_broker(self.broker.live_workers, engine):
+            logger.warning(f"Render job {job_id}: no live farm workers for {engine}; waiting for one")
+
+        reported = set()
+        while len(reported) < len(pending):
+            await asyncio.sleep(self._poll)
+            await _in_broker(self.broker.requeue_stale)
+            progress = await _in_broker(self.broker.progress, job_id)
+            finished = {
+                key: error for key, error in progress.items()
+                if key in pending and key not in reported
+            }
+            if finished:
+                reported.update(finished)
+                await record(list(finished), {key: error for key, error in finished.items() if error})
+        await _in_broker(self.broker.forget, job_id)
+
+
+class FarmWorker:
+    """Claims and renders farm tasks in this service instance"""
+
+    def __init__(
+        self,
+        broker: FarmBroker,
+        engines: List[str],
+        render: RenderFn,
+        batch_size: int = 8,
+        poll_seconds: float = 0.5,
+        heartbeat_seconds: float = 5.0,
+        worker_id: Optional[str] = None
+    ):
+        """
+        Args:
+            broker: Shared task queue
+            engines: Engines this instance renders
+            render: Renders and stores a set of assets (same as for local jobs)
+            batch_size: Most tasks claimed at once
+            poll_seconds: Idle wait between claims
+            heartbeat_seconds: Liveness interval (keep well under the broker's worker_timeout)
+            worker_id: Defaults to <hostname>-<pid>
+        """
+        self.broker = broker
+        self.engines = engines
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self._render = render
+        self._batch_size = batch_size
+        self._poll = poll_seconds
+        self._heartbeat = heartbeat_seconds
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """Register and start claiming"""
+        if self._tasks or not self.engines:
+            return
+        await _in_broker(self.broker.register, self.worker_id, self.engines)
+        self._tasks = [asyncio.create_task(self._beat()), asyncio.create_task(self._run())]
+        logger.info(f"Farm worker {self.worker_id} started ({', '.join(self.engines)})")
+
+    async def stop(self) -> None:
+        """Stop claiming and hand unfinished tasks back to the farm"""
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        if self._tasks:
+            await _in_broker(self.broker.deregister, self.worker_id)
+        self._tasks = []
+
+    async def _beat(self) -> None:
+        while True:
+            await asyncio.sleep(self._heartbeat)
+            try:
+                await _in_broker(self.broker.heartbeat, self.worker_id)
+            except sqlite3.Error as e:
+                logger.warning(f"Farm heartbeat failed: {e}")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                tasks = await _in_broker(self.broker.claim, self.worker_id, self.engines, self._batch_size)
+            except sqlite3.Error as e:
+                logger.warning(f"Farm claim failed: {e}")
+                tasks = []
+            if not tasks:
+                await asyncio.sleep(self._poll)
+                continue
+
+            engine = tasks[0].engine
+            start = time.perf_counter()
+            try:
+                errors = await self._render(engine, {t.asset_key: t.item for t in tasks})
+            except Exception as e:
+                logger.error(f"Farm batch failed: {e}")
+                errors = {t.asset_key: str(e) for t in tasks}
+            await _in_broker(self.broker.complete, self.worker_id, tasks, errors)
+            metrics.increment("farm_tasks_rendered", len(tasks) - len(errors), engine=engine)
+            metrics.observe("farm_batch_seconds", time.perf_counter() - start, engine=engine)
@@ -0,0 +1,457 @@
+"""
+Render jobs
+Background execution of render plans, one batch at a time, in plan order (or
+line by line across a render farm), with a SQLite journal so jobs survive restarts
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from adapters.base import SynthesisItem
+from .render_farm import FarmCoordinator
+from .render_planner import RenderPlan
+
+logger = logging.getLogger(__name__)
+
+# (engine, asset key -> item) -> error message per key that failed
+RenderFn = Callable[[str, Dict[str, SynthesisItem]], Awaitable[Dict[str, str]]]
+
+
+class JobLine(BaseModel):
+    """Progress of one script line"""
+    index: int
+    character: str
+    asset_key: Optional[str] = None
+    status: str = "pending"          # pending | done | cached | failed | unassigned
+    error: Optional[str] = None
+
+
+class RenderJob(BaseModel):
+    """A planned script render"""
+    id: str
+    engine: str
+    script_id: Optional[str] = None
+    state: str = "queued"            # queued | running | done
+    created: float
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    lines: List[JobLine]
+    plan: RenderPlan
+    items: Dict[str, SynthesisItem]  # Asset key -> what to render
+
+
+class JobStatus(BaseModel):
+    """Job progress as returned to clients"""
+    id: str
+    script_id: Optional[str] = None
+    state: str
+    total: int
+    ready: int
+    failed: int
+    pending: int
+    eta_seconds: float               # Estimated time until every line is ready
+    lines: List[JobLine]
+
+
+def new_job_id() -> str:
+    """Short random job id"""
+    return uuid.uuid4().hex[:12]
+
+
+class JobJournal:
+    """
+    Durable log of render jobs
+
+    The job (lines, plan, items) is written once on submit; afterwards only
+    per-line completions (asset key + status) and state changes are
+    appended. WAL mode keeps each write to a few pages and survives the
+    process being killed, so a restart loses at most the batch in flight.
+
+    The journal is shared by every worker process on the box. A job is
+    rendered by whichever runner claims it: the claim is a lease that the
+    runner renews while rendering, and a job whose lease lapses (its
+    process died) can be claimed again.
+    """
+
+    def __init__(self, path: str, retention_days: float = 7.0):
+        """
+        Args:
+            path: SQLite database file
+            retention_days: Finished jobs older than this are pruned on open
+        """
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                state TEXT NOT NULL,
+                created REAL NOT NULL,
+                started REAL,
+                finished REAL,
+                job TEXT NOT NULL,
+                claimed_by TEXT,
+                lease_until REAL
+            );
+            CREATE TABLE IF NOT EXISTS job_lines (
+                job_id TEXT NOT NULL,
+                asset_key TEXT NOT NULL,
+                status TEXT NOT NULL,
+                error TEXT,
+                completed REAL NOT NULL,
+                PRIMARY KEY (job_id, asset_key)
+            );
+        """)
+        # Journals from before claims were added
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(jobs)")}
+        with self._db:
+            if "claimed_by" not in columns:
+                self._db.execute("ALTER TABLE jobs ADD COLUMN claimed_by TEXT")
+            if "lease_until" not in columns:
+                self._db.execute("ALTER TABLE jobs ADD COLUMN lease_until REAL")
+
+        cutoff = time.time() - retention_days * 86400
+        with self._db:
+            self._db.execute(
+                "DELETE FROM job_lines WHERE job_id IN "
+                "(SELECT id FROM jobs WHERE state = 'done' AND finished < ?)", (cutoff,)
+            )
+            self._db.execute("DELETE FROM jobs WHERE state = 'done' AND finished < ?", (cutoff,))
+
+    def save(self, job: RenderJob) -> None:
+        """Record a newly submitted job (unclaimed)"""
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO jobs (id, state, created, started, finished, job) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job.id, job.state, job.created, job.started, job.finished, job.model_dump_json()),
+            )
+
+    def update_state(self, job: RenderJob) -> None:
+        """Record a state change (running / done)"""
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE jobs SET state = ?, started = ?, finished = ? WHERE id = ?",
+                (job.state, job.started, job.finished, job.id),
+            )
+
+    def record_lines(self, job_id: str, keys, errors: Dict[str, str]) -> None:
+        """Record rendered (or failed) asset keys of a job"""
+        now = time.time()
+        rows = [
+            (job_id, key, "failed" if key in errors else "done", errors.get(key), now)
+            for key in keys
+        ]
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO job_lines (job_id, asset_key, status, error, completed) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def load(self, job_id: str) -> Optional[RenderJob]:
+        """A retained job with journaled line progress applied, or None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT state, started, finished, job FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            lines = self._db.execute(
+                "SELECT asset_key, status, error FROM job_lines WHERE job_id = ?", (job_id,)
+            ).fetchall()
+        if row is None:
+            return None
+
+        state, started, finished, payload = row
+        try:
+            job = RenderJob.model_validate_json(payload)
+        except Exception as e:
+            logger.warning(f"Skipping unreadable journaled job {job_id}: {e}")
+            return None
+        job.state, job.started, job.finished = state, started, finished
+        done = {key: (status, error) for key, status, error in lines}
+        for line in job.lines:
+            if line.asset_key in done:
+                line.status, line.error = done[line.asset_key]
+        return job
+
+    def claim(self, owner: str, lease_seconds: float) -> Optional[RenderJob]:
+        """
+        Claim the oldest unfinished job that is unclaimed or whose lease lapsed
+
+        The claim is a conditional UPDATE, so when several processes race
+        for the same job exactly one of them gets it.
+
+        Returns:
+            The claimed job, or None when there is nothing to render
+        """
+        while True:
+            now = time.time()
+            with self._lock, self._db:
+                row = self._db.execute(
+                    "SELECT id FROM jobs WHERE state != 'done' "
+                    "AND (claimed_by IS NULL OR lease_until < ?) ORDER BY created LIMIT 1",
+                    (now,),
+                ).fetchone()
+                if row is None:
+                    return None
+                claimed = self._db.execute(
+                    "UPDATE jobs SET claimed_by = ?, lease_until = ? "
+                    "WHERE id = ? AND state != 'done' AND (claimed_by IS NULL OR lease_until < ?)",
+                    (owner, now + lease_seconds, row[0], now),
+                ).rowcount
+            if claimed:
+                job = self.load(row[0])
+                if job is not None:
+                    return job
+                # Unreadable payload: finish it so nobody claims it again
+                with self._lock, self._db:
+                    self._db.execute(
+                        "UPDATE jobs SET state = 'done', finished = ? WHERE id = ?", (time.time(), row[0])
+                    )
+            # Lost the race for this job (or skipped it): try the next one
+
+    def renew(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        """Extend a claim; False if `owner` no longer holds it"""
+        with self._lock, self._db:
+            return self._db.execute(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND claimed_by = ?",
+                (time.time() + lease_seconds, job_id, owner),
+            ).rowcount == 1
+
+    def release(self, owner: str) -> int:
+        """Give up every unfinished job claimed by `owner` (on shutdown)"""
+        with self._lock, self._db:
+            return self._db.execute(
+                "UPDATE jobs SET claimed_by = NULL, lease_until = NULL "
+                "WHERE claimed_by = ? AND state != 'done'",
+                (owner,),
+            ).rowcount
+
+
+class RenderJobRunner:
+    """
+    Single consumer that renders queued jobs batch by batch
+
+    One job renders at a time (the model is serialized anyway); within a job
+    batches follow the plan, so lines become available in planner order.
+    With a farm, a job's lines are queued on the farm in plan order and
+    rendered by its workers in parallel instead.
+
+    With a journal, jobs are not queued in memory: an idle runner claims the
+    next job from the journal, so with several worker processes each job is
+    rendered once, by whichever process is free, and any process can report
+    its status. Unfinished jobs of a process that died are claimed again
+    once their lease lapses.
+    """
+
+    def __init__(
+        self,
+        render: RenderFn,
+        rtf: Callable[[str], float],
+        journal: Optional[JobJournal] = None,
+        farm: Optional[FarmCoordinator] = None,
+        lease_seconds: float = 60.0,
+        poll_seconds: float = 2.0
+    ):
+        """
+        Args:
+            render: Renders and stores a set of assets for an engine
+            rtf: Current real-time factor estimate for an engine
+            journal: Durable job log shared by worker processes
+            farm: Render on farm workers instead of through `render`
+            lease_seconds: How long a claimed job stays ours without renewal
+            poll_seconds: How often an idle runner checks the journal for jobs
+                submitted by other processes
+        """
+        self._render = render
+        self._rtf = rtf
+        self._journal = journal
+        self._farm = farm
+        self._lease_seconds = lease_seconds
+        self._poll_seconds = poll_seconds
+        self._owner = f"{socket.gethostname()}-{os.getpid()}"
+        self._jobs: Dict[str, RenderJob] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start the consumer (call from the event loop); journaled unfinished jobs resume"""
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Cancel the consumer; the current batch is abandoned and its job released"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._journal is not None:
+            released = await self._in_journal(self._journal.release, self._owner)
+            if released:
+                logger.info(f"Released {released} unfinished render jobs for other workers")
+
+    async def submit(self, job: RenderJob) -> None:
+        """Queue a job for rendering"""
+        if self._journal is not None:
+            await self._in_journal(self._journal.save, job)
+            self._wake.set()
+            return
+        self._jobs[job.id] = job
+        if job.state != "done":
+            self._queue.put_nowait(job.id)
+
+    async def get(self, job_id: str) -> Optional[RenderJob]:
+        """Job by id (from the journal when there is one, whichever process renders it)"""
+        if self._journal is not None:
+            return await self._in_journal(self._journal.load, job_id)
+        return self._jobs.get(job_id)
+
+    async def status(self, job: RenderJob) -> JobStatus:
+        """Progress summary with the remaining ETA at the current RTF"""
+        counts = {"done": 0, "cached": 0, "failed": 0}
+        for line in job.lines:
+            if line.status in counts:
+                counts[line.status] += 1
+        pending = {line.asset_key for line in job.lines if line.status == "pending"}
+        remaining = [
+            batch for batch in job.plan.batches
+            if any(job.lines[index].asset_key in pending for index in batch.lines)
+        ]
+        eta = sum(batch.audio_seconds for batch in remaining) * self._rtf(job.engine)
+        if self._farm is not None:
+            eta /= await self._farm.parallelism(job.engine)
+
+        return JobStatus(
+            id=job.id,
+            script_id=job.script_id,
+            state=job.state,
+            total=len(job.lines),
+            ready=counts["done"] + counts["cached"],
+            failed=counts["failed"],
+            pending=sum(1 for line in job.lines if line.status == "pending"),
+            eta_seconds=round(eta, 1),
+            lines=job.lines,
+        )
+
+    async def _in_journal(self, fn, *args):
+        """Run a journal call off the event loop (SQLite can wait out its busy timeout)"""
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+    async def _run(self) -> None:
+        while True:
+            job = await self._next_job()
+            execution = asyncio.create_task(self._execute(job))
+            hold = asyncio.create_task(self._hold(job.id)) if self._journal is not None else None
+            try:
+                # The hold only returns once another worker has taken the claim over
+                await asyncio.wait(
+                    {task for task in (execution, hold) if task is not None},
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not execution.done():
+                    logger.warning(f"Render job {job.id}: lost the journal claim to another worker, abandoning it")
+                    execution.cancel()
+                    await asyncio.wait({execution})
+                elif execution.exception() is not None:
+                    # Journaled jobs are retried once the lease lapses, like after a restart
+                    logger.error(f"Render job {job.id} failed: {execution.exception()}")
+            finally:
+                execution.cancel()
+                if hold is not None:
+                    hold.cancel()
+
+    async def _next_job(self) -> RenderJob:
+        """Next job to render: from the in-memory queue, or claimed from the journal"""
+        if self._journal is None:
+            return self._jobs[await self._queue.get()]
+        while True:
+            self._wake.clear()
+            job = await self._in_journal(self._journal.claim, self._owner, self._lease_seconds)
+            if job is not None:
+                if job.started is not None:
+                    logger.info(f"Resuming unfinished render job {job.id} from the journal")
+                return job
+            # asyncio.wait, not wait_for: wait_for can swallow a cancel (stop)
+            # that arrives as the event is set
+            waiter = asyncio.ensure_future(self._wake.wait())
+            try:
+                await asyncio.wait({waiter}, timeout=self._poll_seconds)
+            finally:
+                waiter.cancel()
+
+    async def _hold(self, job_id: str) -> None:
+        """Renew the claim on a job while it renders; returns if the claim was lost"""
+        while True:
+            await asyncio.sleep(self._lease_seconds / 3)
+            try:
+                if not await self._in_journal(self._journal.renew, job_id, self._owner, self._lease_seconds):
+                    return
+            except sqlite3.Error as e:
+                # Try again next round; the lease outlives a few missed renewals
+                logger.warning(f"Render job {job_id}: renewing the journal claim failed: {e}")
+
+    async def _execute(self, job: RenderJob) -> None:
+        job.state = "running"
+        job.started = job.started or time.time()
+        if self._journal is not None:
+            await self._in_journal(self._journal.update_state, job)
+
+        done = {line.asset_key for line in job.lines if line.status in ("done", "cached")}
+        batches = [
+            batch for batch in job.plan.batches
+            if any(job.lines[index].asset_key not in done for index in batch.lines)
+        ]
+        if self._farm is not None:
+            pending = {}
+            for batch in batches:
+                for index in batch.lines:
+                    key = job.lines[index].asset_key
+                    if key not in done:
+                        pending[key] = job.items[key]
+            logger.info(f"Render job {job.id}: {len(pending)} lines to render on the farm")
+            await self._farm.render(job.id, job.engine, pending, lambda keys, errors: self._record(job, keys, errors))
+        else:
+            logger.info(f"Render job {job.id}: {len(batches)} batches to render")
+            for batch in batches:
+                # Lines journaled as done before a restart are not rendered again
+                pending = {}
+                for index in batch.lines:
+                    key = job.lines[index].asset_key
+                    if key not in done:
+                        pending[key] = job.items[key]
+
+                errors = await self._render(job.engine, pending)
+                await self._record(job, pending, errors)
+
+        job.state = "done"
+        job.finished = time.time()
+        if self._journal is not None:
+            await self._in_journal(self._journal.update_state, job)
+        logger.info(f"Render job {job.id} finished in {job.finished - job.started:.1f}s")
+
+    async def _record(self, job: RenderJob, keys, errors: Dict[str, str]) -> None:
+        """Mark rendered (or failed) asset keys of a job and journal them"""
+        keys = set(keys)
+        for line in job.lines:
+            if line.asset_key in keys:
+                line.status = "failed" if line.asset_key in errors else "done"
+                line.error = errors.get(line.asset_key)
+        if self._journal is not None:
+            await self._in_journal(self._journal.record_lines, job.id, keys, errors)
@@ -0,0 +1,139 @@
+"""
+Render planner
+Orders a script's lines into voice-grouped batches so early scenes finish first
+"""
+
+from typing import Dict, List, Optional, Set
+
+from pydantic import BaseModel
+
+from adapters.base import EmotionParams
+from .duration_budget import estimate_expected_duration
+
+
+class PlanLine(BaseModel):
+    """Dialogue line in playback order"""
+    character: str
+    text: str
+
+
+class VoiceAssignment(BaseModel):
+    """Voice for a character (from the session's voice_assignments)"""
+    character: str
+    voice_id: str
+    emotion: EmotionParams
+
+
+class RenderPlanRequest(BaseModel):
+    """Lines plus voice assignments to plan (and optionally render)"""
+    engine: str = "chatterbox"
+    script_id: Optional[str] = None
+    lines: List[PlanLine]
+    voice_assignments: List[VoiceAssignment]
+    window: int = 40                 # Lines per scheduling window (roughly a scene)
+
+
+class PlannedBatch(BaseModel):
+    """Lines rendered together: one voice and emotion"""
+    voice_id: str
+    intensity: float
+    lines: List[int]                 # Line indices (first occurrence of each distinct asset)
+    audio_seconds: float             # Estimated audio produced
+    eta_seconds: float               # Estimated finish, from the start of rendering
+
+
+class RenderPlan(BaseModel):
+    """Render order for a script; playback order is unchanged"""
+    batches: List[PlannedBatch]
+    cached: List[int]                # Lines whose audio is already stored
+    unassigned: List[int]            # Lines whose character has no voice
+    rtf: float                       # Real-time factor used for the ETA
+    eta_seconds: float
+    first_window_eta_seconds: float  # When the first `window` lines are all ready
+
+
+def expected_seconds(text: str) -> float:
+    """Midpoint of the expected duration range for a line"""
+    low, high = estimate_expected_duration(text)
+    return (low + high) / 2
+
+
+def plan_render(
+    lines: List[PlanLine],
+    assignments: Dict[str, VoiceAssignment],
+    keys: List[Optional[str]],
+    cached: Set[str],
+    rtf: float,
+    window: int = 40,
+    batch_size: int = 8
+) -> RenderPlan:
+    """
+    Plan the render order for a script
+
+    The script is cut into windows of `window` lines. Inside each window,
+    lines are grouped by (voice, emotion) with groups ordered by first
+    appearance, then split into adapter-sized batches. Windows run in
+    script order, so the opening scenes are ready first while consecutive
+    batches still reuse one voice's conditioning.
+
+    Args:
+        lines: Lines in playback order
+        assignments: Character -> voice assignment
+        keys: Audio store key per line (None for unassigned lines)
+        cached: Keys already rendered
+        rtf: Real-time factor (render seconds per audio second)
+        window: Lines per scheduling window
+        batch_size: Most lines per batch
+
+    Returns:
+        RenderPlan
+    """
+    window = max(1, window)
+    batches: List[PlannedBatch] = []
+    cached_lines: List[int] = []
+    unassigned: List[int] = []
+    seen: Set[str] = set()
+    elapsed = 0.0
+    first_window_eta = 0.0
+
+    for start in range(0, len(lines), window):
+        groups: Dict[tuple, List[int]] = {}
+        for index in range(start, min(start + window, len(lines))):
+            key = keys[index]
+            assignment = assignments.get(lines[index].character)
+            if key is None or assignment is None:
+                unassigned.append(index)
+                continue
+            if key in cached:
+                cached_lines.append(index)
+                continue
+            if key in seen:
+                continue
+            seen.add(key)
+            group = (assignment.voice_id, assignment.emotion.intensity)
+            groups.setdefault(group, []).append(index)
+
+        for (voice_id, intensity), indices in groups.items():
+            for offset in range(0, len(indices), batch_size):
+                chunk = indices[offset:offset + batch_size]
+                audio_seconds = sum(expected_seconds(lines[i].text) for i in chunk)
+                elapsed += audio_seconds * rtf
+                batches.append(PlannedBatch(
+                    voice_id=voice_id,
+                    intensity=intensity,
+                    lines=chunk,
+                    audio_seconds=round(audio_seconds, 2),
+                    eta_seconds=round(elapsed, 1),
+                ))
+
+        if start == 0:
+            first_window_eta = elapsed
+
+    return RenderPlan(
+        batches=batches,
+        cached=cached_lines,
+        unassigned=unassigned,
+        rtf=round(rtf, 3),
+        eta_seconds=round(elapsed, 1),
+        first_window_eta_seconds=round(first_window_eta, 1),
+    )
@@ -0,0 +1,130 @@
+"""
+Engine routing
+Fallback and hedging policies that send a line to an alternate engine when the primary is slow or fails
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+from typing import Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Zero-argument coroutine factory for one attempt
+Attempt = Callable[[], Awaitable[T]]
+
+POLICIES = ("single", "fallback", "hedge")
+
+
+class RoutingConfig(BaseModel):
+    """Routing policy for interactive synthesis"""
+    policy: str = "single"                 # single | fallback | hedge
+    alternates: Dict[str, str] = Field(default_factory=dict)            # engine -> alternate engine
+    voice_map: Dict[str, Dict[str, str]] = Field(default_factory=dict)  # alternate engine -> {voice: voice}
+    slo_seconds: float = 10.0              # fallback: primary latency budget
+    hedge_quantile: float = 0.95           # hedge: launch the alternate after this latency quantile
+    hedge_min_delay: float = 0.5           # hedge: never sooner than this (seconds)
+
+    def alternate(self, engine: str) -> Optional[str]:
+        """Alternate engine for `engine` under the active policy (None = no routing)"""
+        if self.policy == "single":
+            return None
+        return self.alternates.get(engine)
+
+    def alternate_voice(self, engine: str, voice_id: str) -> str:
+        """Voice to use on the alternate engine (unchanged unless mapped)"""
+        return self.voice_map.get(engine, {}).get(voice_id, voice_id)
+
+
+def parse_alternates(spec: str) -> Dict[str, str]:
+    """Parse ROUTING_ALTERNATES ("chatterbox=chatterbox-onnx,index-tts=chatterbox")"""
+    alternates = {}
+    for entry in spec.split(","):
+        primary, _, alternate = entry.partition("=")
+        if primary.strip() and alternate.strip():
+            alternates[primary.strip()] = alternate.strip()
+    return alternates
+
+
+def load_voice_map(path: str) -> Dict[str, Dict[str, str]]:
+    """Read a voice map JSON file ({"<alternate engine>": {"<voice>": "<voice>"}}); empty if unset"""
+    if not path:
+        return {}
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read routing voice map {path}: {e}")
+        return {}
+
+
+async def _cancel(task: asyncio.Task) -> None:
+    """Cancel a losing attempt and wait for it to let go of its engine"""
+    task.cancel()
+    with contextlib.suppress(BaseException):
+        await task
+
+
+async def with_fallback(primary: Attempt, alternate: Attempt, slo_seconds: float) -> Tuple[T, str]:
+    """
+    Run `primary`; if it fails or exceeds `slo_seconds`, cancel it and run `alternate`
+
+    Returns:
+        (result, decision) with decision "primary", "fallback_slo" or "fallback_error"
+    """
+    task = asyncio.ensure_future(primary())
+    try:
+        done, _ = await asyncio.wait({task}, timeout=slo_seconds)
+    except asyncio.CancelledError:
+        await _cancel(task)
+        raise
+
+    if not done:
+        await _cancel(task)
+        return await alternate(), "fallback_slo"
+    try:
+        return task.result(), "primary"
+    except Exception as e:
+        logger.warning(f"Primary engine failed, falling back: {e}")
+        return await alternate(), "fallback_error"
+
+
+async def hedged(primary: Attempt, alternate: Attempt, delay: float) -> Tuple[T, str]:
+    """
+    Run `primary`; if it has not finished after `delay`, also run `alternate`
+    and keep whichever finishes first (the other is cancelled)
+
+    If one attempt fails, the other's result is used.
+
+    Returns:
+        (result, decision): "primary" (no hedge needed), "hedge_primary" or "hedge_alternate"
+    """
+    first = asyncio.ensure_future(primary())
+    second = None
+    try:
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done and not first.exception():
+            return first.result(), "primary"
+
+        second = asyncio.ensure_future(alternate())
+        pending = {first, second} - done
+        errors = [first.exception()] if done else []
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    for loser in pending:
+                        await _cancel(loser)
+                    return task.result(), "hedge_primary" if task is first else "hedge_alternate"
+                errors.append(task.exception())
+        raise errors[-1]
+    except asyncio.CancelledError:
+        for task in (first, second):
+            if task is not None and not task.done():
+                await _cancel(task)
+        raise
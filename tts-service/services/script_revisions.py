@@ -0,0 +1,151 @@
+"""
+Script revisions
+Line-level diffing between revisions of a script so edits only re-render what changed
+"""
+
+import difflib
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+from adapters.base import EmotionParams
+
+logger = logging.getLogger(__name__)
+
+SCRIPT_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,128}$')
+
+
+class ScriptLine(BaseModel):
+    """One dialogue line in a script revision"""
+    character: str
+    text: str
+    voice_id: str
+    emotion: EmotionParams
+
+
+class ScriptRevisionRequest(BaseModel):
+    """Full line list for a new revision of a script"""
+    engine: str = "chatterbox"
+    lines: List[ScriptLine]
+
+
+class LineAsset(BaseModel):
+    """Where a line's audio comes from in the new revision"""
+    index: int                            # Position in the new revision (0-based)
+    character: str
+    asset_key: Optional[str] = None       # None if rendering failed
+    status: str                           # unchanged | moved | added | changed | failed
+    previous_index: Optional[int] = None  # Position in the previous revision, if reused
+    error: Optional[str] = None
+
+
+class ScriptRevisionResult(BaseModel):
+    """Response for a submitted revision"""
+    script_id: str
+    revision: str
+    previous_revision: Optional[str] = None
+    lines: List[LineAsset]
+    removed: List[int]                    # Previous-revision positions no longer present
+    rendered: int
+    reused: int
+
+
+class LineChange(BaseModel):
+    """Diff result for one line of the new revision"""
+    index: int
+    status: str                           # unchanged | moved | added | changed
+    previous_index: Optional[int] = None
+
+
+def revision_id(keys: List[str]) -> str:
+    """Revision id: hash of the ordered line asset keys"""
+    return hashlib.sha1("\n".join(keys).encode('utf-8')).hexdigest()[:16]
+
+
+def diff_lines(previous: List[str], current: List[str]) -> tuple[List[LineChange], List[int]]:
+    """
+    Align two revisions by line content hash
+
+    Lines in matching runs are `unchanged`; lines whose hash appears elsewhere
+    in the previous revision are `moved` (reusable, e.g. after a scene
+    swap); anything else is `added` (pure insertion) or `changed` (replaced
+    an old line).
+
+    Args:
+        previous: Asset keys of the previous revision, in order
+        current: Asset keys of the new revision, in order
+
+    Returns:
+        (one LineChange per current line, previous positions that were removed)
+    """
+    changes: List[Optional[LineChange]] = [None] * len(current)
+    used = set()
+
+    matcher = difflib.SequenceMatcher(a=previous, b=current, autojunk=False)
+    opcodes = matcher.get_opcodes()
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == 'equal':
+            for offset in range(j2 - j1):
+                changes[j1 + offset] = LineChange(
+                    index=j1 + offset, status="unchanged", previous_index=i1 + offset
+                )
+                used.add(i1 + offset)
+
+    # First unmatched occurrence of each old key, for moved lines
+    leftover: Dict[str, List[int]] = {}
+    for i, key in enumerate(previous):
+        if i not in used:
+            leftover.setdefault(key, []).append(i)
+
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == 'equal':
+            continue
+        for j in range(j1, j2):
+            positions = leftover.get(current[j])
+            if positions:
+                i = positions.pop(0)
+                used.add(i)
+                changes[j] = LineChange(index=j, status="moved", previous_index=i)
+            else:
+                changes[j] = LineChange(index=j, status="added" if tag == 'insert' else "changed")
+
+    removed = [i for i in range(len(previous)) if i not in used]
+    return changes, removed
+
+
+class ScriptRevisionStore:
+    """Latest revision per script, as `root/<script_id>.json`"""
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def latest(self, script_id: str) -> Optional[dict]:
+        """Latest stored revision ({revision, keys, created}), or None"""
+        try:
+            with open(self._path(script_id)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable revision for {script_id}: {e}")
+            return None
+
+    def save(self, script_id: str, revision: str, keys: List[str]) -> None:
+        """Record a revision as the latest"""
+        path = self._path(script_id)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"revision": revision, "keys": keys, "created": time.time()}, f)
+        os.replace(tmp_path, path)
+
+    def _path(self, script_id: str) -> str:
+        if not SCRIPT_ID_PATTERN.match(script_id):
+            raise ValueError(f"Invalid script id: {script_id!r}")
+        return os.path.join(self.root, f"{script_id}.json")
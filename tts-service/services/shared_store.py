@@ -0,0 +1,136 @@
+"""
+Shared audio stores
+Cold tier of the audio cache, shared by every TTS node (a mounted directory or an S3-compatible bucket)
+"""
+
+import logging
+import os
+from abc import ABC, abstractmethod
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SharedStore(ABC):
+    """Object store holding WAVs by asset key; implementations must be safe to call from threads"""
+
+    name = "shared"
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """Stored WAV bytes, or None"""
+        pass
+
+    @abstractmethod
+    def put(self, key: str, data: bytes) -> None:
+        """Store WAV bytes (overwrites)"""
+        pass
+
+    @abstractmethod
+    def contains(self, key: str) -> bool:
+        """Whether the asset is stored"""
+        pass
+
+
+class DirectoryStore(SharedStore):
+    """Shared directory (NFS/SMB mount) with the local store's `<key[:2]>/<key>.wav` layout"""
+
+    name = "directory"
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.wav")
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._path(key), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Unique per node and process: several nodes may upload the same key
+        tmp_path = f"{path}.{os.uname().nodename}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def contains(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+
+class S3Store(SharedStore):
+    """
+    S3-compatible bucket (AWS S3, MinIO, Ceph RGW, R2) via boto3
+
+    Credentials come from the usual AWS environment variables or profile;
+    `endpoint_url` points at a non-AWS implementation.
+    """
+
+    name = "s3"
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: Optional[str] = None):
+        try:
+            import boto3
+            from botocore.exceptions import ClientError
+        except ImportError as e:
+            raise ImportError("The s3:// audio store needs boto3 (pip install boto3)") from e
+
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self._client = boto3.client("s3", endpoint_url=endpoint_url or None)
+        self._client_error = ClientError
+
+    def _key(self, key: str) -> str:
+        name = f"{key[:2]}/{key}.wav"
+        return f"{self.prefix}/{name}" if self.prefix else name
+
+    def _missing(self, error) -> bool:
+        return error.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            response = self._client.get_object(Bucket=self.bucket, Key=self._key(key))
+        except self._client_error as e:
+            if self._missing(e):
+                return None
+            raise
+        return response["Body"].read()
+
+    def put(self, key: str, data: bytes) -> None:
+        self._client.put_object(Bucket=self.bucket, Key=self._key(key), Body=data, ContentType="audio/wav")
+
+    def contains(self, key: str) -> bool:
+        try:
+            self._client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except self._client_error as e:
+            if self._missing(e):
+                return False
+            raise
+        return True
+
+
+def open_shared_store(spec: str, endpoint_url: Optional[str] = None) -> Optional[SharedStore]:
+    """
+    Shared store from AUDIO_SHARED_STORE
+
+    Args:
+        spec: "" (none), a directory path, "file:///mnt/audio" or "s3://bucket/prefix"
+        endpoint_url: S3 endpoint for non-AWS implementations
+
+    Returns:
+        Store, or None when unset
+    """
+    if not spec:
+        return None
+    if spec.startswith("s3://"):
+        bucket, _, prefix = spec[len("s3://"):].partition("/")
+        return S3Store(bucket, prefix, endpoint_url=endpoint_url)
+    if spec.startswith("file://"):
+        spec = spec[len("file://"):]
+    return DirectoryStore(spec)
@@ -0,0 +1,284 @@
+"""
+Text normalization
+Spoken-form clean-up of script lines (numbers, abbreviations, casing, repeats, punctuation) before synthesis
+"""
+
+import functools
+import re
+
+from pydantic import BaseModel
+
+
+class NormalizerConfig(BaseModel):
+    """Text normalization settings"""
+    enabled: bool = True
+    max_letter_repeat: int = 3     # "Braiiiiiins" -> "Braiiins"
+    max_word_repeat: int = 4       # "go go go go go go" -> "go go go go"
+    cache_size: int = 4096         # Memoized raw lines
+
+
+_ONES = [
+    "zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine",
+    "ten", "eleven", "twelve", "thirteen", "fourteen", "fifteen", "sixteen",
+    "seventeen", "eighteen", "nineteen",
+]
+_TENS = ["", "", "twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty", "ninety"]
+_SCALES = [(10 ** 9, "billion"), (10 ** 6, "million"), (1000, "thousand")]
+_ORDINAL_EXCEPTIONS = {
+    "one": "first", "two": "second", "three": "third", "five": "fifth",
+    "eight": "eighth", "nine": "ninth", "twelve": "twelfth",
+}
+
+# Abbreviations read as words (case-sensitive; "St." is resolved by context)
+_ABBREVIATIONS = {
+    "Mr": "Mister", "Mrs": "Missus", "Ms": "Miz", "Dr": "Doctor", "Jr": "Junior",
+    "Sr": "Senior", "Lt": "Lieutenant", "Sgt": "Sergeant", "Capt": "Captain",
+    "Prof": "Professor", "Gen": "General", "Col": "Colonel", "Mt": "Mount", "St": "Saint",
+}
+_PHRASES = [
+    (re.compile(r"\bvs\.?(?=\s)", re.IGNORECASE), "versus"),
+    (re.compile(r"\betc\.", re.IGNORECASE), "et cetera"),
+    (re.compile(r"\be\.g\.", re.IGNORECASE), "for example"),
+    (re.compile(r"\bi\.e\.", re.IGNORECASE), "that is"),
+    (re.compile(r"\bNo\.\s*(?=\d)"), "number "),
+    (re.compile(r"\s*&\s*"), " and "),
+]
+
+# Screenplay markers that are not spoken: (O.S.), (V.O.), (CONT'D)
+_STAGE_MARKERS = re.compile(r"\(\s*(?:O\.S\.|O\.C\.|V\.O\.|CONT['’]D|MORE)\s*\)", re.IGNORECASE)
+
+# All-caps words kept as-is (read as initialisms or already pronounceable)
+_ACRONYMS = {
+    "I", "TV", "DJ", "FBI", "CIA", "USA", "UK", "ID", "DNA", "CEO", "UFO", "ASAP", "NASA", "AD", "BCE", "CE",
+}
+
+# Well-formed Roman numerals ("Chapter IV", "Henry VIII"), also kept as-is
+_ROMAN = re.compile(r"M{0,3}(?:CM|CD|D?C{0,3})(?:XC|XL|L?X{0,3})(?:IX|IV|V?I{0,3})")
+
+# Context that makes a four-digit number a year rather than a quantity:
+# "in 1999", "summer of 1969", "June 5, 1944", "1939 to 1945", "1066 AD", "1999's"
+_YEAR_BEFORE = re.compile(
+    r"(?:\b(?i:in|since|by|until|till|from|circa)"
+    r"|\b(?i:year|summer|winter|spring|autumn|fall|class)(?:\s+of)?"
+    r"|\b(?:January|February|March|April|May|June|July|August|September|October|November|December"
+    r"|Jan|Feb|Mar|Apr|Jun|Jul|Aug|Sept?|Oct|Nov|Dec)\.?(?:\s+[\w-]+,?)?"
+    r"|\b(?:AD|A\.D\.)"
+    r"|\b(?:1[1-9]|20)\d\d\s*(?:to|and|or|through|until))\s+$"
+)
+_YEAR_AFTER = re.compile(r"\s*(?:AD|BC|BCE|CE|A\.D\.|B\.C\.)(?!\w)|'s\b")
+
+_PUNCTUATION = [
+    ("“", '"'), ("”", '"'), ("„", '"'), ("‘", "'"), ("’", "'"), ("…", "..."),
+]
+
+
+def number_words(n: int) -> str:
+    """Cardinal number in words ("forty-two")"""
+    if n < 0:
+        return "minus " + number_words(-n)
+    if n < 20:
+        return _ONES[n]
+    if n < 100:
+        tens, ones = divmod(n, 10)
+        return _TENS[tens] + (f"-{_ONES[ones]}" if ones else "")
+    if n < 1000:
+        hundreds, rest = divmod(n, 100)
+        return f"{_ONES[hundreds]} hundred" + (f" {number_words(rest)}" if rest else "")
+    for scale, name in _SCALES:
+        if n >= scale:
+            high, rest = divmod(n, scale)
+            return f"{number_words(high)} {name}" + (f" {number_words(rest)}" if rest else "")
+    return str(n)
+
+
+def ordinal_words(n: int) -> str:
+    """Ordinal number in words ("twenty-first")"""
+    words = number_words(n)
+    head, sep, last = words.rpartition("-") if "-" in words else words.rpartition(" ")
+    if last in _ORDINAL_EXCEPTIONS:
+        last = _ORDINAL_EXCEPTIONS[last]
+    elif last.endswith("y"):
+        last = last[:-1] + "ieth"
+    else:
+        last += "th"
+    return head + sep + last
+
+
+def year_words(n: int) -> str:
+    """Four-digit year as spoken ("nineteen ninety-nine", "two thousand five")"""
+    high, low = divmod(n, 100)
+    if 2000 <= n < 2010:
+        return number_words(n)
+    if low == 0:
+        return f"{number_words(high)} hundred"
+    if low < 10:
+        return f"{number_words(high)} oh {number_words(low)}"
+    return f"{number_words(high)} {number_words(low)}"
+
+
+def _money(match: re.Match, units: tuple, sub_units: tuple) -> str:
+    whole = int(match.group(1).replace(",", ""))
+    words = f"{number_words(whole)} {units[whole != 1]}"
+    if match.group(2) and int(match.group(2)):
+        cents = int(match.group(2))
+        words += f" and {number_words(cents)} {sub_units[cents != 1]}"
+    return words
+
+
+def _time(match: re.Match) -> str:
+    hours, minutes, meridiem = int(match.group(1)), int(match.group(2)), match.group(3)
+    if hours > 24 or minutes > 59:
+        return match.group(0)
+    if minutes == 0:
+        words = number_words(hours) if meridiem else f"{number_words(hours)} o'clock"
+    elif minutes < 10:
+        words = f"{number_words(hours)} oh {number_words(minutes)}"
+    else:
+        words = f"{number_words(hours)} {number_words(minutes)}"
+    if not meridiem:
+        return words
+    # "p.m." at the end of the line also ends the sentence
+    period = "." if meridiem.endswith(".") and match.end() == len(match.string) else ""
+    return f"{words} {meridiem[0].lower()} m{period}"
+
+
+def _is_year(digits: str) -> bool:
+    return len(digits) == 4 and 1100 <= int(digits) <= 2099
+
+
+def _in_year_context(match: re.Match) -> bool:
+    """Whether the words around a number mark it as a year ("in 1999", not "room 1234")"""
+    text, start, end = match.string, match.start(), match.end()
+    return bool(_YEAR_BEFORE.search(text, max(0, start - 40), start) or _YEAR_AFTER.match(text, end))
+
+
+def _integer(match: re.Match) -> str:
+    digits = match.group(0)
+    if "," not in digits and _is_year(digits) and _in_year_context(match):
+        return year_words(int(digits))
+    return number_words(int(digits.replace(",", "")))
+
+
+def _dotted(match: re.Match) -> str:
+    """Version-style numbers ("2.0.1" -> "two point zero point one")"""
+    return " point ".join(number_words(int(part)) for part in match.group(0).split("."))
+
+
+def _hyphenated(match: re.Match) -> str:
+    """
+    Digit groups joined by hyphens
+
+    Year ranges ("1939-1945", "1990-95") are read as years with "to";
+    phone numbers and codes (any group of three or more digits) digit by
+    digit; short groups ("10-20") as plain numbers.
+    """
+    groups = match.group(0).split("-")
+    if len(groups) == 2 and _is_year(groups[0]) and (_is_year(groups[1]) or len(groups[1]) == 2):
+        end = year_words(int(groups[1])) if len(groups[1]) == 4 else number_words(int(groups[1]))
+        return f"{year_words(int(groups[0]))} to {end}"
+    if any(len(group) >= 3 for group in groups):
+        return ", ".join(" ".join(_ONES[int(d)] for d in group) for group in groups)
+    return "-".join(number_words(int(group)) for group in groups)
+
+
+def _decimal(match: re.Match) -> str:
+    whole, fraction = match.group(1), match.group(2)
+    return f"{number_words(int(whole))} point " + " ".join(_ONES[int(d)] for d in fraction)
+
+
+def _abbreviation(match: re.Match) -> str:
+    word = match.group(1)
+    if word != "St":
+        return _ABBREVIATIONS[word]
+    # "St. Louis" vs "Baker St." (whose period may also end the sentence)
+    if match.group(2):
+        return "Saint"
+    return "Street." if match.end() == len(match.string) else "Street"
+
+
+def _caps(match: re.Match) -> str:
+    word = match.group(0)
+    if word in _ACRONYMS or _ROMAN.fullmatch(word) or not re.search(r"[AEIOUY]", word):
+        return word
+    if word == "OK":
+        return "Okay"
+    return word.capitalize()
+
+
+def _bangs(match: re.Match) -> str:
+    run = match.group(0)
+    if "?" in run and "!" in run:
+        return "?!"
+    return run[0]
+
+
+class TextNormalizer:
+    """
+    Rewrites script lines into the form the engines read best
+
+    Lines repeat heavily across a script's revisions, render plans and
+    cards, so results are memoized by raw text (LRU, `cache_size`).
+    """
+
+    def __init__(self, config: NormalizerConfig = None):
+        """
+        Args:
+            config: Normalization settings (defaults if omitted)
+        """
+        self.config = config or NormalizerConfig()
+        n = self.config.max_letter_repeat
+        w = self.config.max_word_repeat
+        self._letter_repeat = re.compile(r"([A-Za-z])\1{%d,}" % n)
+        self._letter_keep = r"\1" * n
+        self._word_repeat = re.compile(
+            r"\b(\w+)((?:[\s,]+\1\b){%d})(?:[\s,]+\1\b)+" % (w - 1), re.IGNORECASE
+        )
+        self.normalize = functools.lru_cache(maxsize=self.config.cache_size)(self._normalize)
+
+    def cache_info(self):
+        """Memo cache statistics (hits, misses, currsize)"""
+        return self.normalize.cache_info()
+
+    def _normalize(self, text: str) -> str:
+        if not self.config.enabled:
+            return text
+
+        # Punctuation and spacing
+        for old, new in _PUNCTUATION:
+            text = text.replace(old, new)
+        text = _STAGE_MARKERS.sub(" ", text)
+        text = re.sub(r"\s*[—–]\s*", " - ", text)
+        text = re.sub(r"\.{4,}", "...", text)
+        text = re.sub(r"[!?]{2,}", _bangs, text)
+        text = re.sub(r"\s+", " ", text).strip()
+        text = re.sub(r"\s+([,.!?;:])", r"\1", text)
+
+        # Pathological repeats ("Nooooooooo", "go go go go go go go")
+        text = self._letter_repeat.sub(self._letter_keep, text)
+        text = self._word_repeat.sub(r"\1\2", text)
+
+        # Abbreviations before numbers ("No. 5", "Dr. 2")
+        text = re.sub(r"\b(%s)\.(?=(\s+[A-Z])?)" % "|".join(_ABBREVIATIONS), _abbreviation, text)
+        for pattern, replacement in _PHRASES:
+            text = pattern.sub(replacement, text)
+
+        # Numbers
+        text = re.sub(r"\$(\d[\d,]*)(?:\.(\d{2}))?\b", lambda m: _money(m, ("dollar", "dollars"), ("cent", "cents")), text)
+        text = re.sub(r"£(\d[\d,]*)(?:\.(\d{2}))?\b", lambda m: _money(m, ("pound", "pounds"), ("penny", "pence")), text)
+        text = re.sub(r"(\d+(?:\.\d+)?)\s?%", r"\1 percent", text)
+        text = re.sub(
+            r"\b(\d{1,2}):(\d{2})(?:\s*(a\.m\.|p\.m\.|am\b|pm\b)|\b)", _time, text, flags=re.IGNORECASE
+        )
+        text = re.sub(
+            r"\b(\d+)(?:st|nd|rd|th)\b", lambda m: ordinal_words(int(m.group(1))), text, flags=re.IGNORECASE
+        )
+        # Runs of digit groups first, so their parts are not read as years or decimals
+        text = re.sub(r"(?<![\d.])\d+(?:\.\d+){2,}(?![\d])", _dotted, text)
+        text = re.sub(r"(?<![\d-])\d+(?:-\d+)+(?![\d])", _hyphenated, text)
+        text = re.sub(r"\b(\d+)\.(\d+)\b", _decimal, text)
+        text = re.sub(r"\b\d{1,3}(?:,\d{3})+\b|\b\d+\b", _integer, text)
+
+        # ALL-CAPS words are spelled out letter by letter by the engines
+        text = re.sub(r"\b[A-Z][A-Z']*[A-Z]\b", _caps, text)
+
+        return re.sub(r"\s+", " ", text).strip()
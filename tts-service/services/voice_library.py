@@ -0,0 +1,431 @@
+"""
+Voice library
+Indexes reference voices once and answers voice lookups from memory
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import torchaudio
+from pydantic import BaseModel, Field
+
+from .reference_audio import PreprocessConfig, prepare_reference
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 2
+
+# (prepared_prompt_path, artifact_path) -> writes engine conditioning to artifact_path
+Conditioner = Callable[[str, str], None]
+
+
+class VoiceEntry(BaseModel):
+    """Indexed reference voice"""
+    id: str
+    name: str
+    path: str
+    digest: str
+    size: int
+    mtime: float
+    meta_mtime: float = 0.0
+    duration: float
+    sample_rate: int
+    gender: str = "N"
+    age_range: str = "varies"
+    description: str | None = None
+    prepared: Dict[str, str] = Field(default_factory=dict)
+    conditioning: Dict[str, str] = Field(default_factory=dict)
+
+
+class VoiceLibrary:
+    """
+    On-disk index of the reference voices directory
+
+    Each voice is fingerprinted by content digest so the prepared prompt and
+    conditioning computed for an engine are reused across restarts and
+    renames. A background watcher picks up added, changed and removed WAVs
+    without a restart.
+    """
+
+    def __init__(
+        self,
+        reference_dir: str,
+        index_dir: str,
+        presets_path: Optional[str] = None,
+        preprocess: Optional[PreprocessConfig] = None
+    ):
+        """
+        Args:
+            reference_dir: Directory of reference WAV files
+            index_dir: Directory for the index, prepared prompts and conditioning
+            presets_path: Optional backend voice-presets.json used for metadata
+            preprocess: Reference prompt preprocessing settings
+        """
+        self.reference_dir = os.path.abspath(reference_dir)
+        self.index_dir = index_dir
+        self.index_path = os.path.join(index_dir, "index.json")
+        self.presets_path = presets_path
+        self.preprocess = preprocess or PreprocessConfig()
+
+        self._entries: Dict[str, VoiceEntry] = {}
+        self._conditioners: Dict[str, Tuple[Conditioner, int]] = {}
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+        os.makedirs(index_dir, exist_ok=True)
+        self._load_index()
+
+    def register_conditioner(
+        self,
+        engine: str,
+        conditioner: Conditioner,
+        sample_rate: int
+    ) -> None:
+        """
+        Register an engine hook that precomputes speaker conditioning
+
+        Reference audio is preprocessed to the engine's native rate first;
+        artifacts are produced for every indexed voice on the next refresh.
+
+        Args:
+            engine: Engine name (used as the artifact namespace)
+            conditioner: Callable writing conditioning for a prepared prompt
+            sample_rate: Engine native sample rate
+        """
+        self._conditioners[engine] = (conditioner, sample_rate)
+        os.makedirs(os.path.join(self.index_dir, "prepared", engine), exist_ok=True)
+        os.makedirs(os.path.join(self.index_dir, "conditioning", engine), exist_ok=True)
+
+    def unregister_conditioner(self, engine: str, conditioner: Conditioner) -> None:
+        """Remove an engine hook, if `conditioner` is still the one registered for `engine`"""
+        # Not while a refresh iterates the hooks (or runs this one)
+        with self._refresh_lock:
+            registered = self._conditioners.get(engine)
+            if registered is not None and registered[0] == conditioner:
+                del self._conditioners[engine]
+
+    def list(self) -> List[VoiceEntry]:
+        """Return all indexed voices, sorted by id"""
+        entries = self._entries
+        return [entries[voice_id] for voice_id in sorted(entries)]
+
+    def get(self, voice_id: str) -> Optional[VoiceEntry]:
+        """Return the indexed voice with this id, if any"""
+        return self._entries.get(voice_id)
+
+    def resolve(self, voice_id: str) -> Optional[VoiceEntry]:
+        """
+        Resolve a voice id or reference path to an indexed voice
+
+        The backend addresses voices by reference WAV path (possibly from a
+        different checkout), so paths are matched by real path first and
+        then by file stem when the content size agrees.
+
+        Args:
+            voice_id: Voice id or path to a reference WAV
+
+        Returns:
+            Matching VoiceEntry, or None
+        """
+        entries = self._entries
+        if voice_id in entries:
+            return entries[voice_id]
+
+        real_path = os.path.realpath(voice_id)
+        for entry in entries.values():
+            if entry.path == real_path:
+                return entry
+
+        stem = os.path.splitext(os.path.basename(voice_id))[0]
+        entry = entries.get(stem)
+        if entry is None:
+            return None
+        if os.path.isfile(voice_id) and os.path.getsize(voice_id) != entry.size:
+            return None
+        return entry
+
+    def identity(self, voice_id: str) -> str:
+        """
+        Stable identity of the audio a voice id renders with
+
+        Content digest plus preprocessing tag for indexed voices (so renames
+        keep cached audio and re-recorded references invalidate it); the raw
+        voice id otherwise.
+        """
+        entry = self.resolve(voice_id)
+        if entry is None:
+            return voice_id
+        return f"{entry.digest}-{self.preprocess.tag()}"
+
+    def refresh(self) -> bool:
+        """
+        Rescan the reference directory and update the index
+
+        Returns:
+            True if any voice was added, changed or removed
+        """
+        with self._refresh_lock:
+            scanned = self._scan()
+            presets = self._load_presets()
+            current = self._entries
+            updated: Dict[str, VoiceEntry] = {}
+            changed = False
+
+            for voice_id, (path, size, mtime, meta_mtime) in scanned.items():
+                entry = current.get(voice_id)
+                if (
+                    entry is None
+                    or entry.path != path
+                    or entry.size != size
+                    or entry.mtime != mtime
+                    or entry.meta_mtime != meta_mtime
+                ):
+                    try:
+                        entry = self._index_voice(voice_id, path, size, mtime, meta_mtime, presets)
+                    except Exception as e:
+                        logger.error(f"Failed to index voice {voice_id}: {e}")
+                        continue
+                    logger.info(f"Indexed voice {voice_id} ({entry.duration:.1f}s @ {entry.sample_rate}Hz)")
+                    changed = True
+
+                if self._condition(entry):
+                    changed = True
+                updated[voice_id] = entry
+
+            removed = set(current) - set(updated)
+            for voice_id in removed:
+                logger.info(f"Voice removed: {voice_id}")
+            changed = changed or bool(removed)
+
+            self._entries = updated
+            if changed:
+                self._save_index()
+            return changed
+
+    def start_watching(self, interval: float = 5.0) -> None:
+        """
+        Poll the reference directory for changes in a background thread
+
+        Args:
+            interval: Seconds between scans
+        """
+        if self._watcher is not None:
+            return
+
+        self._stop.clear()
+
+        def watch():
+            while not self._stop.wait(interval):
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logger.error(f"Voice library refresh failed: {e}")
+
+        self._watcher = threading.Thread(target=watch, name="voice-library-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        """Stop the background watcher"""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+    def _scan(self) -> Dict[str, Tuple[str, int, float, float]]:
+        """Return {voice_id: (path, size, mtime, sidecar_mtime)} for reference WAVs"""
+        scanned = {}
+        if not os.path.isdir(self.reference_dir):
+            return scanned
+
+        with os.scandir(self.reference_dir) as it:
+            for item in it:
+                if not item.name.endswith('.wav') or not item.is_file():
+                    continue
+                voice_id = item.name[:-len('.wav')]
+                stat = item.stat()
+                sidecar = os.path.join(self.reference_dir, f"{voice_id}.json")
+                meta_mtime = os.path.getmtime(sidecar) if os.path.exists(sidecar) else 0.0
+                scanned[voice_id] = (
+                    os.path.realpath(item.path),
+                    stat.st_size,
+                    stat.st_mtime,
+                    meta_mtime,
+                )
+        return scanned
+
+    def _index_voice(
+        self,
+        voice_id: str,
+        path: str,
+        size: int,
+        mtime: float,
+        meta_mtime: float,
+        presets: Dict[str, dict]
+    ) -> VoiceEntry:
+        """Fingerprint and describe a single reference WAV"""
+        info = torchaudio.info(path)
+        metadata = self._metadata(voice_id, presets)
+
+        return VoiceEntry(
+            id=voice_id,
+            name=metadata.get('name') or voice_id.replace('-', ' ').title(),
+            path=path,
+            digest=_file_digest(path),
+            size=size,
+            mtime=mtime,
+            meta_mtime=meta_mtime,
+            duration=info.num_frames / info.sample_rate,
+            sample_rate=info.sample_rate,
+            gender=metadata.get('gender', 'N'),
+            age_range=metadata.get('age_range', 'varies'),
+            description=metadata.get('description'),
+        )
+
+    def _condition(self, entry: VoiceEntry) -> bool:
+        """
+        Ensure every registered engine has a prepared prompt and conditioning
+
+        Artifacts are named by content digest and preprocessing settings, so
+        existing files are reused.
+
+        Returns:
+            True if the entry's artifact maps changed
+        """
+        changed = False
+        artifact_id = f"{entry.digest}-{self.preprocess.tag()}"
+
+        for engine, (conditioner, sample_rate) in self._conditioners.items():
+            prepared = os.path.join(
+                self.index_dir, "prepared", engine, f"{artifact_id}-{sample_rate}.wav"
+            )
+            artifact = os.path.join(
+                self.index_dir, "conditioning", engine, f"{artifact_id}-{sample_rate}.pt"
+            )
+
+            try:
+                if not os.path.exists(prepared):
+                    duration = prepare_reference(entry.path, prepared, sample_rate, self.preprocess)
+                    logger.info(
+                        f"Prepared {engine} prompt for {entry.id}: "
+                        f"{entry.duration:.1f}s -> {duration:.1f}s @ {sample_rate}Hz"
+                    )
+                if not os.path.exists(artifact):
+                    conditioner(prepared, artifact)
+            except Exception as e:
+                logger.error(f"Failed to prepare voice {entry.id} for {engine}: {e}")
+                continue
+
+            if entry.prepared.get(engine) != prepared or entry.conditioning.get(engine) != artifact:
+                entry.prepared[engine] = prepared
+                entry.conditioning[engine] = artifact
+                changed = True
+        return changed
+
+    def _metadata(self, voice_id: str, presets: Dict[str, dict]) -> dict:
+        """
+        Collect voice metadata
+
+        A `<voice>.json` sidecar next to the WAV wins over the backend preset.
+        """
+        metadata = dict(presets.get(voice_id, {}))
+
+        sidecar = os.path.join(self.reference_dir, f"{voice_id}.json")
+        if os.path.exists(sidecar):
+            try:
+                with open(sidecar) as f:
+                    metadata.update(json.load(f))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring invalid voice metadata {sidecar}: {e}")
+
+        return metadata
+
+    def _load_presets(self) -> Dict[str, dict]:
+        """Map backend voice presets onto reference WAV stems"""
+        if not self.presets_path or not os.path.exists(self.presets_path):
+            return {}
+
+        try:
+            with open(self.presets_path) as f:
+                presets = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring invalid voice presets {self.presets_path}: {e}")
+            return {}
+
+        metadata = {}
+        for preset in presets:
+            reference = preset.get('referenceAudioPath')
+            if not reference:
+                continue
+            stem = os.path.splitext(os.path.basename(reference))[0]
+            metadata[stem] = {
+                'name': preset.get('name'),
+                'description': preset.get('description'),
+                'gender': _gender_from_slider(preset.get('gender')),
+                'age_range': _age_range_from_slider(preset.get('age')),
+            }
+        return metadata
+
+    def _load_index(self) -> None:
+        """Load the on-disk index (ignored if missing or from another version)"""
+        if not os.path.exists(self.index_path):
+            return
+
+        try:
+            with open(self.index_path) as f:
+                data = json.load(f)
+            if data.get('version') != INDEX_VERSION:
+                return
+            self._entries = {
+                item['id']: VoiceEntry.model_validate(item)
+                for item in data.get('voices', [])
+            }
+            logger.info(f"Loaded voice index with {len(self._entries)} voices")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable voice index: {e}")
+
+    def _save_index(self) -> None:
+        """Atomically write the index to disk"""
+        data = {
+            'version': INDEX_VERSION,
+            'voices': [entry.model_dump() for entry in self.list()],
+        }
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp_path, self.index_path)
+
+
+def _file_digest(path: str) -> str:
+    """SHA-256 of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _gender_from_slider(value: Optional[int]) -> str:
+    """Backend gender slider (0=female, 100=male) → 'F' / 'M' / 'N'"""
+    if value is None:
+        return 'N'
+    if value < 45:
+        return 'F'
+    if value > 55:
+        return 'M'
+    return 'N'
+
+
+def _age_range_from_slider(value: Optional[int]) -> str:
+    """Backend age slider → age range label"""
+    if value is None:
+        return 'varies'
+    if value < 30:
+        return 'teen'
+    if value < 60:
+        return 'adult'
+    return 'elder'
@@ -0,0 +1,145 @@
+"""
+Warmup plan
+Preconditions every voice and text-length bucket before the service reports ready
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from adapters.base import EmotionParams, TTSAdapter
+from .duration_budget import duration_budget
+from .render_planner import expected_seconds
+
+logger = logging.getLogger(__name__)
+
+# (coroutine factory, estimated engine seconds) -> result; lets warmup queue behind live requests
+RunFn = Callable[[Callable[[], Awaitable[bytes]], float], Awaitable[bytes]]
+
+BUCKET_TEXTS = {
+    "short": "Here!",
+    "medium": "Stay close and keep quiet, they follow the sound.",
+    "long": (
+        "Rule number one: always check the back seat. Rule number two: never, ever "
+        "split up, no matter how good the plan sounds at the time. And rule number "
+        "three, the one everybody forgets when the lights go out, is that you do not "
+        "go back for the snacks."
+    ),
+}
+
+
+class WarmupPlan(BaseModel):
+    """What to run before the service reports ready"""
+    enabled: bool = True
+    voices: bool = True                 # Precondition every listed voice
+    voice_text: str = "Stay close and keep quiet."   # Long enough to skip the short-utterance path
+    buckets: List[str] = Field(default_factory=lambda: ["short", "medium", "long"])
+
+
+class EngineWarmup(BaseModel):
+    """Warmup timings for one engine"""
+    load_seconds: float = 0.0           # adapter.warmup (model load, compile)
+    voices: Dict[str, float] = Field(default_factory=dict)    # Voice id -> seconds
+    buckets: Dict[str, float] = Field(default_factory=dict)   # Bucket -> seconds
+    errors: List[str] = Field(default_factory=list)
+
+
+class WarmupReport(BaseModel):
+    """Progress of the warmup plan (the service is ready when state is 'done')"""
+    state: str = "pending"              # pending | running | done
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    engines: Dict[str, EngineWarmup] = Field(default_factory=dict)
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "done"
+
+
+async def warm_engine(
+    adapter: TTSAdapter,
+    plan: WarmupPlan,
+    run: RunFn,
+    result: EngineWarmup
+) -> None:
+    """
+    Run the plan against one engine, filling `result` as steps finish
+
+    Model loading runs first (in a worker thread), then one line per voice
+    (loads and caches its conditioning), then one line per length bucket on
+    the default voice (grows allocator pools and compiled shapes to the
+    longest expected sequence). Failures are recorded and skipped.
+    """
+    loop = asyncio.get_running_loop()
+    emotion = EmotionParams(intensity=0.5, valence="neutral")
+
+    start = time.perf_counter()
+    await loop.run_in_executor(None, adapter.warmup)
+    result.load_seconds = round(time.perf_counter() - start, 2)
+    if not plan.enabled:
+        return
+
+    async def timed(text: str, voice_id: str) -> float:
+        budget = duration_budget(text)
+        start = time.perf_counter()
+        await run(
+            lambda: adapter.synthesize(text=text, voice_id=voice_id, emotion=emotion, max_duration=budget),
+            expected_seconds(text)
+        )
+        return round(time.perf_counter() - start, 2)
+
+    voices = [voice.id for voice in adapter.list_voices()] if plan.voices else []
+    for voice_id in voices:
+        try:
+            result.voices[voice_id] = await timed(plan.voice_text, voice_id)
+        except Exception as e:
+            result.errors.append(f"voice {voice_id}: {e}")
+
+    default_voice = voices[0] if voices else "default"
+    for bucket in plan.buckets:
+        text = BUCKET_TEXTS.get(bucket)
+        if text is None:
+            result.errors.append(f"unknown bucket {bucket}")
+            continue
+        try:
+            result.buckets[bucket] = await timed(text, default_voice)
+        except Exception as e:
+            result.errors.append(f"bucket {bucket}: {e}")
+
+
+async def run_warmup(
+    adapters: Dict[str, TTSAdapter],
+    plan: WarmupPlan,
+    run_for: Callable[[str], RunFn],
+    report: WarmupReport
+) -> None:
+    """
+    Warm every engine in turn and mark the report done
+
+    Args:
+        adapters: Engines by name
+        plan: Warmup plan
+        run_for: Engine name -> function that runs work through that engine's queue
+        report: Updated in place (served by /health and /ready while running)
+    """
+    report.state = "running"
+    report.started = time.time()
+    for name, adapter in adapters.items():
+        result = report.engines.setdefault(name, EngineWarmup())
+        logger.info(f"Warming up {name}...")
+        try:
+            await warm_engine(adapter, plan, run_for(name), result)
+        except Exception as e:
+            result.errors.append(str(e))
+            logger.error(f"Failed to warm up {name}: {e}")
+            continue
+        logger.info(
+            f"{name} warm: load {result.load_seconds}s, {len(result.voices)} voices "
+            f"({sum(result.voices.values()):.1f}s), buckets {result.buckets}"
+        )
+    report.state = "done"
+    report.finished = time.time()
+    logger.info(f"Warmup plan finished in {report.finished - report.started:.1f}s; service ready")